@@ -1,23 +1,41 @@
 import os
 import json
 import time
+import inspect
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from engine.metrics import SniperMetrics
 
 
+def _accepts_stage(processor) -> bool:
+    try:
+        params = inspect.signature(processor).parameters
+    except (TypeError, ValueError):
+        return False
+    return "stage" in params or any(p.kind == p.VAR_KEYWORD for p in params.values())
+
+
 class SniperBatchRunner:
     """
     Batch Orchestrator Wrapper
     - processor(symbol) 형태의 callable 주입
     - Core Engine 직접 의존 금지
+    - max_workers > 1 이면 종목 단위 병렬 실행 (I/O bound processor 대상)
+    - processor가 stage 인자를 받으면 processor(symbol, stage=metrics.stage)로 호출
+    - 종목 처리 동안 metrics가 bind되어 하위 코드의 engine.metrics.stage("fetch" / "indicator" / "llm")도 기록
     """
 
-    def __init__(self, processor, base_dir=None):
+    def __init__(self, processor, base_dir=None, max_workers=None):
         if base_dir is None:
             base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
+        if max_workers is None:
+            max_workers = int(os.getenv("SNIPER_BATCH_WORKERS", "1"))
+
         self.processor = processor
+        self._pass_stage = _accepts_stage(processor)
         self.base_dir = base_dir
+        self.max_workers = max(1, int(max_workers))
         self.out_dir = os.path.join(base_dir, "data", "out")
         self.metrics = SniperMetrics(base_dir=base_dir)
 
@@ -30,49 +48,78 @@ class SniperBatchRunner:
         day_out_dir = os.path.join(self.out_dir, date_str)
         os.makedirs(day_out_dir, exist_ok=True)
 
-        results = {}
-
+        # 같은 종목의 중복 호출은 한 task 안에서 입력 순서대로 처리
+        # (순차 실행과 동일한 출력 파일 / 결과 보장)
+        groups = {}
         for symbol in symbols:
-            start = time.time()
+            groups[symbol] = groups.get(symbol, 0) + 1
+
+        if self.max_workers == 1 or len(groups) <= 1:
+            outcomes = {
+                symbol: self._process_repeated(symbol, count, day_out_dir)
+                for symbol, count in groups.items()
+            }
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(groups))) as pool:
+                futures = {
+                    symbol: pool.submit(self._process_repeated, symbol, count, day_out_dir)
+                    for symbol, count in groups.items()
+                }
+                outcomes = {symbol: f.result() for symbol, f in futures.items()}
+
+        results = {symbol: outcomes[symbol] for symbol in groups}
 
-            try:
-                # ---- Core Call ----
-                result = self.processor(symbol)
+        metrics_path = self.metrics.write()
+        return results, metrics_path
 
-                # ---- Metrics Update ----
-                self.metrics.inc("symbol_processed_count")
+    def _process_repeated(self, symbol, count, day_out_dir):
+        result = None
+        for _ in range(count):
+            result = self._process_one(symbol, day_out_dir)
+        return result
 
-                if result.get("cache_hit"):
-                    self.metrics.inc("cache_hit_count")
+    def _process_one(self, symbol, day_out_dir):
+        start = time.time()
+
+        try:
+            # ---- Core Call ----
+            with self.metrics.bind(), self.metrics.stage("process"):
+                if self._pass_stage:
+                    result = self.processor(symbol, stage=self.metrics.stage)
                 else:
-                    self.metrics.inc("cache_miss_count")
+                    result = self.processor(symbol)
+
+            # ---- Metrics Update ----
+            self.metrics.inc("symbol_processed_count")
 
-                if result.get("api_called"):
-                    self.metrics.inc("api_call_count")
+            if result.get("cache_hit"):
+                self.metrics.inc("cache_hit_count")
+            else:
+                self.metrics.inc("cache_miss_count")
 
-                if result.get("blocked"):
-                    self.metrics.inc("kill_switch_block_count")
+            if result.get("api_called"):
+                self.metrics.inc("api_call_count")
 
-                # ---- Persist Result ----
-                out_path = os.path.join(day_out_dir, f"{symbol}.json")
+            if result.get("blocked"):
+                self.metrics.inc("kill_switch_block_count")
+
+            # ---- Persist Result ----
+            out_path = os.path.join(day_out_dir, f"{symbol}.json")
+            with self.metrics.stage("persist"):
                 with open(out_path, "w", encoding="utf-8") as f:
                     json.dump(result, f, indent=2)
 
-                results[symbol] = result
+            return result
 
-            except Exception as e:
-                # 🔴 Loop Integrity 보장
-                self.metrics.inc("error_count")
-                results[symbol] = {
-                    "symbol": symbol,
-                    "status": "error",
-                    "error": str(e),
-                }
-                continue
+        except Exception as e:
+            # 🔴 Loop Integrity 보장
+            self.metrics.inc("error_count")
+            return {
+                "symbol": symbol,
+                "status": "error",
+                "error": str(e),
+            }
 
-            finally:
-                elapsed = time.time() - start
-                self.metrics.record_latency(elapsed)
-
-        metrics_path = self.metrics.write()
-        return results, metrics_path
+        finally:
+            elapsed = time.time() - start
+            self.metrics.record_latency(elapsed)
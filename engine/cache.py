@@ -5,15 +5,162 @@ import time
 import fcntl
 import logging
 import shutil
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 
+from engine.cache_backends import make_cache_backend
+
+
+def _normalize_text(text) -> str:
+    return " ".join(str(text).split())
+
+
+def _canonical_bars(bars):
+    """price bars (DataFrame 또는 dict 리스트) → 날짜순 [date, O, H, L, C, V] (반올림)"""
+    if hasattr(bars, "to_dict") and hasattr(bars, "index"):
+        rows = [dict(row, Date=str(idx)[:10]) for idx, row in bars.to_dict("index").items()]
+    else:
+        rows = list(bars or [])
+
+    out = []
+    for row in rows:
+        date = str(row.get("Date") or row.get("date") or "")[:10]
+        values = [row.get(c, row.get(c.lower())) for c in ("Open", "High", "Low", "Close", "Volume")]
+        out.append([date] + [round(float(v), 4) if v is not None else None for v in values])
+    return sorted(out, key=lambda r: r[0])
+
+
+def fingerprint_inputs(symbol: str, payload: dict, template: str = "") -> str:
+    """
+    LLM 입력 fingerprint (prompt 문구와 무관한 구조적 입력 기준)
+    - price_bars (마지막 종가 기준 일봉) 가 있으면 사용, 없으면 flow_summary
+    - news_items 의 id (id / uuid / link / title) 가 있으면 사용, 없으면 news_summary
+    - fundamentals: key 정렬 JSON
+    - template: prompt 고정 문구 버전 / hash (doctrine / schema 변경 시 직전 결과 재사용 중단)
+    """
+    payload = payload or {}
+    canonical = {"symbol": symbol.strip().upper(), "template": template}
+
+    if payload.get("price_bars") is not None:
+        canonical["price"] = _canonical_bars(payload["price_bars"])
+    else:
+        canonical["flow"] = _normalize_text(payload.get("flow_summary", ""))
+
+    if payload.get("news_items") is not None:
+        ids = {
+            str(item.get("id") or item.get("uuid") or item.get("link") or item.get("title"))
+            if isinstance(item, dict) else str(item)
+            for item in payload["news_items"]
+        }
+        canonical["news"] = sorted(ids)
+    else:
+        canonical["news"] = _normalize_text(payload.get("news_summary", ""))
+
+    canonical["fundamentals"] = payload.get("fundamentals") or {}
+
+    raw = json.dumps(canonical, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class MemoryCacheTier:
+    """
+    In-process LRU 캐시 (파일 tier 앞단)
+    - 항목 = 직렬화된 cache packet UTF-8 bytes (hit 시 새 dict로 복원 → 호출자 변경이 캐시에 남지 않음)
+    - 개수 / 바이트 상한 초과 시 만료 항목 먼저 정리 후 LRU 순으로 제거
+    """
+
+    def __init__(self, max_entries=1024, max_bytes=32 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._items = OrderedDict()  # key -> (expires_at_ts, raw)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0 and self.max_bytes > 0
+
+    def get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            if item[0] <= time.time():
+                self._drop(key)
+                return None
+            self._items.move_to_end(key)
+            raw = item[1]
+        return json.loads(raw)
+
+    def put(self, key, content: dict, expires_at_ts: float) -> int:
+        """반환: 이번 put으로 제거된 항목 수"""
+        raw = json.dumps(content, ensure_ascii=False).encode("utf-8")
+        if not self.enabled or len(raw) > self.max_bytes:
+            return 0
+
+        with self._lock:
+            if key in self._items:
+                self._drop(key)
+            self._items[key] = (expires_at_ts, raw)
+            self._bytes += len(raw)
+            return self._evict()
+
+    def delete(self, key):
+        with self._lock:
+            if key in self._items:
+                self._drop(key)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self._bytes = 0
+
+    def __len__(self):
+        return len(self._items)
+
+    @property
+    def size_bytes(self):
+        return self._bytes
+
+    def _drop(self, key):
+        _, raw = self._items.pop(key)
+        self._bytes -= len(raw)
+
+    def _over_limit(self):
+        return len(self._items) > self.max_entries or self._bytes > self.max_bytes
+
+    def _evict(self) -> int:
+        if not self._over_limit():
+            return 0
+
+        evicted = 0
+        # 1) 만료 항목 우선 정리
+        now = time.time()
+        for key in [k for k, (exp, _) in self._items.items() if exp <= now]:
+            self._drop(key)
+            evicted += 1
+
+        # 2) LRU 순 제거
+        while self._over_limit():
+            self._drop(next(iter(self._items)))
+            evicted += 1
+        return evicted
+
+
 class SniperCacheLayer:
-    def __init__(self, base_dir=None, ttl_minutes=60):
+    def __init__(self, base_dir=None, ttl_minutes=60, memory_max_entries=1024, memory_max_bytes=32 * 1024 * 1024, backend=None, stale_grace_minutes=None, compression=None, max_bytes=None):
         if base_dir is None:
             base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
         
         self.cache_root = os.path.join(base_dir, "data", "cache")
         self.ttl_seconds = ttl_minutes * 60
+        # Stale-while-revalidate: TTL 경과 후 grace 구간에서는 stale 응답 즉시 반환 + 백그라운드 갱신
+        if stale_grace_minutes is None:
+            stale_grace_minutes = float(os.getenv("SNIPER_CACHE_STALE_GRACE_MINUTES", "0"))
+        self.stale_grace_seconds = stale_grace_minutes * 60
         self.logger = logging.getLogger("CacheLayer")
         
         if not self.logger.handlers:
@@ -22,75 +169,264 @@ class SniperCacheLayer:
             handler.setFormatter(formatter)
             self.logger.addHandler(handler)
 
+        # Tier 0: 프로세스 메모리 LRU / Tier 1: 영속 backend (file / sqlite)
+        # - compression: none / zlib / zstd, max_bytes: backend 총 용량 상한 (0 = 무제한, 초과 시 LRU 제거)
+        if compression is None:
+            compression = os.getenv("SNIPER_CACHE_COMPRESSION", "none")
+        if max_bytes is None:
+            max_bytes = int(os.getenv("SNIPER_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+        if backend is None or isinstance(backend, str):
+            backend = make_cache_backend(
+                backend or os.getenv("SNIPER_CACHE_BACKEND", "file"), self.cache_root, self.logger,
+                compression=compression, max_bytes=max_bytes,
+            )
+        self.backend = backend
+        self.memory = MemoryCacheTier(max_entries=memory_max_entries, max_bytes=memory_max_bytes)
+        self._stats_lock = threading.Lock()
+        self.stats = {
+            "memory": {"hit": 0, "miss": 0, "eviction": 0},
+            self.backend.name: {"hit": 0, "miss": 0, "expired": 0, "write": 0, "eviction": 0},
+            "single_flight": {"leader": 0, "coalesced": 0},
+            "swr": {"stale_served": 0, "refresh_ok": 0, "refresh_blocked": 0, "refresh_failed": 0},
+            "fingerprint": {"reuse": 0, "changed": 0, "new": 0},
+        }
+
+        # Single-flight: 동일 key 동시 miss → LLM 호출 1회 (스레드 lock + 프로세스 간 fcntl lock)
+        # 프로세스 간 lock은 key별 파일 (.locks/<hash_key[:2]>/<hash_key>.lock) → 다른 key끼리 대기 없음
+        # 보유자가 해제 직전 삭제, 대기자는 lock 획득 후 inode 확인 (삭제된 파일이면 재시도)
+        self.lock_dir = os.path.join(self.cache_root, ".locks")
+        self._inflight = {}
+        self._inflight_guard = threading.Lock()
+
+        # 백그라운드 갱신 (key당 1건만 예약)
+        self._refresh_pool = None
+        self._refreshing = {}
+
+    def _count(self, tier, event, value=1):
+        with self._stats_lock:
+            self.stats[tier][event] += value
+
+    def get_stats(self) -> dict:
+        with self._stats_lock:
+            stats = {tier: dict(counters) for tier, counters in self.stats.items()}
+        stats["memory"]["entries"] = len(self.memory)
+        stats["memory"]["bytes"] = self.memory.size_bytes
+        stats[self.backend.name].update(self.backend.footprint())
+        return stats
+
+    def _put(self, symbol, hash_key, content):
+        evicted = self.backend.put(symbol, hash_key, content)
+        if evicted:
+            self._count(self.backend.name, "eviction", evicted)
+
     def _generate_key(self, provider: str, model: str, symbol: str, prompt: str) -> str:
         normalized_prompt = " ".join(prompt.strip().lower().split())
         payload = f"{provider}|{model}|{symbol}|{normalized_prompt}"
         hash_key = hashlib.sha256(payload.encode('utf-8')).hexdigest()
         return hash_key
 
-    def _get_cache_path(self, symbol: str, hash_key: str) -> str:
-        today = datetime.now().strftime("%Y-%m-%d")
-        daily_dir = os.path.join(self.cache_root, today)
-        os.makedirs(daily_dir, exist_ok=True)
-        filename = f"{symbol}_{hash_key}.json"
-        return os.path.join(daily_dir, filename)
+    def purge(self, older_than_days: float) -> int:
+        """backend 일괄 정리 (cached_at 기준) + 메모리 tier 비움"""
+        self.memory.clear()
+        return self.backend.purge(time.time() - older_than_days * 86400)
 
-    def _read_cache(self, path: str) -> dict:
-        if not os.path.exists(path):
-            return None
-        try:
-            with open(path, 'r', encoding='utf-8') as f:
-                fcntl.flock(f, fcntl.LOCK_SH)
-                data = json.load(f)
-                fcntl.flock(f, fcntl.LOCK_UN)
-                return data
-        except Exception as e:
-            self.logger.warning(f"Cache Read Failed: {e}")
-            return None
+    def index_by_day(self) -> dict:
+        """기록 일자별 캐시 항목 수 (리포트용; key 자체는 날짜 무관)"""
+        return self.backend.index_by_day()
+
+    def _promote(self, key: str, packet: dict):
+        if not self.memory.enabled:
+            return
+        expires_at = packet.get("meta", {}).get("cached_at_ts", 0) + self.ttl_seconds + self.stale_grace_seconds
+        evicted = self.memory.put(key, packet, expires_at)
+        if evicted:
+            self._count("memory", "eviction", evicted)
 
-    def _write_cache(self, path: str, content: dict):
+    @contextmanager
+    def _single_flight(self, hash_key: str):
+        with self._inflight_guard:
+            entry = self._inflight.setdefault(hash_key, [threading.Lock(), 0])
+            entry[1] += 1
         try:
-            temp_path = path + ".tmp"
-            with open(temp_path, 'w', encoding='utf-8') as f:
-                fcntl.flock(f, fcntl.LOCK_EX)
-                json.dump(content, f, indent=2, ensure_ascii=False)
-                f.flush()
-                os.fsync(f.fileno())
-                fcntl.flock(f, fcntl.LOCK_UN)
-            os.replace(temp_path, path)
-        except Exception as e:
-            self.logger.error(f"Cache Write Failed: {e}")
-            if os.path.exists(temp_path):
-                os.remove(temp_path)
+            with entry[0]:
+                path = os.path.join(self.lock_dir, hash_key[:2], f"{hash_key}.lock")
+                lock_f = self._acquire_file_lock(path)
+                try:
+                    yield
+                finally:
+                    try:
+                        os.unlink(path)
+                    except FileNotFoundError:
+                        pass
+                    fcntl.flock(lock_f, fcntl.LOCK_UN)
+                    lock_f.close()
+        finally:
+            with self._inflight_guard:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    self._inflight.pop(hash_key, None)
 
-    def resolve_request(self, provider, model, symbol, prompt, gatekeeper_status, llm_call_func) -> dict:
-        hash_key = self._generate_key(provider, model, symbol, prompt)
-        cache_path = self._get_cache_path(symbol, hash_key)
-        
-        cached_data = self._read_cache(cache_path)
+    @staticmethod
+    def _acquire_file_lock(path):
+        """path의 배타 fcntl lock 획득 (대기 중 이전 보유자가 삭제한 파일이면 새 파일로 재시도)"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        while True:
+            lock_f = open(path, "a")
+            fcntl.flock(lock_f, fcntl.LOCK_EX)
+            try:
+                if os.stat(path).st_ino == os.fstat(lock_f.fileno()).st_ino:
+                    return lock_f
+            except FileNotFoundError:
+                pass
+            fcntl.flock(lock_f, fcntl.LOCK_UN)
+            lock_f.close()
+
+    def _lookup(self, symbol, hash_key, memory_key, record=True):
+        """
+        cache packet 조회: Memory → Backend
+        - 반환: (packet, fresh) / 없으면 (None, False)
+        - fresh=False: TTL 경과했지만 stale grace 구간 이내
+        """
+        store = self.backend.name
+
+        # Tier 0: Memory
+        if self.memory.enabled:
+            cached_data = self.memory.get(memory_key)
+            if cached_data is not None:
+                fresh = self._is_fresh(cached_data)
+                if record: self._count("memory", "hit")
+                if fresh:
+                    self.logger.info(f"🟢 [HIT] Memory cache used for {symbol} (Ghost Mode Active)")
+                return cached_data, fresh
+            if record: self._count("memory", "miss")
+
+        # Tier 1: Backend
+        cached_data = self.backend.get(symbol, hash_key)
         
         if cached_data:
-            timestamp = cached_data.get("meta", {}).get("cached_at_ts", 0)
-            if time.time() - timestamp < self.ttl_seconds:
-                self.logger.info(f"🟢 [HIT] Cache used for {symbol} (Ghost Mode Active)")
-                return cached_data["payload"]
+            age = time.time() - cached_data.get("meta", {}).get("cached_at_ts", 0)
+            if age < self.ttl_seconds + self.stale_grace_seconds:
+                fresh = age < self.ttl_seconds
+                if record: self._count(store, "hit")
+                self._promote(memory_key, cached_data)
+                if fresh:
+                    self.logger.info(f"🟢 [HIT] Cache used for {symbol} (Ghost Mode Active)")
+                return cached_data, fresh
             else:
+                if record: self._count(store, "expired")
                 self.logger.info(f"🟡 [EXPIRED] Cache found but expired for {symbol}")
-                try: os.remove(cache_path)
-                except: pass
+                self.backend.delete(symbol, hash_key)
+        elif record:
+            self._count(store, "miss")
+        return None, False
+
+    def _is_fresh(self, packet: dict) -> bool:
+        return time.time() - packet.get("meta", {}).get("cached_at_ts", 0) < self.ttl_seconds
+
+    def _fingerprint_key(self, provider: str, model: str, symbol: str) -> str:
+        return hashlib.sha256(f"fingerprint|{provider}|{model}|{symbol}".encode('utf-8')).hexdigest()
+
+    def resolve_request(self, provider, model, symbol, prompt, gatekeeper_status, llm_call_func, input_fingerprint=None) -> dict:
+        """
+        gatekeeper_status: dict 또는 dict를 반환하는 callable
+        - callable이면 실제 LLM 호출 직전(single-flight leader)에만 평가 → 대기자는 slot 미소모
+        - stale grace 구간의 항목은 즉시 반환하고 갱신은 백그라운드에서 (gatekeeper 동일 적용)
+        input_fingerprint: fingerprint_inputs() 값
+        - 직전 분석과 입력이 같으면 TTL과 무관하게 직전 결과 재사용 (LLM / gatekeeper 호출 없음)
+        """
+        if not input_fingerprint:
+            return self._resolve(provider, model, symbol, prompt, gatekeeper_status, llm_call_func)
+
+        fp_key = self._fingerprint_key(provider, model, symbol)
+        record = self.backend.get(symbol, fp_key)
+        if record and record.get("meta", {}).get("fingerprint") == input_fingerprint:
+            self._count("fingerprint", "reuse")
+            self.logger.info(f"🟣 [REUSE] Inputs unchanged for {symbol} (fingerprint match)")
+            return record["payload"]
+        self._count("fingerprint", "changed" if record else "new")
+
+        result = self._resolve(provider, model, symbol, prompt, gatekeeper_status, llm_call_func)
+        self._store_fingerprint(provider, model, symbol, input_fingerprint, result)
+        return result
+
+    def _store_fingerprint(self, provider, model, symbol, input_fingerprint, result):
+        self._put(symbol, self._fingerprint_key(provider, model, symbol), {
+            "meta": {
+                "fingerprint": input_fingerprint,
+                "cached_at": datetime.now().isoformat(),
+                "cached_at_ts": time.time(),
+                "provider": provider,
+                "model": model,
+            },
+            "payload": result,
+        })
+
+    def store_result(self, provider, model, symbol, prompt, result, input_fingerprint=None):
+        """
+        이미 받은 LLM 결과를 prompt key (+ fingerprint)로 저장 (batch 응답 분배용)
+        - stale 항목이 있어도 덮어씀 (resolve_request와 달리 조회 / gatekeeper 없음)
+        """
+        hash_key = self._generate_key(provider, model, symbol, prompt)
+        self._store_packet(provider, model, symbol, hash_key, f"{symbol}_{hash_key}", result)
+        if input_fingerprint:
+            self._store_fingerprint(provider, model, symbol, input_fingerprint, result)
+
+    def peek_request(self, provider, model, symbol, prompt, input_fingerprint=None):
+        """
+        LLM / gatekeeper 호출 없이 재사용 가능한 결과 조회 (batch 구성 전 제외용)
+        - fingerprint 일치 또는 TTL 이내 항목의 payload, 없으면 None
+        """
+        if input_fingerprint:
+            record = self.backend.get(symbol, self._fingerprint_key(provider, model, symbol))
+            if record and record.get("meta", {}).get("fingerprint") == input_fingerprint:
+                self._count("fingerprint", "reuse")
+                return record["payload"]
+
+        hash_key = self._generate_key(provider, model, symbol, prompt)
+        cached_data, fresh = self._lookup(symbol, hash_key, f"{symbol}_{hash_key}", record=False)
+        return cached_data["payload"] if cached_data is not None and fresh else None
+
+    def _resolve(self, provider, model, symbol, prompt, gatekeeper_status, llm_call_func) -> dict:
+        hash_key = self._generate_key(provider, model, symbol, prompt)
+        memory_key = f"{symbol}_{hash_key}"
+
+        cached_data, fresh = self._lookup(symbol, hash_key, memory_key)
+        if cached_data is not None:
+            if not fresh:
+                self._count("swr", "stale_served")
+                self.logger.info(f"🟠 [STALE] Serving stale cache for {symbol} (refresh scheduled)")
+                self._schedule_refresh(provider, model, symbol, hash_key, memory_key, gatekeeper_status, llm_call_func)
+            return cached_data["payload"]
 
         self.logger.info(f"⚪ [MISS] No valid cache for {symbol}")
+        return self._fill(provider, model, symbol, hash_key, memory_key, gatekeeper_status, llm_call_func)
 
-        if not gatekeeper_status["allowed"]:
-            self.logger.error(f"🔴 [BLOCK] Gatekeeper denied access: {gatekeeper_status['reason']}")
-            raise PermissionError(f"Gatekeeper Blocked: {gatekeeper_status['reason']}")
+    def _fill(self, provider, model, symbol, hash_key, memory_key, gatekeeper_status, llm_call_func) -> dict:
+        with self._single_flight(hash_key):
+            # 대기 중 다른 호출자(스레드 / 프로세스)가 채웠으면 그 결과 사용
+            cached_data, fresh = self._lookup(symbol, hash_key, memory_key, record=False)
+            if cached_data is not None and fresh:
+                self._count("single_flight", "coalesced")
+                return cached_data["payload"]
+            self._count("single_flight", "leader")
 
-        try:
-            llm_result = llm_call_func()
-        except Exception as e:
-            self.logger.error(f"LLM Call Failed: {e}")
-            raise e
+            if callable(gatekeeper_status):
+                gatekeeper_status = gatekeeper_status()
 
+            if not gatekeeper_status["allowed"]:
+                self.logger.error(f"🔴 [BLOCK] Gatekeeper denied access: {gatekeeper_status['reason']}")
+                raise PermissionError(f"Gatekeeper Blocked: {gatekeeper_status['reason']}")
+
+            try:
+                llm_result = llm_call_func()
+            except Exception as e:
+                self.logger.error(f"LLM Call Failed: {e}")
+                raise e
+
+            self._store_packet(provider, model, symbol, hash_key, memory_key, llm_result)
+            return llm_result
+
+    def _store_packet(self, provider, model, symbol, hash_key, memory_key, llm_result):
         cache_packet = {
             "meta": {
                 "key": hash_key,
@@ -102,6 +438,41 @@ class SniperCacheLayer:
             },
             "payload": llm_result
         }
-        self._write_cache(cache_path, cache_packet)
+        self._put(symbol, hash_key, cache_packet)
+        self._count(self.backend.name, "write")
+        self._promote(memory_key, cache_packet)
         self.logger.info(f"🔵 [SAVED] New cache created for {symbol}")
-        return llm_result
+
+    # -----------------------------
+    # Stale-While-Revalidate
+    # -----------------------------
+
+    def _schedule_refresh(self, provider, model, symbol, hash_key, memory_key, gatekeeper_status, llm_call_func):
+        with self._inflight_guard:
+            if hash_key in self._refreshing:
+                return
+            if self._refresh_pool is None:
+                self._refresh_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="cache-refresh")
+            self._refreshing[hash_key] = self._refresh_pool.submit(
+                self._refresh, provider, model, symbol, hash_key, memory_key, gatekeeper_status, llm_call_func
+            )
+
+    def _refresh(self, provider, model, symbol, hash_key, memory_key, gatekeeper_status, llm_call_func):
+        try:
+            self._fill(provider, model, symbol, hash_key, memory_key, gatekeeper_status, llm_call_func)
+            self._count("swr", "refresh_ok")
+        except PermissionError:
+            self._count("swr", "refresh_blocked")
+        except Exception as e:
+            self._count("swr", "refresh_failed")
+            self.logger.warning(f"Background refresh failed for {symbol}: {e}")
+        finally:
+            with self._inflight_guard:
+                self._refreshing.pop(hash_key, None)
+
+    def wait_for_refreshes(self, timeout=None):
+        """예약된 백그라운드 갱신 완료 대기 (batch 종료 시점 등)"""
+        with self._inflight_guard:
+            futures = list(self._refreshing.values())
+        for f in futures:
+            f.result(timeout=timeout)
@@ -0,0 +1,465 @@
+import os
+import json
+import time
+import zlib
+import fcntl
+import sqlite3
+import logging
+import threading
+from datetime import datetime
+
+try:
+    import zstandard  # 선택 의존성 (없으면 zlib 사용)
+except ImportError:
+    zstandard = None
+
+CODECS = ("none", "zlib", "zstd")
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+# 용량 상한 초과 시 이 비율까지 정리 (put마다 정리가 반복되지 않도록)
+EVICT_TARGET_RATIO = 0.9
+
+
+def _day_of(ts: float) -> str:
+    return datetime.fromtimestamp(ts).strftime("%Y-%m-%d")
+
+
+def resolve_codec(name, logger=None) -> str:
+    """SNIPER_CACHE_COMPRESSION 값 (none / zlib / zstd) → 사용 가능한 codec"""
+    key = (name or "none").strip().lower()
+    if key not in CODECS:
+        raise ValueError(f"Unknown cache compression: {name}")
+    if key == "zstd" and zstandard is None:
+        (logger or logging.getLogger("CacheLayer")).warning("zstandard not installed → zlib compression used")
+        return "zlib"
+    return key
+
+
+def encode_payload(content: dict, codec: str = "none") -> bytes:
+    """compact JSON (indent 없음) + 선택 압축"""
+    raw = json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    if codec == "zlib":
+        return zlib.compress(raw, 6)
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=3).compress(raw)
+    return raw
+
+
+def decode_payload(blob) -> dict:
+    """저장 형식 자동 판별 (JSON 텍스트 / zlib / zstd) → codec 변경 전 항목도 그대로 읽음"""
+    if isinstance(blob, str):
+        return json.loads(blob)
+    if blob[:4] == _ZSTD_MAGIC:
+        if zstandard is None:
+            raise ValueError("zstd payload but zstandard not installed")
+        blob = zstandard.ZstdDecompressor().decompress(blob)
+    elif blob[:1] == b"x":  # zlib header (JSON은 '{' 로 시작)
+        blob = zlib.decompress(blob)
+    return json.loads(blob)
+
+
+class FileCacheBackend:
+    """
+    기본 저장소: 내용 해시 주소 (날짜 무관)
+    - 항목: data/cache/objects/<sha256[:2]>/<symbol>_<sha256>.json (compact JSON, 선택 압축)
+    - 날짜 인덱스: data/cache/index/<date>.jsonl (기록 일자별 key 목록 → 리포트 / purge)
+    - max_bytes > 0: objects 총 용량 상한, 초과 시 최근 조회(atime)가 오래된 항목부터 제거
+    """
+
+    name = "file"
+
+    def __init__(self, cache_root, logger=None, compression="none", max_bytes=0):
+        self.cache_root = cache_root
+        self.objects_dir = os.path.join(cache_root, "objects")
+        self.index_dir = os.path.join(cache_root, "index")
+        self.logger = logger or logging.getLogger("CacheLayer")
+        self.codec = resolve_codec(compression, self.logger)
+        self.max_bytes = max_bytes or 0
+
+        # objects 용량 / 개수 (최초 조회 시 1회 scan 후 증감 반영)
+        self._size_lock = threading.Lock()
+        self._bytes = None
+        self._entries = None
+
+    def path_for(self, symbol: str, hash_key: str) -> str:
+        return os.path.join(self.objects_dir, hash_key[:2], f"{symbol}_{hash_key}.json")
+
+    def get(self, symbol: str, hash_key: str):
+        path = self.path_for(symbol, hash_key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'rb') as f:
+                fcntl.flock(f, fcntl.LOCK_SH)
+                blob = f.read()
+                fcntl.flock(f, fcntl.LOCK_UN)
+            # LRU 순서 = atime (mtime은 purge 기준이므로 유지; noatime mount에서도 명시 갱신)
+            os.utime(path, (time.time(), os.path.getmtime(path)))
+            return decode_payload(blob)
+        except Exception as e:
+            self.logger.warning(f"Cache Read Failed: {e}")
+            return None
+
+    def put(self, symbol: str, hash_key: str, content: dict) -> int:
+        """반환: 용량 상한으로 제거된 항목 수"""
+        path = self.path_for(symbol, hash_key)
+        temp_path = path + ".tmp"
+        try:
+            blob = encode_payload(content, self.codec)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(temp_path, 'wb') as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                f.write(blob)
+                f.flush()
+                os.fsync(f.fileno())
+                fcntl.flock(f, fcntl.LOCK_UN)
+            old_size = self._file_size(path)
+            os.replace(temp_path, path)
+            self._account(len(blob) - (old_size or 0), 0 if old_size is not None else 1)
+            self._index(symbol, hash_key, content)
+        except Exception as e:
+            self.logger.error(f"Cache Write Failed: {e}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return 0
+        return self._enforce_limit()
+
+    def _index(self, symbol: str, hash_key: str, content: dict):
+        ts = content.get("meta", {}).get("cached_at_ts", time.time())
+        os.makedirs(self.index_dir, exist_ok=True)
+        line = json.dumps({"key": hash_key, "symbol": symbol, "cached_at_ts": ts}) + "\n"
+        # O_APPEND 한 줄 쓰기 = 프로세스 간 원자적
+        with open(os.path.join(self.index_dir, f"{_day_of(ts)}.jsonl"), "a", encoding="utf-8") as f:
+            f.write(line)
+
+    def put_many(self, items):
+        """items: [(symbol, hash_key, content), ...]"""
+        return sum(self.put(symbol, hash_key, content) for symbol, hash_key, content in items)
+
+    def delete(self, symbol: str, hash_key: str):
+        path = self.path_for(symbol, hash_key)
+        size = self._file_size(path)
+        try:
+            os.remove(path)
+            self._account(-(size or 0), -1)
+        except OSError:
+            pass
+
+    # -----------------------------
+    # Size accounting / LRU eviction
+    # -----------------------------
+
+    @staticmethod
+    def _file_size(path):
+        try:
+            return os.path.getsize(path)
+        except OSError:
+            return None
+
+    def _scan(self):
+        """objects 트리 → [(path, size, atime), ...]"""
+        out = []
+        if not os.path.isdir(self.objects_dir):
+            return out
+        for shard in os.scandir(self.objects_dir):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.endswith(".tmp"):
+                    continue
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                out.append((entry.path, st.st_size, st.st_atime))
+        return out
+
+    def _account(self, delta_bytes, delta_entries):
+        with self._size_lock:
+            if self._bytes is not None:
+                self._bytes += delta_bytes
+                self._entries += delta_entries
+
+    def footprint(self) -> dict:
+        """저장 항목 수 / 바이트 (압축 후 실제 디스크 기준)"""
+        with self._size_lock:
+            if self._bytes is None:
+                files = self._scan()
+                self._bytes = sum(size for _, size, _ in files)
+                self._entries = len(files)
+            return {"entries": self._entries, "bytes": self._bytes, "max_bytes": self.max_bytes, "codec": self.codec}
+
+    def _enforce_limit(self) -> int:
+        if self.max_bytes <= 0 or self.footprint()["bytes"] <= self.max_bytes:
+            return 0
+
+        with self._size_lock:
+            files = sorted(self._scan(), key=lambda item: item[2])
+            total = sum(size for _, size, _ in files)
+            target = self.max_bytes * EVICT_TARGET_RATIO
+            evicted = 0
+            for path, size, _ in files:
+                if total <= target:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+                evicted += 1
+            self._bytes = total
+            self._entries = len(files) - evicted
+
+        if evicted:
+            self.logger.info(f"🧹 [EVICT] {evicted} cache objects removed (size cap {self.max_bytes} bytes)")
+        return evicted
+
+    def _read_index(self, day: str):
+        try:
+            with open(os.path.join(self.index_dir, f"{day}.jsonl"), encoding="utf-8") as f:
+                return [json.loads(line) for line in f if line.strip()]
+        except (OSError, ValueError):
+            return []
+
+    def index_by_day(self) -> dict:
+        """기록 일자별 항목 수 (key 중복 제외)"""
+        if not os.path.isdir(self.index_dir):
+            return {}
+        out = {}
+        for name in sorted(os.listdir(self.index_dir)):
+            if name.endswith(".jsonl"):
+                day = name[:-len(".jsonl")]
+                out[day] = len({row["key"] for row in self._read_index(day)})
+        return out
+
+    def purge(self, before_ts: float) -> int:
+        """
+        cached_at < before_ts 인 항목 삭제
+        - 날짜 인덱스 기준으로 대상만 삭제 (objects 트리 순회 없음)
+        - 이후 다시 기록된 key(더 최근 mtime)는 유지
+        """
+        deleted = 0
+        cutoff_day = _day_of(before_ts)
+        if os.path.isdir(self.index_dir):
+            for name in os.listdir(self.index_dir):
+                day = name[:-len(".jsonl")]
+                if not name.endswith(".jsonl") or day >= cutoff_day:
+                    continue
+                for row in self._read_index(day):
+                    path = self.path_for(row["symbol"], row["key"])
+                    try:
+                        if os.path.getmtime(path) < before_ts:
+                            os.remove(path)
+                            deleted += 1
+                    except OSError:
+                        pass
+                try:
+                    os.remove(os.path.join(self.index_dir, name))
+                except OSError:
+                    pass
+
+        # 구 레이아웃 (data/cache/<date>/) 항목
+        # .locks: 고정 stripe lock 파일 (다른 프로세스가 잡고 있을 수 있으므로 삭제 금지)
+        if os.path.isdir(self.cache_root):
+            for name in os.listdir(self.cache_root):
+                sub = os.path.join(self.cache_root, name)
+                if name in ("objects", "index", ".locks") or not os.path.isdir(sub):
+                    continue
+                deleted += self._purge_flat_dir(sub, before_ts)
+
+        with self._size_lock:
+            self._bytes = self._entries = None  # 다음 footprint()에서 재계산
+        return deleted
+
+    @staticmethod
+    def _purge_flat_dir(directory: str, before_ts: float) -> int:
+        removed = 0
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            try:
+                if os.path.getmtime(path) < before_ts:
+                    os.remove(path)
+                    removed += 1
+            except OSError:
+                pass
+        try:
+            os.rmdir(directory)
+        except OSError:
+            pass
+        return removed
+
+
+class SQLiteCacheBackend:
+    """
+    단일 파일 KV 저장소: data/cache/cache.sqlite3 (WAL)
+    - key(내용 해시) PRIMARY KEY 조회 = O(1)
+    - day / cached_at_ts 인덱스로 일자별 리포트, TTL 만료 / 일괄 purge (파일 트리 순회 없음)
+    - content = compact JSON BLOB (선택 압축), max_bytes > 0 이면 accessed_ts 기준 LRU 제거
+    - payload 바이트 합계는 open 시 1회 집계 후 put / delete / purge에서 증감 (쓰기마다 전체 SUM 없음)
+    """
+
+    name = "sqlite"
+    DB_NAME = "cache.sqlite3"
+
+    def __init__(self, cache_root, logger=None, compression="none", max_bytes=0):
+        self.cache_root = cache_root
+        self.logger = logger or logging.getLogger("CacheLayer")
+        self.db_path = os.path.join(cache_root, self.DB_NAME)
+        self.codec = resolve_codec(compression, self.logger)
+        self.max_bytes = max_bytes or 0
+        os.makedirs(cache_root, exist_ok=True)
+
+        # 스레드 간 연결 공유 (batch 병렬 실행) → 모든 접근은 lock 안에서
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache_objects ("
+                " key TEXT PRIMARY KEY,"
+                " symbol TEXT NOT NULL,"
+                " day TEXT NOT NULL,"
+                " cached_at_ts REAL NOT NULL,"
+                " content BLOB NOT NULL,"
+                " size INTEGER NOT NULL DEFAULT 0,"
+                " accessed_ts REAL NOT NULL DEFAULT 0)"
+            )
+            # 용량 컬럼 추가 전 DB: 기존 항목은 기록 시각을 최근 조회 시각으로 간주
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(cache_objects)")}
+            if "size" not in columns:
+                self._conn.execute("ALTER TABLE cache_objects ADD COLUMN size INTEGER NOT NULL DEFAULT 0")
+                self._conn.execute("UPDATE cache_objects SET size = LENGTH(CAST(content AS BLOB))")
+            if "accessed_ts" not in columns:
+                self._conn.execute("ALTER TABLE cache_objects ADD COLUMN accessed_ts REAL NOT NULL DEFAULT 0")
+                self._conn.execute("UPDATE cache_objects SET accessed_ts = cached_at_ts")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_objects_ts ON cache_objects (cached_at_ts)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_objects_day ON cache_objects (day)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_objects_accessed ON cache_objects (accessed_ts)")
+            # 날짜 주소 방식(구 스키마) 테이블 정리
+            self._conn.execute("DROP TABLE IF EXISTS cache_entries")
+            self._conn.commit()
+            self._bytes = self._total_bytes()
+
+    def _total_bytes(self) -> int:
+        """전체 payload 바이트 (lock 안에서 호출)"""
+        return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache_objects").fetchone()[0]
+
+    def _sizes_of(self, keys) -> int:
+        """기존 항목 바이트 합 (PRIMARY KEY 조회; lock 안에서 호출)"""
+        total = 0
+        for key in keys:
+            row = self._conn.execute("SELECT size FROM cache_objects WHERE key = ?", (key,)).fetchone()
+            if row:
+                total += row[0]
+        return total
+
+    def _row(self, symbol, hash_key, content):
+        ts = content.get("meta", {}).get("cached_at_ts", time.time())
+        blob = encode_payload(content, self.codec)
+        return (hash_key, symbol, _day_of(ts), ts, sqlite3.Binary(blob), len(blob), time.time())
+
+    def get(self, symbol: str, hash_key: str):
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT content FROM cache_objects WHERE key = ?", (hash_key,)
+                ).fetchone()
+                if row:
+                    with self._conn:
+                        self._conn.execute("UPDATE cache_objects SET accessed_ts = ? WHERE key = ?", (time.time(), hash_key))
+            return decode_payload(row[0]) if row else None
+        except Exception as e:
+            self.logger.warning(f"Cache Read Failed: {e}")
+            return None
+
+    def put(self, symbol: str, hash_key: str, content: dict) -> int:
+        return self.put_many([(symbol, hash_key, content)])
+
+    def put_many(self, items) -> int:
+        """items: [(symbol, hash_key, content), ...] → 단일 트랜잭션 / 반환: 용량 상한으로 제거된 항목 수"""
+        rows = [self._row(*item) for item in items]
+        if not rows:
+            return 0
+        try:
+            with self._lock, self._conn:
+                replaced = self._sizes_of(dict.fromkeys(row[0] for row in rows))
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO cache_objects (key, symbol, day, cached_at_ts, content, size, accessed_ts)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?)", rows
+                )
+                self._bytes += sum({row[0]: row[5] for row in rows}.values()) - replaced
+        except Exception as e:
+            self.logger.error(f"Cache Write Failed: {e}")
+            return 0
+        return self._enforce_limit()
+
+    def footprint(self) -> dict:
+        """저장 항목 수 / payload 바이트 (+ DB 파일 크기)"""
+        with self._lock:
+            entries, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache_objects").fetchone()
+        file_bytes = sum(
+            os.path.getsize(path) for path in (self.db_path, self.db_path + "-wal") if os.path.exists(path)
+        )
+        return {"entries": entries, "bytes": size, "file_bytes": file_bytes, "max_bytes": self.max_bytes, "codec": self.codec}
+
+    def _enforce_limit(self) -> int:
+        if self.max_bytes <= 0:
+            return 0
+        with self._lock, self._conn:
+            if self._bytes <= self.max_bytes:
+                return 0
+            # 상한 초과 시에만 전체 재집계 (다른 프로세스 기록분 반영)
+            total = self._bytes = self._total_bytes()
+            if total <= self.max_bytes:
+                return 0
+
+            target = self.max_bytes * EVICT_TARGET_RATIO
+            victims = []
+            for key, size in self._conn.execute("SELECT key, size FROM cache_objects ORDER BY accessed_ts"):
+                if total <= target:
+                    break
+                victims.append((key,))
+                total -= size
+            self._conn.executemany("DELETE FROM cache_objects WHERE key = ?", victims)
+            self._bytes = total
+
+        self.logger.info(f"🧹 [EVICT] {len(victims)} cache rows removed (size cap {self.max_bytes} bytes)")
+        return len(victims)
+
+    def delete(self, symbol: str, hash_key: str):
+        with self._lock, self._conn:
+            self._bytes -= self._sizes_of([hash_key])
+            self._conn.execute("DELETE FROM cache_objects WHERE key = ?", (hash_key,))
+
+    def index_by_day(self) -> dict:
+        with self._lock:
+            rows = self._conn.execute("SELECT day, COUNT(*) FROM cache_objects GROUP BY day ORDER BY day").fetchall()
+        return {day: count for day, count in rows}
+
+    def purge(self, before_ts: float) -> int:
+        with self._lock, self._conn:
+            freed = self._conn.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM cache_objects WHERE cached_at_ts < ?", (before_ts,)
+            ).fetchone()[0]
+            cur = self._conn.execute("DELETE FROM cache_objects WHERE cached_at_ts < ?", (before_ts,))
+            self._bytes = max(0, self._bytes - freed)
+            return cur.rowcount
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+CACHE_BACKENDS = {
+    FileCacheBackend.name: FileCacheBackend,
+    SQLiteCacheBackend.name: SQLiteCacheBackend,
+}
+
+
+def make_cache_backend(name, cache_root, logger=None, compression="none", max_bytes=0):
+    """SNIPER_CACHE_BACKEND 값 (file / sqlite) → backend 인스턴스"""
+    key = (name or "file").strip().lower()
+    if key not in CACHE_BACKENDS:
+        raise ValueError(f"Unknown cache backend: {name}")
+    return CACHE_BACKENDS[key](cache_root, logger=logger, compression=compression, max_bytes=max_bytes)
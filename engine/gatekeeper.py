@@ -1,12 +1,30 @@
 import os
 import json
+import atexit
 import logging
 import fcntl  # Linux/Unix Standard for File Locking
+import threading
 import time
+import uuid
 from datetime import datetime
 
 class LLMGatekeeper:
-    def __init__(self, base_dir=None):
+    """
+    Daily LLM call cap (프로세스 간 공유: state/llm_cap.json + fcntl lock)
+    - 기본: 호출마다 lock → state 갱신 → audit 기록 (정확 / 저속)
+    - lease_size > 1 (SNIPER_GATEKEEPER_LEASE): lock 1회에 N slot 선점 후 메모리에서 분배
+      · 선점 slot은 즉시 call_count에 반영 → 프로세스 합계가 cap을 넘지 않음
+      · 미사용 slot은 release() / 프로세스 종료 시 반환
+      · lease는 state["leases"]에 owner pid + 만료 시각과 함께 기록
+        → 반환 없이 죽은 프로세스의 lease는 만료 후 _reserve에서 회수 (사용분으로 간주)
+      · slot 분배 전 state 파일 mtime 확인 → 외부 kill switch 즉시 반영
+      · ALLOW audit는 버퍼링 후 일괄 기록
+    """
+
+    AUDIT_FLUSH_EVERY = 64
+    LEASE_TTL_SECONDS = 300
+
+    def __init__(self, base_dir=None, lease_size=None, lease_ttl=None):
         if base_dir is None:
             base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
         
@@ -38,6 +56,19 @@ class LLMGatekeeper:
             handler.setFormatter(formatter)
             self.logger.addHandler(handler)
 
+        # Lease mode (high-throughput)
+        if lease_size is None:
+            lease_size = int(os.getenv("SNIPER_GATEKEEPER_LEASE", "0"))
+        self.lease_size = max(0, int(lease_size))
+        if lease_ttl is None:
+            lease_ttl = float(os.getenv("SNIPER_GATEKEEPER_LEASE_TTL", self.LEASE_TTL_SECONDS))
+        self.lease_ttl = float(lease_ttl)
+        self._lease_lock = threading.Lock()
+        self._lease = None  # {"id", "date", "granted", "remaining", "base", "cap_limit", "expires_at", "state_mtime"}
+        self._audit_buffer = []
+        if self.lease_size > 1:
+            atexit.register(self.release)
+
     def _load_state(self):
         # Default State
         default_state = {
@@ -45,6 +76,8 @@ class LLMGatekeeper:
             "call_count": 0,
             "cap_limit": 50,
             "kill_switch": False,
+            "leased": 0,
+            "leases": {},
             "updated_at": datetime.now().isoformat()
         }
 
@@ -66,8 +99,8 @@ class LLMGatekeeper:
         with open(self.state_file, "w", encoding="utf-8") as f:
             json.dump(state, f, indent=2)
 
-    def _append_log_internal(self, event, symbol, state, reason="", request_id=None):
-        log_entry = {
+    def _log_entry(self, event, symbol, state, reason="", request_id=None):
+        return {
             "timestamp": datetime.now().isoformat(),
             "request_id": request_id or "N/A", # [Fix 3] Request ID Added
             "symbol": symbol,
@@ -76,11 +109,50 @@ class LLMGatekeeper:
             "cap_limit": state.get("cap_limit", -1),
             "reason": reason
         }
-        self.logger.info(json.dumps(log_entry))
+
+    def _append_log_internal(self, event, symbol, state, reason="", request_id=None):
+        self.logger.info(json.dumps(self._log_entry(event, symbol, state, reason, request_id)))
+
+    def _flush_audit(self):
+        """버퍼링된 audit 라인 일괄 기록 (log record 1건 = write 1회)"""
+        lines, self._audit_buffer = self._audit_buffer, []
+        if lines:
+            self.logger.info("\n".join(lines))
 
     def check_access(self, symbol: str, request_id: str = None, cap_override: int = None, date_override: str = None) -> dict:
         """
         Thread-Safe Gatekeeper Check
+        - lease mode: 선점 slot이 남아 있으면 lock / 파일 I/O 없이 허용 (override 인자 사용 시 기존 경로)
+        """
+        if self.lease_size > 1 and cap_override is None and date_override is None:
+            return self._check_leased(symbol, request_id)
+
+        result, _, _ = self._reserve(symbol, 1, request_id=request_id, cap_override=cap_override, date_override=date_override)
+        return result
+
+    def _reclaim_expired_leases(self, state, request_id=None):
+        """만료된 lease 회수: leased에서만 차감 (slot은 사용된 것으로 간주 → cap 초과 불가)"""
+        leases = state.get("leases") or {}
+        now = time.time()
+        expired = {k: v for k, v in leases.items() if v.get("expires_at", 0) <= now}
+        if not expired:
+            return False
+
+        for lease_id, lease in expired.items():
+            del leases[lease_id]
+            state["leased"] = max(0, state.get("leased", 0) - lease.get("granted", 0))
+            self._append_log_internal(
+                "LEASE_EXPIRED", "SYSTEM", state,
+                reason=f"RECLAIMED_{lease.get('granted', 0)}_PID_{lease.get('pid')}", request_id=request_id,
+            )
+        state["leases"] = leases
+        return True
+
+    def _reserve(self, symbol, slots, request_id=None, cap_override=None, date_override=None, lease_id=None):
+        """
+        lock 구간에서 최대 slots 개 예약
+        - lease_id 지정 시 state["leases"]에 owner / 만료 시각 기록
+        - 반환: (응답 dict, 예약 전 state 사본, 예약 수)
         """
         # [Fix 1] Critical Section with File Lock
         with open(self.lock_file, 'r') as lock_f:
@@ -102,30 +174,143 @@ class LLMGatekeeper:
                     state["date"] = today
                     state["call_count"] = 0
                     state["kill_switch"] = False
+                    state["leased"] = 0
+                    state["leases"] = {}
                     self._save_state(state)
                     self._append_log_internal("RESET", "SYSTEM", state, reason=f"New Day: {old_date} -> {today}", request_id=request_id)
 
+                # 1-1. 죽은 프로세스의 lease 회수
+                if self._reclaim_expired_leases(state, request_id=request_id):
+                    self._save_state(state)
+
                 # 2. Kill Switch Check
                 if state["kill_switch"]:
                     # No save needed
                     self._append_log_internal("REJECT", symbol, state, reason="KILL_SWITCH_ACTIVE", request_id=request_id)
-                    return {"allowed": False, "reason": "KILL_SWITCH_ACTIVE"}
+                    return {"allowed": False, "reason": "KILL_SWITCH_ACTIVE"}, state, 0
 
                 # 3. Cap Limit Check (Using effective_cap)
                 if state["call_count"] >= effective_cap:
+                    # 다른 프로세스가 선점 중인 slot은 반환될 수 있으므로 kill switch 보류
+                    if state.get("leased", 0) > 0:
+                        self._append_log_internal("REJECT", symbol, state, reason="DAILY_CAP_LEASED", request_id=request_id)
+                        return {"allowed": False, "reason": "DAILY_CAP_LEASED"}, state, 0
                     state["kill_switch"] = True
                     self._save_state(state) # Persist Kill Switch
                     self._append_log_internal("KILL_SWITCH_ON", symbol, state, reason="DAILY_CAP_EXCEEDED", request_id=request_id)
-                    return {"allowed": False, "reason": "DAILY_CAP_EXCEEDED"}
+                    return {"allowed": False, "reason": "DAILY_CAP_EXCEEDED"}, state, 0
 
-                # 4. Allow & Increment
-                state["call_count"] += 1
+                # 4. Allow & Increment (lease: 선점분 즉시 반영 → 프로세스 합계 ≤ cap)
+                before = dict(state)
+                granted = min(slots, effective_cap - state["call_count"])
+                state["call_count"] += granted
+                if lease_id is not None:
+                    state["leased"] = state.get("leased", 0) + granted
+                    state.setdefault("leases", {})[lease_id] = {
+                        "pid": os.getpid(),
+                        "granted": granted,
+                        "expires_at": time.time() + self.lease_ttl,
+                    }
                 self._save_state(state)
-                self._append_log_internal("ALLOW", symbol, state, reason="UNDER_CAP", request_id=request_id)
+                if lease_id is not None:
+                    self._append_log_internal("LEASE", symbol, state, reason=f"GRANTED_{granted}", request_id=request_id)
+                else:
+                    self._append_log_internal("ALLOW", symbol, state, reason="UNDER_CAP", request_id=request_id)
                 
-                return {"allowed": True, "reason": "OK"}
+                return {"allowed": True, "reason": "OK"}, before, granted
                 # --- CRITICAL SECTION END ---
 
             finally:
                 # Release Lock
-                fcntl.flock(lock_f, fcntl.LOCK_UN)
\ No newline at end of file
+                fcntl.flock(lock_f, fcntl.LOCK_UN)
+
+    # -----------------------------
+    # Lease Mode
+    # -----------------------------
+
+    def _state_mtime(self):
+        try:
+            return os.stat(self.state_file).st_mtime_ns
+        except OSError:
+            return None
+
+    def _peek_kill_switch(self):
+        """lock 없이 kill switch 조회 (쓰기 도중이라 읽기 실패 시 None)"""
+        try:
+            with open(self.state_file, "r", encoding="utf-8") as f:
+                return bool(json.load(f).get("kill_switch", False))
+        except Exception:
+            return None
+
+    def _lease_revoked(self, lease):
+        """state 파일이 바뀐 경우에만 읽어서 kill switch 확인 (mtime stat 1회)"""
+        mtime = self._state_mtime()
+        if mtime == lease["state_mtime"]:
+            return False
+        kill = self._peek_kill_switch()
+        if kill is None:
+            return False  # 다음 호출에서 재확인
+        lease["state_mtime"] = mtime
+        return kill
+
+    def _check_leased(self, symbol, request_id):
+        today = datetime.now().strftime("%Y-%m-%d")
+        with self._lease_lock:
+            lease = self._lease
+            if lease is not None and self._lease_revoked(lease):
+                # 외부(수동 / 다른 프로세스) kill switch → 남은 slot 반환 후 거절
+                self._flush_audit()
+                self._settle_lease()
+                self._append_log_internal("REJECT", symbol, {"call_count": -1, "cap_limit": lease["cap_limit"]}, reason="KILL_SWITCH_ACTIVE", request_id=request_id)
+                return {"allowed": False, "reason": "KILL_SWITCH_ACTIVE"}
+
+            if (lease is None or lease["date"] != today or lease["remaining"] == 0
+                    or lease["expires_at"] <= time.time()):
+                # 지난 lease 정산 후 새 block 선점 (lock / 파일 I/O는 이 경로에서만)
+                self._flush_audit()
+                self._settle_lease()
+                lease_id = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+                result, before, granted = self._reserve(symbol, self.lease_size, request_id=request_id, lease_id=lease_id)
+                if not result["allowed"]:
+                    return result
+                lease = self._lease = {
+                    "id": lease_id, "date": before["date"], "granted": granted, "remaining": granted,
+                    "base": before["call_count"], "cap_limit": before["cap_limit"],
+                    "expires_at": time.time() + self.lease_ttl, "state_mtime": self._state_mtime(),
+                }
+
+            lease["remaining"] -= 1
+            slot = {"call_count": lease["base"] + lease["granted"] - lease["remaining"], "cap_limit": lease["cap_limit"]}
+            self._audit_buffer.append(json.dumps(self._log_entry("ALLOW", symbol, slot, reason="UNDER_CAP_LEASED", request_id=request_id)))
+            if len(self._audit_buffer) >= self.AUDIT_FLUSH_EVERY:
+                self._flush_audit()
+            return {"allowed": True, "reason": "OK"}
+
+    def _settle_lease(self):
+        """현재 lease 정산: 미사용 slot 반환 + leased 차감 (lease가 아직 state에 등록돼 있을 때만)"""
+        lease, self._lease = self._lease, None
+        if lease is None:
+            return
+
+        with open(self.lock_file, 'r') as lock_f:
+            try:
+                fcntl.flock(lock_f, fcntl.LOCK_EX)
+                state = self._load_state()
+                leases = state.get("leases") or {}
+                if state["date"] != lease["date"] or lease["id"] not in leases:
+                    return  # 날짜 reset / 만료 회수로 이미 무효
+                del leases[lease["id"]]
+                state["leases"] = leases
+                state["call_count"] -= lease["remaining"]
+                state["leased"] = max(0, state.get("leased", 0) - lease["granted"])
+                self._save_state(state)
+                if lease["remaining"]:
+                    self._append_log_internal("LEASE_RETURN", "SYSTEM", state, reason=f"RETURNED_{lease['remaining']}")
+            finally:
+                fcntl.flock(lock_f, fcntl.LOCK_UN)
+
+    def release(self):
+        """미사용 slot 반환 + audit 버퍼 기록 (batch 종료 / atexit)"""
+        with self._lease_lock:
+            self._flush_audit()
+            self._settle_lease()
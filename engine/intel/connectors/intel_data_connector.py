@@ -4,9 +4,11 @@ Intel Data Connector — Phase-6D (Observation)
 - Does NOT change structure decision
 """
 
-import yfinance as yf
 import pandas as pd
 
+from engine.metrics import stage
+from engine.price_store import get_price_store
+
 
 def _flow_v2(hist: pd.DataFrame) -> bool:
     """
@@ -41,38 +43,39 @@ def _flow_v2(hist: pd.DataFrame) -> bool:
 
 def fetch_intel_features(symbol: str) -> dict:
     try:
-        ticker = yf.Ticker(symbol)
-        hist = ticker.history(period="6mo")
+        with stage("fetch"):
+            hist = get_price_store().load(symbol, period="6mo")
 
-        if hist.empty:
+        if hist is None or hist.empty:
             raise ValueError("No market data")
 
-        close = hist["Close"]
-        last = close.iloc[-1]
-        low_6m = close.min()
-
-        distance_pct = round((last - low_6m) / low_6m * 100, 2)
-
-        # Existing (v1) signals — keep behavior
-        price_ok = distance_pct >= 5.0
-        flow_ok = close.iloc[-5:].mean() > close.iloc[-20:].mean()
-
-        # Structure (pre-engine)
-        if price_ok and flow_ok:
-            structure = "FORMED"
-        elif price_ok:
-            structure = "FORMING"
-        else:
-            structure = "NOT_FORMED"
-
-        return {
-            "structure": structure,
-            "price_ok": price_ok,
-            "flow_ok": flow_ok,          # v1 (legacy)
-            "flow_v2": _flow_v2(hist),   # v2 (observation)
-            "distance_pct": distance_pct,
-            "watch": False,
-        }
+        with stage("indicator"):
+            close = hist["Close"]
+            last = close.iloc[-1]
+            low_6m = close.min()
+
+            distance_pct = round((last - low_6m) / low_6m * 100, 2)
+
+            # Existing (v1) signals — keep behavior
+            price_ok = distance_pct >= 5.0
+            flow_ok = close.iloc[-5:].mean() > close.iloc[-20:].mean()
+
+            # Structure (pre-engine)
+            if price_ok and flow_ok:
+                structure = "FORMED"
+            elif price_ok:
+                structure = "FORMING"
+            else:
+                structure = "NOT_FORMED"
+
+            return {
+                "structure": structure,
+                "price_ok": price_ok,
+                "flow_ok": flow_ok,          # v1 (legacy)
+                "flow_v2": _flow_v2(hist),   # v2 (observation)
+                "distance_pct": distance_pct,
+                "watch": False,
+            }
 
     except Exception:
         return {
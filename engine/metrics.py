@@ -1,9 +1,82 @@
 import os
 import json
+import math
 import uuid
 import time
+import threading
+import contextvars
+from contextlib import contextmanager
 from datetime import datetime
 
+# 현재 스레드에서 처리 중인 batch 실행의 SniperMetrics (SniperBatchRunner가 종목 처리 동안 bind)
+_current_metrics = contextvars.ContextVar("sniper_metrics", default=None)
+
+
+@contextmanager
+def stage(name):
+    """
+    with stage("fetch"): ... -> 현재 batch 실행의 단계별 지연 기록
+    - processor가 호출하는 하위 코드(price store / indicator / LLM provider)에서 사용
+    - batch 밖(bind 없음)에서는 no-op
+    """
+    metrics = _current_metrics.get()
+    if metrics is None:
+        yield
+        return
+    with metrics.stage(name):
+        yield
+
+
+class LatencyHistogram:
+    """
+    고정 메모리 지연시간 히스토그램 (log bucket, ms 단위)
+    - bucket 경계: min_ms * growth^i  (상대 오차 <= growth - 1)
+    - 범위 밖 값은 양 끝 bucket에 포함, max / sum 은 정확값 유지
+    """
+
+    def __init__(self, min_ms=0.01, max_ms=3_600_000.0, growth=1.05):
+        self.min_ms = min_ms
+        self.growth = growth
+        self._log_growth = math.log(growth)
+        self.n_buckets = int(math.ceil(math.log(max_ms / min_ms) / self._log_growth)) + 1
+        self.counts = [0] * self.n_buckets
+        self.count = 0
+        self.sum_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, elapsed_ms):
+        elapsed_ms = max(0.0, float(elapsed_ms))
+        if elapsed_ms <= self.min_ms:
+            i = 0
+        else:
+            i = min(self.n_buckets - 1, int(math.ceil(math.log(elapsed_ms / self.min_ms) / self._log_growth)))
+        self.counts[i] += 1
+        self.count += 1
+        self.sum_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+
+    def percentile(self, q):
+        """q (0~100) 분위수: 해당 bucket 상한 (관측 max 이하로 제한)"""
+        if self.count == 0:
+            return 0.0
+        rank = max(1, int(math.ceil(self.count * q / 100.0)))
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= rank:
+                return min(self.min_ms * (self.growth ** i), self.max_ms)
+        return self.max_ms
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "avg": round(self.sum_ms / self.count, 2) if self.count else 0.0,
+            "p50": round(self.percentile(50), 2),
+            "p90": round(self.percentile(90), 2),
+            "p99": round(self.percentile(99), 2),
+            "max": round(self.max_ms, 2),
+        }
+
 
 class SniperMetrics:
     def __init__(self, base_dir=None):
@@ -25,29 +98,63 @@ class SniperMetrics:
             "kill_switch_block_count": 0,
             "error_count": 0,
             "avg_latency_ms": 0.0,
+            "latency_ms": {},
+            "stage_latency_ms": {},
         }
 
-        self._latencies = []
+        # 종목 1건 전체 지연 + 단계별 (fetch / indicator / llm / persist ...) 지연
+        self._latency = LatencyHistogram()
+        self._stages = {}
+        # 병렬 batch 실행 시 카운터 보호
+        self._lock = threading.Lock()
 
     # -----------------------------
     # Counters
     # -----------------------------
 
     def inc(self, key, value=1):
-        if key in self.stats:
-            self.stats[key] += value
+        with self._lock:
+            if key in self.stats:
+                self.stats[key] += value
+
+    def record_latency(self, elapsed_sec, stage=None):
+        with self._lock:
+            if stage is None:
+                hist = self._latency
+            else:
+                hist = self._stages.setdefault(stage, LatencyHistogram())
+            hist.record(elapsed_sec * 1000.0)
+
+    @contextmanager
+    def stage(self, name):
+        """with metrics.stage("fetch"): ... -> 단계별 지연 기록"""
+        start = time.time()
+        try:
+            yield
+        finally:
+            self.record_latency(time.time() - start, stage=name)
 
-    def record_latency(self, elapsed_sec):
-        self._latencies.append(elapsed_sec)
+    @contextmanager
+    def bind(self):
+        """with metrics.bind(): ... -> 구간 안의 engine.metrics.stage() 호출을 이 인스턴스에 기록"""
+        token = _current_metrics.set(self)
+        try:
+            yield self
+        finally:
+            _current_metrics.reset(token)
 
     # -----------------------------
     # Finalize & Persist
     # -----------------------------
 
     def finalize(self):
-        if self._latencies:
-            avg = sum(self._latencies) / len(self._latencies)
-            self.stats["avg_latency_ms"] = round(avg * 1000, 2)
+        with self._lock:
+            if self._latency.count:
+                self.stats["avg_latency_ms"] = round(self._latency.sum_ms / self._latency.count, 2)
+            self.stats["latency_ms"] = self._latency.summary()
+            self.stats["stage_latency_ms"] = {
+                name: hist.summary() for name, hist in sorted(self._stages.items())
+            }
 
     def write(self):
         self.finalize()
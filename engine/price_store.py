@@ -0,0 +1,426 @@
+"""
+Local OHLCV Store
+- 종목별 일봉을 memory-mapped NumPy(.npy) 파일로 보관
+- 모든 loader(strike / strike_battle / intel / run.py / v12_scanner)가 공유
+- 네트워크는 저장소에 없는 날짜 구간만 요청 (warm run = 거의 I/O 없음)
+"""
+
+import os
+import json
+import time
+import logging
+import tempfile
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    import yfinance as yf
+except Exception:
+    yf = None
+
+
+OHLCV_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+BAR_DTYPE = np.dtype([
+    ("date", "M8[D]"),
+    ("open", "f8"),
+    ("high", "f8"),
+    ("low", "f8"),
+    ("close", "f8"),
+    ("volume", "f8"),
+])
+
+_FIELDS = ["open", "high", "low", "close", "volume"]
+
+_PERIOD_UNITS = {
+    "d": lambda n: pd.DateOffset(days=n),
+    "wk": lambda n: pd.DateOffset(weeks=n),
+    "mo": lambda n: pd.DateOffset(months=n),
+    "y": lambda n: pd.DateOffset(years=n),
+}
+
+
+def _today() -> pd.Timestamp:
+    return pd.Timestamp(datetime.now().date())
+
+
+def period_start(period: str, today: Optional[pd.Timestamp] = None) -> pd.Timestamp:
+    """
+    yfinance period 문자열("5d", "60d", "6mo", "1y", "2y", "ytd", "max") -> 시작일
+    """
+    today = today if today is not None else _today()
+    p = (period or "").strip().lower()
+
+    if p == "ytd":
+        return pd.Timestamp(year=today.year, month=1, day=1)
+    if p == "max":
+        return pd.Timestamp("1970-01-01")
+
+    for unit in ("mo", "wk", "d", "y"):
+        if p.endswith(unit) and p[: -len(unit)].isdigit():
+            return today - _PERIOD_UNITS[unit](int(p[: -len(unit)]))
+
+    raise ValueError(f"Unsupported period: {period}")
+
+
+def _to_bars(df: Optional[pd.DataFrame]) -> np.ndarray:
+    """
+    OHLCV DataFrame -> BAR_DTYPE 구조체 배열 (날짜 오름차순, 전부 NaN인 행 제거)
+    """
+    if df is None or df.empty or not all(c in df.columns for c in OHLCV_COLUMNS):
+        return np.empty(0, dtype=BAR_DTYPE)
+
+    idx = pd.DatetimeIndex(df.index)
+    # 거래소 현지 날짜 유지 (UTC 변환 시 날짜가 밀릴 수 있음)
+    if idx.tz is not None:
+        idx = idx.tz_localize(None)
+
+    values = df[OHLCV_COLUMNS].apply(pd.to_numeric, errors="coerce").to_numpy(dtype="f8")
+    keep = ~np.isnan(values).all(axis=1)
+
+    bars = np.empty(int(keep.sum()), dtype=BAR_DTYPE)
+    bars["date"] = idx.normalize().values[keep].astype("M8[D]")
+    for i, field in enumerate(_FIELDS):
+        bars[field] = values[keep, i]
+
+    order = np.argsort(bars["date"], kind="stable")
+    return bars[order]
+
+
+def _merge_bars(old: np.ndarray, new: np.ndarray) -> np.ndarray:
+    """
+    같은 날짜가 겹치면 new 쪽을 채택
+    """
+    if len(old) == 0:
+        return new
+    if len(new) == 0:
+        return old
+
+    merged = np.concatenate([old, new])
+    merged = merged[np.argsort(merged["date"], kind="stable")]
+    keep = np.ones(len(merged), dtype=bool)
+    keep[:-1] = merged["date"][:-1] != merged["date"][1:]
+    return merged[keep]
+
+
+def _overlap_matches(old: np.ndarray, new: np.ndarray, settled_end: pd.Timestamp, rtol: float = 1e-4) -> bool:
+    """
+    겹치는 확정 봉(date < settled_end)의 종가가 저장값과 같은지
+    - 분할/배당 이후 auto_adjust 결과는 과거 봉까지 바뀌므로 불일치 = 기준 변경
+    """
+    if len(old) == 0 or len(new) == 0:
+        return True
+
+    cutoff = np.datetime64(settled_end.date())
+    new = new[new["date"] < cutoff]
+    common, i_old, i_new = np.intersect1d(old["date"], new["date"], return_indices=True)
+    if len(common) == 0:
+        return True
+    return bool(np.allclose(old["close"][i_old], new["close"][i_new], rtol=rtol, equal_nan=True))
+
+
+def bars_to_frame(bars: np.ndarray) -> pd.DataFrame:
+    df = pd.DataFrame(
+        {col: np.asarray(bars[field]) for col, field in zip(OHLCV_COLUMNS, _FIELDS)},
+        index=pd.DatetimeIndex(np.asarray(bars["date"]).astype("M8[ns]"), name="Date"),
+    )
+    return df
+
+
+def split_download(raw: Optional[pd.DataFrame], symbols: List[str]) -> Dict[str, pd.DataFrame]:
+    """
+    yf.download 결과(단일/MultiIndex, group_by 여부 무관)를 종목별 OHLCV로 분리
+    """
+    out: Dict[str, pd.DataFrame] = {}
+    if raw is None or raw.empty:
+        return out
+
+    if not isinstance(raw.columns, pd.MultiIndex):
+        if len(symbols) == 1:
+            out[symbols[0]] = raw
+        return out
+
+    level0 = set(raw.columns.get_level_values(0))
+    level1 = set(raw.columns.get_level_values(1))
+    for sym in symbols:
+        try:
+            if sym in level0:
+                out[sym] = raw[sym]
+            elif sym in level1:
+                out[sym] = raw.xs(sym, axis=1, level=1)
+        except Exception:
+            continue
+    return out
+
+
+class PriceStore:
+    """
+    Per-symbol daily bar store
+    - data/prices/<adj|raw>/<SYMBOL>.npy : BAR_DTYPE 배열 (mmap 읽기)
+    - data/prices/<adj|raw>/<SYMBOL>.json : 커버리지 메타 (요청 구간 기준)
+
+    커버리지는 "받아본 구간"을 기록하므로 휴장일/상장 전 구간을 반복 요청하지 않는다.
+    당일(미확정) 봉은 live_ttl_minutes 동안만 재사용한다.
+
+    뒤쪽 구간을 이어 받을 때는 overlap_days 만큼 기존 봉과 겹쳐서 요청하고,
+    겹친 확정 봉이 저장값과 다르면(분할/배당으로 수정주가 기준 변경) 종목 전체를 다시 받는다.
+    """
+
+    def __init__(self, base_dir=None, auto_adjust=True, live_ttl_minutes=60, batch_size=200, overlap_days=7):
+        if base_dir is None:
+            base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+        self.auto_adjust = auto_adjust
+        self.store_dir = os.path.join(base_dir, "data", "prices", "adj" if auto_adjust else "raw")
+        self.live_ttl_seconds = live_ttl_minutes * 60
+        self.batch_size = batch_size
+        self.overlap_days = overlap_days
+        self.logger = logging.getLogger("PriceStore")
+
+        if not self.logger.handlers:
+            handler = logging.StreamHandler()
+            formatter = logging.Formatter('[PRICES] %(message)s')
+            handler.setFormatter(formatter)
+            self.logger.addHandler(handler)
+
+        os.makedirs(self.store_dir, exist_ok=True)
+
+    # -----------------------------
+    # Paths & Meta
+    # -----------------------------
+
+    def _paths(self, symbol: str) -> Tuple[str, str]:
+        safe = symbol.replace(os.sep, "_")
+        return (
+            os.path.join(self.store_dir, f"{safe}.npy"),
+            os.path.join(self.store_dir, f"{safe}.json"),
+        )
+
+    def _read_meta(self, symbol: str) -> Optional[dict]:
+        _, meta_path = self._paths(symbol)
+        if not os.path.exists(meta_path):
+            return None
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception:
+            return None
+
+    def _read_bars(self, symbol: str) -> np.ndarray:
+        bars_path, _ = self._paths(symbol)
+        if not os.path.exists(bars_path):
+            return np.empty(0, dtype=BAR_DTYPE)
+        try:
+            return np.load(bars_path, mmap_mode="r")
+        except Exception as e:
+            self.logger.warning(f"Bar file unreadable for {symbol}: {e}")
+            return np.empty(0, dtype=BAR_DTYPE)
+
+    def _write(self, symbol: str, bars: np.ndarray, meta: dict):
+        bars_path, meta_path = self._paths(symbol)
+        # writer별 고유 tmp 파일 (스레드 풀에서 같은 종목을 동시에 써도 충돌 없음)
+        fd_bars, tmp_bars = tempfile.mkstemp(dir=self.store_dir, suffix=".tmp.npy")
+        fd_meta, tmp_meta = tempfile.mkstemp(dir=self.store_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd_bars, "wb") as f:
+                np.save(f, np.ascontiguousarray(bars, dtype=BAR_DTYPE))
+            os.replace(tmp_bars, bars_path)
+            with os.fdopen(fd_meta, "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+            os.replace(tmp_meta, meta_path)
+        except Exception as e:
+            self.logger.error(f"Store Write Failed for {symbol}: {e}")
+            for p in (tmp_bars, tmp_meta):
+                if os.path.exists(p):
+                    os.remove(p)
+
+    # -----------------------------
+    # Gap Planning
+    # -----------------------------
+
+    def _missing_ranges(self, meta: Optional[dict], start: pd.Timestamp, end: pd.Timestamp) -> List[Tuple[pd.Timestamp, pd.Timestamp]]:
+        """
+        [start, end) 중 저장소가 아직 받지 않은 구간 목록
+        - 커버리지가 항상 하나의 연속 구간이 되도록 기존 구간에 붙여서 확장
+        """
+        if not meta:
+            return [(start, end)]
+
+        have_start = pd.Timestamp(meta["start"])
+        have_end = pd.Timestamp(meta["end"])
+        gaps = []
+
+        if start < have_start:
+            gaps.append((start, have_start))
+
+        if end > have_end:
+            live_only = have_end >= _today()
+            fresh = time.time() - meta.get("fetched_at", 0) < self.live_ttl_seconds
+            if not (live_only and fresh):
+                # 기존 확정 봉과 겹치게 요청 -> 수정주가 기준 변경 감지용
+                overlap_start = max(have_start, have_end - pd.Timedelta(days=self.overlap_days))
+                gaps.append((overlap_start, end))
+
+        return [(s, e) for s, e in gaps if s < e]
+
+    def _fetch(self, symbols: List[str], start: pd.Timestamp, end: pd.Timestamp) -> Optional[Dict[str, pd.DataFrame]]:
+        """
+        네트워크 다운로드 (실패 시 None -> 커버리지 갱신하지 않음)
+        """
+        if yf is None:
+            raise RuntimeError("yfinance not installed. Install: pip install yfinance")
+
+        try:
+            raw = yf.download(
+                symbols if len(symbols) > 1 else symbols[0],
+                start=start.date().isoformat(),
+                end=end.date().isoformat(),
+                interval="1d",
+                auto_adjust=self.auto_adjust,
+                group_by="ticker",
+                progress=False,
+                threads=True,
+            )
+        except Exception as e:
+            self.logger.warning(f"Download failed ({len(symbols)} symbols): {e}")
+            return None
+
+        return split_download(raw, symbols)
+
+    # -----------------------------
+    # Public API
+    # -----------------------------
+
+    def _resolve_range(self, period, start, end) -> Tuple[pd.Timestamp, pd.Timestamp]:
+        end_ts = pd.Timestamp(end).normalize() if end is not None else _today() + pd.Timedelta(days=1)
+        if start is not None:
+            start_ts = pd.Timestamp(start).normalize()
+        else:
+            start_ts = period_start(period or "6mo")
+        return start_ts, end_ts
+
+    def read(self, symbol: str, start=None, end=None) -> Optional[pd.DataFrame]:
+        """
+        저장소만 조회 (네트워크 없음). end는 exclusive.
+        """
+        bars = self._read_bars(symbol)
+        if len(bars) == 0:
+            return None
+
+        dates = bars["date"]
+        i0 = int(np.searchsorted(dates, np.datetime64(pd.Timestamp(start).date()), side="left")) if start is not None else 0
+        i1 = int(np.searchsorted(dates, np.datetime64(pd.Timestamp(end).date()), side="left")) if end is not None else len(bars)
+        if i1 <= i0:
+            return None
+        return bars_to_frame(bars[i0:i1])
+
+    def pending(self, symbols: Iterable[str], *, period: Optional[str] = None, start=None, end=None) -> List[str]:
+        """load_many() 호출 시 네트워크 요청이 필요한 종목 목록 (저장소 조회만)"""
+        start_ts, end_ts = self._resolve_range(period, start, end)
+        syms = list(dict.fromkeys(s.strip().upper() for s in symbols if s and s.strip()))
+        return [s for s in syms if self._missing_ranges(self._read_meta(s), start_ts, end_ts)]
+
+    def load_many(self, symbols: Iterable[str], *, period: Optional[str] = None, start=None, end=None) -> Dict[str, pd.DataFrame]:
+        """
+        종목 리스트의 [start, end) 일봉 반환
+        - period 또는 start/end 중 하나 사용 (기본 6mo)
+        - 누락 구간만 batch_size 단위로 묶어서 다운로드
+        """
+        start_ts, end_ts = self._resolve_range(period, start, end)
+        syms = list(dict.fromkeys(s.strip().upper() for s in symbols if s and s.strip()))
+
+        # 1) Gap 계획: 동일 구간끼리 묶어서 한 번에 다운로드
+        plan: Dict[Tuple[pd.Timestamp, pd.Timestamp], List[str]] = {}
+        metas = {}
+        for sym in syms:
+            metas[sym] = self._read_meta(sym)
+            for gap in self._missing_ranges(metas[sym], start_ts, end_ts):
+                plan.setdefault(gap, []).append(sym)
+
+        # 2) Fetch & Merge
+        rebase: List[str] = []
+        for (g_start, g_end), gap_syms in plan.items():
+            for i in range(0, len(gap_syms), self.batch_size):
+                chunk = gap_syms[i:i + self.batch_size]
+                frames = self._fetch(chunk, g_start, g_end)
+                if frames is None:
+                    continue
+
+                settled_end = min(g_end, _today())
+                for sym in chunk:
+                    new_bars = _to_bars(frames.get(sym))
+                    if len(new_bars) == 0:
+                        # 종목 단위 일시 실패(NaN/rate limit) -> 커버리지 확장하지 않음
+                        continue
+
+                    old_bars = np.asarray(self._read_bars(sym))
+                    prev_end = pd.Timestamp(metas[sym]["end"]) if metas.get(sym) else None
+                    if prev_end is not None and not _overlap_matches(old_bars, new_bars, prev_end):
+                        rebase.append(sym)
+                        continue
+
+                    meta = metas.get(sym) or {"start": g_start.date().isoformat(), "end": settled_end.date().isoformat()}
+                    meta = {
+                        "start": min(pd.Timestamp(meta["start"]), g_start).date().isoformat(),
+                        "end": max(pd.Timestamp(meta["end"]), settled_end).date().isoformat(),
+                        "fetched_at": time.time() if g_end > _today() else meta.get("fetched_at", 0),
+                    }
+                    self._write(sym, _merge_bars(old_bars, new_bars), meta)
+                    metas[sym] = meta
+
+            self.logger.info(f"Fetched {len(gap_syms)} symbols [{g_start.date()} ~ {g_end.date()})")
+
+        # 2-1) 수정주가 기준이 바뀐 종목은 기존 이력을 버리고 전체 재다운로드
+        if rebase:
+            self.logger.info(f"Adjustment basis changed, refetching full history: {rebase}")
+            by_start: Dict[pd.Timestamp, List[str]] = {}
+            for sym in rebase:
+                have_start = pd.Timestamp(metas[sym]["start"])
+                by_start.setdefault(min(have_start, start_ts), []).append(sym)
+            for r_start, r_syms in by_start.items():
+                r_end = max(end_ts, max(pd.Timestamp(metas[s]["end"]) for s in r_syms))
+                for i in range(0, len(r_syms), self.batch_size):
+                    chunk = r_syms[i:i + self.batch_size]
+                    frames = self._fetch(chunk, r_start, r_end)
+                    if frames is None:
+                        continue
+                    for sym in chunk:
+                        bars = _to_bars(frames.get(sym))
+                        if len(bars) == 0:
+                            continue
+                        meta = {
+                            "start": r_start.date().isoformat(),
+                            "end": min(r_end, _today()).date().isoformat(),
+                            "fetched_at": time.time() if r_end > _today() else 0,
+                        }
+                        self._write(sym, bars, meta)
+                        metas[sym] = meta
+
+        # 3) Read from store
+        out: Dict[str, pd.DataFrame] = {}
+        for sym in syms:
+            df = self.read(sym, start_ts, end_ts)
+            if df is not None and not df.empty:
+                out[sym] = df
+        return out
+
+    def load(self, symbol: str, *, period: Optional[str] = None, start=None, end=None) -> Optional[pd.DataFrame]:
+        sym = symbol.strip().upper()
+        if not sym:
+            return None
+        return self.load_many([sym], period=period, start=start, end=end).get(sym)
+
+
+_STORES: Dict[bool, PriceStore] = {}
+
+
+def get_price_store(auto_adjust: bool = True) -> PriceStore:
+    """
+    프로세스 공용 인스턴스 (adjusted / raw 별도 저장소)
+    """
+    if auto_adjust not in _STORES:
+        _STORES[auto_adjust] = PriceStore(auto_adjust=auto_adjust)
+    return _STORES[auto_adjust]
@@ -0,0 +1,209 @@
+from __future__ import annotations
+import json
+import re
+from typing import Any, Callable, Dict, List, Optional
+
+# brace scan 대상 문자 (나머지는 C 레벨에서 건너뜀)
+_SIGNIFICANT_RE = re.compile(r'[{}\[\]"\\]')
+
+_OPENERS = {"object": "{", "array": "[", "any": "{["}
+
+# 최상위 구간이 끝까지 닫히지 않을 때(prose 속 짝 없는 괄호) 대체 탐색 대상
+_FENCED_RE = re.compile(r"```(?:json)?\s*(.*?)```", re.DOTALL | re.IGNORECASE)
+
+STRATEGY_KEYS = ("decision", "score", "confidence", "reasoning", "trading_plan")
+DECISIONS = {"STRONG_BUY", "BUY", "WAIT", "REDUCE", "AVOID"}
+
+
+class JsonStreamExtractor:
+    """
+    LLM 응답에서 첫 번째 유효 JSON 추출 (선형 시간, chunk 단위 입력)
+    - 최상위 {...} / [...] 구간을 문자열 / escape 상태까지 추적하며 scan
+    - 구간이 닫히는 순간 그 구간만 1회 decode (정규식 backtracking 없음)
+    - validator(obj) → 정규화된 값 또는 None (None이면 다음 구간 계속 탐색)
+    - feed()는 완성 전 None, 완성 후 항상 같은 결과 반환 → streaming 조기 종료 판단용
+    - finish(): 입력 종료 시 호출, 열린 구간이 끝내 닫히지 않았으면 첫 ```json``` 블록으로 대체
+    """
+
+    def __init__(self, validator: Optional[Callable[[Any], Any]] = None, want: str = "object"):
+        self.validator = validator
+        self._want = want
+        self.openers = _OPENERS[want]
+        self.result = None
+        self._text = ""
+        self._pos = 0
+        self._start = None
+        self._depth = 0
+        self._in_str = False
+        self._escape_at = -1
+
+    @property
+    def done(self) -> bool:
+        return self.result is not None
+
+    def feed(self, chunk: str):
+        if self.result is not None or not chunk:
+            return self.result
+
+        self._text += chunk
+        text = self._text
+        for m in _SIGNIFICANT_RE.finditer(text, self._pos):
+            i, c = m.start(), m.group()
+
+            if self._start is None:
+                # 구간 밖 (prose): 여는 괄호만 확인
+                if c in self.openers:
+                    self._start, self._depth = i, 1
+                continue
+
+            if self._in_str:
+                if i == self._escape_at:
+                    continue
+                if c == "\\":
+                    self._escape_at = i + 1
+                elif c == '"':
+                    self._in_str = False
+                continue
+
+            if c == '"':
+                self._in_str = True
+            elif c in "{[":
+                self._depth += 1
+            elif c in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    value = self._decode(text[self._start: i + 1])
+                    self._start = None
+                    if value is not None:
+                        self.result = value
+                        self._text = ""
+                        return value
+
+        self._compact()
+        return None
+
+    def finish(self):
+        """입력 종료: prose 속 짝 없는 '{' 때문에 구간이 안 닫혔으면 fenced block에서 재탐색"""
+        if self.result is None and self._start is not None:
+            for m in _FENCED_RE.finditer(self._text, self._start):
+                value = JsonStreamExtractor(self.validator, self._want).feed(m.group(1))
+                if value is not None:
+                    self.result = value
+                    break
+            self._text = ""
+        return self.result
+
+    def _decode(self, span: str):
+        try:
+            obj = json.loads(span)
+        except ValueError:
+            return None
+        return self.validator(obj) if self.validator else obj
+
+    def _compact(self):
+        # 이미 scan한 prose는 버리고 진행 중 구간만 유지 (긴 stream에서도 buffer 상한 = 구간 길이)
+        cut = self._start if self._start is not None else len(self._text)
+        self._text = self._text[cut:]
+        self._pos = len(self._text)
+        if self._escape_at >= 0:
+            self._escape_at -= cut
+        if self._start is not None:
+            self._start = 0
+
+
+def extract_json(text: str, validator: Optional[Callable[[Any], Any]] = None, want: str = "object"):
+    """응답 전체 텍스트 → 첫 번째 유효 JSON (없으면 None)"""
+    extractor = JsonStreamExtractor(validator, want)
+    extractor.feed(text or "")
+    return extractor.finish()
+
+
+# -----------------------------
+# Strategy schema (src/models)
+# -----------------------------
+
+_strategy_model = None
+
+
+def _load_strategy_model():
+    global _strategy_model
+    if _strategy_model is None:
+        try:
+            from src.models import LLMStrategyOutput
+            _strategy_model = LLMStrategyOutput
+        except ImportError:  # pydantic / src 미사용 환경: 필수 key 검사만
+            _strategy_model = False
+    return _strategy_model
+
+
+def _coerce_strategy(obj: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    schema 검증 전 LLM 산출값 보정 (pydantic 유무와 무관하게 동일 결과)
+    - score: 실수 / 숫자 문자열 → 반올림 int
+    - trading_plan: 숫자 등 비문자열 값 → str (None → "N/A")
+    """
+    score = obj.get("score")
+    if not isinstance(score, bool):
+        try:
+            obj["score"] = int(round(float(score)))
+        except (TypeError, ValueError, OverflowError):
+            pass
+
+    plan = obj.get("trading_plan")
+    if isinstance(plan, dict):
+        obj["trading_plan"] = {
+            str(k): v if isinstance(v, str) else ("N/A" if v is None else str(v))
+            for k, v in plan.items()
+        }
+    return obj
+
+
+def validate_strategy(obj) -> Optional[Dict[str, Any]]:
+    """
+    LLM strategy object 검증 (src.models.LLMStrategyOutput = StrategyOutput의 LLM 산출 필드)
+    - score / trading_plan 값은 검증 전 보정 (_coerce_strategy)
+    - 통과 시 타입 보정된 값 + 추가 key 유지, 실패 시 None
+    """
+    if not isinstance(obj, dict) or not isinstance(obj.get("decision"), str):
+        return None
+    obj = dict(obj, decision=obj["decision"].strip().upper())
+    if obj["decision"] not in DECISIONS:
+        return None
+    obj = _coerce_strategy(obj)
+
+    model = _load_strategy_model()
+    if not model:
+        return obj if all(k in obj for k in STRATEGY_KEYS) else None
+    try:
+        validated = model(**obj)
+    except Exception:
+        return None
+    dump = getattr(validated, "model_dump", None) or validated.dict
+    return dict(obj, **dump())
+
+
+def is_object_array(value):
+    """batch 응답 array validator: object가 하나 이상 있는 list"""
+    return value if isinstance(value, list) and any(isinstance(x, dict) for x in value) else None
+
+
+def split_batch(text: str, symbols: List[str]) -> Dict[str, dict]:
+    """batch 응답 (JSON array) → {symbol: strategy} (요청 종목 + schema 검증 통과 항목만)"""
+    items = extract_json(text, validator=is_object_array, want="array")
+
+    # array 대신 {"results": [...]} / {symbol: {...}} 로 감싼 응답
+    if not isinstance(items, list):
+        obj = extract_json(text)
+        if isinstance(obj, dict):
+            items = obj.get("results") or [dict(v, symbol=k) for k, v in obj.items() if isinstance(v, dict)]
+
+    wanted = {symbol.upper(): symbol for symbol in symbols}
+    out = {}
+    for obj in items if isinstance(items, list) else []:
+        if not isinstance(obj, dict):
+            continue
+        symbol = wanted.get(str(obj.get("symbol", "")).strip().upper())
+        strategy = validate_strategy({k: v for k, v in obj.items() if k != "symbol"})
+        if symbol and symbol not in out and strategy is not None:
+            out[symbol] = strategy
+    return out
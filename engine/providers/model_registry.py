@@ -0,0 +1,232 @@
+from __future__ import annotations
+import os
+import json
+import time
+import fcntl
+import logging
+import threading
+from typing import Callable, Dict, List, Optional
+
+GEMINI_BASE_URL = "https://generativelanguage.googleapis.com/v1beta"
+
+
+def list_gemini_models() -> List[str]:
+    """/models 목록 중 generateContent 지원 모델명"""
+    import requests
+
+    api_key = os.environ.get("GEMINI_API_KEY")
+    response = requests.get(f"{GEMINI_BASE_URL}/models?key={api_key}", timeout=10)
+    response.raise_for_status()
+    models = response.json().get("models", [])
+    return [m["name"] for m in models if "generateContent" in m.get("supportedGenerationMethods", [])]
+
+
+def is_model_unavailable(status_code: int, body: str = "") -> bool:
+    """
+    모델 자체 문제(폐기 / 미지원)인지 판별
+    - 400은 잘못된 API key / payload에도 반환되므로 "model ... not found" 본문일 때만 모델 실패
+    """
+    if status_code == 404:
+        return True
+    text = (body or "").lower()
+    return status_code == 400 and "model" in text and "not found" in text
+
+
+class ModelRegistry:
+    """
+    Provider별 사용 모델 해석 캐시 (state/model_registry.json, 프로세스 간 공유)
+    - resolve(): 캐시가 있으면 네트워크 호출 없이 즉시 반환, 만료 시 백그라운드 갱신
+    - 캐시가 전혀 없으면(cold state) 첫 조회를 최대 cold_wait_seconds 기다린 뒤 기본 후보로 대체
+    - 갱신은 프로세스 간 lock 1개 → 병렬 worker 중 1곳만 /models 조회
+    - 후보 순서: 최근 실패(cooldown) 제외 → 연속 실패 수 → 선호 순위 (flash → pro → 기타)
+    """
+
+    FAILURE_COOLDOWN_SEC = 600
+
+    def __init__(
+        self,
+        provider: str,
+        list_models: Callable[[], List[str]],
+        preferences=(),
+        defaults=(),
+        base_dir: str = None,
+        ttl_seconds: float = 86400,
+        cold_wait_seconds: float = 5.0,
+    ):
+        if base_dir is None:
+            base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+        self.provider = provider
+        self.list_models = list_models
+        self.preferences = list(preferences)
+        self.defaults = list(defaults)
+        self.ttl_seconds = ttl_seconds
+        self.cold_wait_seconds = cold_wait_seconds
+        self.state_dir = os.path.join(base_dir, "state")
+        self.state_file = os.path.join(self.state_dir, "model_registry.json")
+        self.lock_file = os.path.join(self.state_dir, "model_registry.lock")
+        self.logger = logging.getLogger("ModelRegistry")
+        self._refresh_thread = None
+        os.makedirs(self.state_dir, exist_ok=True)
+
+    # -----------------------------
+    # State (파일 전체 = {provider: entry})
+    # -----------------------------
+
+    def _read_all(self) -> Dict[str, dict]:
+        try:
+            with open(self.state_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _entry(self) -> dict:
+        return self._read_all().get(self.provider, {})
+
+    def _update(self, mutate, blocking=True) -> bool:
+        """lock 구간 read-modify-write (원자적 교체) / non-blocking lock 실패 시 False"""
+        with open(self.lock_file, "a") as lock_f:
+            try:
+                fcntl.flock(lock_f, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            except BlockingIOError:
+                return False
+            try:
+                data = self._read_all()
+                entry = data.setdefault(self.provider, {})
+                if mutate(entry) is False:
+                    return True
+                temp_path = self.state_file + ".tmp"
+                with open(temp_path, "w", encoding="utf-8") as f:
+                    json.dump(data, f, indent=2)
+                os.replace(temp_path, self.state_file)
+                return True
+            finally:
+                fcntl.flock(lock_f, fcntl.LOCK_UN)
+
+    def _is_fresh(self, entry: dict) -> bool:
+        return bool(entry.get("models")) and time.time() - entry.get("fetched_at_ts", 0) < self.ttl_seconds
+
+    # -----------------------------
+    # Resolve
+    # -----------------------------
+
+    def _rank(self, name: str) -> int:
+        for i, key in enumerate(self.preferences):
+            if key in name:
+                return i
+        return len(self.preferences)
+
+    def candidates(self) -> List[str]:
+        """사용 순서대로 정렬된 후보 (네트워크 호출 없음)"""
+        entry = self._entry()
+        if not entry.get("models"):
+            # cold: 기본 후보가 폐기됐을 수 있으므로 첫 조회를 잠시 대기 (다른 프로세스 조회 중이면 그 결과 대기)
+            self.refresh_async(blocking=True)
+            self.wait_refresh(self.cold_wait_seconds)
+            entry = self._entry()
+        elif not self._is_fresh(entry):
+            self.refresh_async()
+
+        names = entry.get("models") or self.defaults
+        health = entry.get("health", {})
+        now = time.time()
+
+        def key(item):
+            i, name = item
+            h = health.get(name, {})
+            cooling = now - h.get("last_fail_ts", 0) < self.FAILURE_COOLDOWN_SEC
+            return (cooling, h.get("consecutive_failures", 0), self._rank(name), i)
+
+        return [name for _, name in sorted(enumerate(names), key=key)]
+
+    def resolve(self) -> Optional[str]:
+        names = self.candidates()
+        return names[0] if names else None
+
+    def attempts(self, first: Optional[str] = None, limit: int = 3) -> List[str]:
+        """같은 호출 안에서 시도할 순서: first → 나머지 후보 (모델 404 시 다음 후보로 재시도)"""
+        names = self.candidates()
+        if first:
+            names = [first] + [n for n in names if n != first]
+        return names[:limit]
+
+    # -----------------------------
+    # Discovery (/models)
+    # -----------------------------
+
+    def refresh(self, blocking=True) -> bool:
+        """목록 조회 후 저장 (다른 프로세스가 이미 갱신했으면 생략)"""
+        def mutate(entry):
+            if self._is_fresh(entry):
+                return False
+            try:
+                models = self.list_models()
+            except Exception as e:
+                self.logger.warning(f"Model discovery failed ({self.provider}): {e}")
+                return False
+            if not models:
+                return False
+            entry["models"] = models
+            entry["fetched_at_ts"] = time.time()
+            self.logger.info(f"🤖 Model list refreshed ({self.provider}): {len(models)} models")
+
+        return self._update(mutate, blocking=blocking)
+
+    def refresh_async(self, blocking=False):
+        if self._refresh_thread is not None and self._refresh_thread.is_alive():
+            return
+        self._refresh_thread = threading.Thread(target=self.refresh, kwargs={"blocking": blocking}, daemon=True)
+        self._refresh_thread.start()
+
+    def wait_refresh(self, timeout=None):
+        if self._refresh_thread is not None:
+            self._refresh_thread.join(timeout)
+
+    # -----------------------------
+    # Health
+    # -----------------------------
+
+    def report_success(self, model: str):
+        def mutate(entry):
+            h = entry.setdefault("health", {}).setdefault(model, {})
+            if not h.get("consecutive_failures"):
+                return False  # 변경 없음 → 파일 기록 생략
+            h["consecutive_failures"] = 0
+            h["last_fail_ts"] = 0
+        self._update(mutate)
+
+    def report_failure(self, model: str):
+        def mutate(entry):
+            h = entry.setdefault("health", {}).setdefault(model, {})
+            h["consecutive_failures"] = h.get("consecutive_failures", 0) + 1
+            h["last_fail_ts"] = time.time()
+        self._update(mutate)
+
+
+# -----------------------------
+# Provider-level registry
+# -----------------------------
+
+MODEL_PROVIDERS = {
+    "gemini": {
+        "list_models": list_gemini_models,
+        # 우선순위: Flash -> Pro -> 아무거나
+        "preferences": ("gemini-1.5-flash", "gemini-pro"),
+        # 캐시가 없고 첫 조회도 늦을 때 시도할 후보
+        "defaults": ("models/gemini-1.5-flash", "models/gemini-pro-latest"),
+    },
+}
+
+_registries: Dict[tuple, ModelRegistry] = {}
+_registries_guard = threading.Lock()
+
+
+def get_model_registry(provider: str = "gemini", base_dir: str = None) -> ModelRegistry:
+    """provider별 ModelRegistry (프로세스 내 singleton)"""
+    key = (provider, base_dir)
+    with _registries_guard:
+        if key not in _registries:
+            if provider not in MODEL_PROVIDERS:
+                raise ValueError(f"Unknown model provider: {provider}")
+            _registries[key] = ModelRegistry(provider, base_dir=base_dir, **MODEL_PROVIDERS[provider])
+        return _registries[key]
@@ -0,0 +1,31 @@
+from __future__ import annotations
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Iterable, Tuple
+
+
+async def stream_calls(func: Callable[..., Any], items: Iterable[tuple], concurrency: int = 4) -> AsyncIterator[Tuple[tuple, Any]]:
+    """
+    blocking func(*item) 다건 동시 실행 → 완료 순서대로 (item, result) yield
+    - in-flight 상한 = concurrency (전용 thread pool; 기본 executor 크기와 무관)
+    - 소비자가 중간에 멈추면 대기 중인 task와 미시작 호출은 취소
+    """
+    items = list(items)
+    if not items:
+        return
+
+    loop = asyncio.get_running_loop()
+    pool = ThreadPoolExecutor(max_workers=max(1, min(int(concurrency), len(items))), thread_name_prefix="llm-call")
+
+    async def run(item):
+        return item, await loop.run_in_executor(pool, func, *item)
+
+    tasks = [asyncio.ensure_future(run(item)) for item in items]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+        pool.shutdown(wait=False, cancel_futures=True)
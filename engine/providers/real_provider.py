@@ -1,125 +1,35 @@
+import hashlib
 import json
 import logging
 import os
-import re
-from typing import Any, Dict, Optional
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple, Union
 
 from google import genai
 
+from engine.cache import fingerprint_inputs
+from engine.metrics import LatencyHistogram, stage
+from engine.providers.json_extract import JsonStreamExtractor, extract_json, is_object_array, split_batch, validate_strategy
+from engine.providers.pipeline import stream_calls
+
 # -----------------------------
-# JSON extraction helpers
+# JSON extraction (shared: engine.providers.json_extract)
 # -----------------------------
-_JSON_BLOCK_RE = re.compile(r"```(?:json)?\s*(\{.*?\})\s*```", re.DOTALL)
-_FIRST_JSON_RE = re.compile(r"(\{.*\})", re.DOTALL)
-
-def _extract_json(text: str) -> Optional[dict]:
-    if not text:
-        return None
-    s = text.strip()
-
-    # 1) fenced code block
-    m = _JSON_BLOCK_RE.search(s)
-    if m:
-        candidate = m.group(1).strip()
-        try:
-            return json.loads(candidate)
-        except Exception:
-            pass
-
-    # 2) first {...} greedy
-    m = _FIRST_JSON_RE.search(s)
-    if m:
-        candidate = m.group(1).strip()
-        # try direct
-        try:
-            return json.loads(candidate)
-        except Exception:
-            # last resort: trim trailing junk after last }
-            last = candidate.rfind("}")
-            if last != -1:
-                try:
-                    return json.loads(candidate[: last + 1])
-                except Exception:
-                    return None
-
-    # 3) direct attempt
-    try:
-        return json.loads(s)
-    except Exception:
-        return None
-
-
-class RealProvider:
+def _extract_json(text: str, symbols: Optional[List[str]] = None):
     """
-    Real Gemini Provider (google.genai) + Hunter Doctrine v2 (TUNED)
-    - Adds STRUCTURE state: NOT_FORMED / FORMING / FORMED
-    - Rebalances score bands to avoid "all WAIT"
-    - Forces JSON-only output
+    LLM 응답 → 검증된 strategy object (없으면 None)
+    - symbols 지정 시 batch 응답으로 보고 {symbol: strategy} 반환
     """
+    if symbols is not None:
+        return split_batch(text, symbols)
+    return extract_json(text, validator=validate_strategy)
 
-    def __init__(self, model_name: str = "models/gemini-pro-latest"):
-        self.api_key = os.getenv("GEMINI_API_KEY")
-        if not self.api_key:
-            raise ValueError("GEMINI_API_KEY is missing!")
-        self.model_name = model_name
-        self.client = genai.Client(api_key=self.api_key)
-
-        logging.info(f"[RealProvider] Using model: {self.model_name}")
 
-    def analyze(self, symbol: str, payload_dict: Dict[str, Any]) -> Dict[str, Any]:
-        raw_text = ""
-        try:
-            prompt = self._build_prompt(symbol, payload_dict)
-
-            resp = self.client.models.generate_content(
-                model=self.model_name,
-                contents=prompt,
-            )
-
-            # SDK variants: prefer resp.text, else derive
-            raw_text = getattr(resp, "text", None)
-            if not raw_text:
-                raw_text = str(resp)
-
-            parsed = _extract_json(raw_text)
-            if not parsed:
-                raise ValueError("JSON_PARSE_ERROR")
-
-            # usage (rough estimation; governance uses these)
-            input_tokens = len(prompt) // 4
-            output_tokens = len(raw_text) // 4
-
-            return {
-                "status": "SUCCESS",
-                "strategy_data": parsed,
-                "usage": {
-                    "input_tokens": input_tokens,
-                    "output_tokens": output_tokens,
-                },
-            }
-
-        except Exception as e:
-            err = str(e)
-            if "JSON_PARSE_ERROR" in err:
-                err = "JSON_PARSE_ERROR"
-
-            logging.error(f"❌ Provider Error for {symbol}: {err}")
-            if raw_text:
-                logging.debug(f"Raw Output (head): {raw_text[:300]}")
-
-            return {
-                "status": "FAILED",
-                "error": err,
-                "usage": {"input_tokens": 0, "output_tokens": 0},
-            }
-
-    def _build_prompt(self, symbol: str, data: Dict[str, Any]) -> str:
-        news = data.get("news_summary", "N/A")
-        flow = data.get("flow_summary", "N/A")
-        fundamentals = data.get("fundamentals", {}) or {}
-
-        # NOTE: schema must match StrategyOutput exactly.
-        return f"""
+# -----------------------------
+# Prompt (SNIPER DOCTRINE v2)
+# -----------------------------
+_DOCTRINE = """
 ROLE: You are SNIPER, an elite TRADER.
 You are NOT a company reviewer. You ONLY act when a tradable STRUCTURE exists.
 You must focus on DELTA (change), but you are allowed to label "FORMING" when early change starts.
@@ -160,33 +70,359 @@ You must focus on DELTA (change), but you are allowed to label "FORMING" when ea
 - If Structure=FORMING or FORMED:
   * Strong Quality -> raise confidence and score (may upgrade BUY->STRONG_BUY if FORMED)
   * Normal Quality -> keep within band
+""".strip()
 
-[INPUT DATA for {symbol}]
-- News Summary:
-{news}
-
-- Flow/Price Action:
-{flow}
-
-- Fundamentals (context only):
-{json.dumps(fundamentals, ensure_ascii=False)}
-
-[OUTPUT REQUIREMENT - JSON ONLY]
-Return ONLY a valid JSON object that matches:
-
-{{
+# NOTE: schema must match StrategyOutput exactly.
+_OUTPUT_SCHEMA = """
+{
   "decision": "STRONG_BUY" | "BUY" | "WAIT" | "REDUCE" | "AVOID",
   "score": (int 0-100),
   "confidence": (float 0.0-1.0),
   "reasoning": "Max 3 lines. Must state: (1) structure state: NOT_FORMED/FORMING/FORMED, (2) what DELTA exists, (3) next trigger to confirm or invalidate.",
-  "trading_plan": {{
+  "trading_plan": {
       "entry_price": "Entry zone or 'WAIT'",
       "stop_loss": "Invalidation level or 'N/A'",
       "target_price": "Target or 'N/A'"
-  }}
-}}
+  }
+}
+""".strip()
 
+_OUTPUT_RULES = """
 IMPORTANT:
 - If you choose WAIT with score 50-69, you MUST describe a concrete next trigger (what price/flow change would upgrade to BUY).
 - Avoid generic phrases like "static snapshot" without specifying what is missing.
 """.strip()
+
+
+def _prompt_template_hash() -> str:
+    """prompt 고정 문구 hash → 입력 fingerprint에 포함 (문구 변경 시 입력이 같아도 재분석)"""
+    template = "\n".join([_DOCTRINE, _OUTPUT_SCHEMA, _OUTPUT_RULES])
+    return hashlib.sha256(template.encode("utf-8")).hexdigest()[:16]
+
+
+class RealProvider:
+    """
+    Real Gemini Provider (google.genai) + Hunter Doctrine v2 (TUNED)
+    - Adds STRUCTURE state: NOT_FORMED / FORMING / FORMED
+    - Rebalances score bands to avoid "all WAIT"
+    - Forces JSON-only output
+    """
+
+    def __init__(self, model_name: str = "models/gemini-pro-latest", cache=None, gatekeeper=None, governance=None, stream=None):
+        self.api_key = os.getenv("GEMINI_API_KEY")
+        if not self.api_key:
+            raise ValueError("GEMINI_API_KEY is missing!")
+        self.model_name = model_name
+        self.client = genai.Client(api_key=self.api_key)
+
+        # 선택: SniperCacheLayer / LLMGatekeeper 연결 시 입력 fingerprint 재사용 + cap 적용
+        self.cache = cache
+        self.gatekeeper = gatekeeper
+        # 선택: GovernanceManager 연결 시 실제 LLM 호출 직전 provider/model token bucket 대기
+        self.governance = governance
+
+        # Streaming: schema 유효 JSON 완성 즉시 응답 stream 중단 (뒤따르는 prose 대기 / 토큰 절감)
+        if stream is None:
+            stream = os.getenv("SNIPER_LLM_STREAM", "0") == "1"
+        self.stream = stream
+
+        # usage stats (analyze_many 병렬 호출 대비 lock)
+        self._usage_lock = threading.Lock()
+        self._usage = {"total_calls": 0, "streamed_calls": 0, "early_stops": 0, "output_chars": 0}
+        self._latency = LatencyHistogram()
+        self._ttft = LatencyHistogram()
+        self._ttvj = LatencyHistogram()
+
+        logging.info(f"[RealProvider] Using model: {self.model_name} (stream={self.stream})")
+
+    def analyze(self, symbol: str, payload_dict: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            prompt = self._build_prompt(symbol, payload_dict)
+            if self.cache is None:
+                status = self._gatekeeper_status(symbol)
+                if callable(status):
+                    status = status()
+                if not status["allowed"]:
+                    raise PermissionError(f"Gatekeeper Blocked: {status['reason']}")
+                return self._generate(symbol, prompt)
+
+            called = []
+
+            def llm_call():
+                called.append(True)
+                return self._generate(symbol, prompt)
+
+            result = self.cache.resolve_request(
+                "gemini", self.model_name, symbol, prompt,
+                self._gatekeeper_status(symbol), llm_call,
+                input_fingerprint=self._fingerprint(symbol, payload_dict),
+            )
+            if called:
+                return dict(result, api_called=True, cache_hit=False)
+            # 재사용 결과: 토큰 사용량 재집계 방지
+            return dict(result, api_called=False, cache_hit=True, usage={"input_tokens": 0, "output_tokens": 0})
+
+        except Exception as e:
+            err = str(e)
+            if "JSON_PARSE_ERROR" in err:
+                err = "JSON_PARSE_ERROR"
+
+            logging.error(f"❌ Provider Error for {symbol}: {err}")
+
+            return {
+                "status": "FAILED",
+                "error": err,
+                "usage": {"input_tokens": 0, "output_tokens": 0},
+            }
+
+    async def analyze_many(
+        self,
+        items: Union[Dict[str, Dict[str, Any]], Iterable[Tuple[str, Dict[str, Any]]]],
+        concurrency: Optional[int] = None,
+    ) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """
+        다종목 비동기 분석 → 완료 순서대로 (symbol, result) yield
+        - items: {symbol: payload} 또는 [(symbol, payload), ...]
+        - concurrency: 동시 in-flight 요청 수 (기본 SNIPER_LLM_CONCURRENCY=4)
+        - 요청별 경로는 analyze()와 동일 (cache / gatekeeper cap / governance limiter)
+        """
+        if isinstance(items, dict):
+            items = items.items()
+        if concurrency is None:
+            concurrency = int(os.getenv("SNIPER_LLM_CONCURRENCY", "4"))
+
+        async for (symbol, _), result in stream_calls(self.analyze, items, concurrency):
+            yield symbol, result
+
+    def _fingerprint(self, symbol: str, payload: Dict[str, Any]) -> str:
+        return fingerprint_inputs(symbol, payload, template=_prompt_template_hash())
+
+    def _gatekeeper_status(self, symbol: str):
+        if self.gatekeeper is None:
+            return {"allowed": True, "reason": "NO_GATEKEEPER"}
+        # leader 호출 시점에만 평가 (single-flight / fingerprint 재사용 시 slot 미소모)
+        return lambda: self.gatekeeper.check_access(symbol)
+
+    def _complete(self, prompt: str, extractor: Optional[JsonStreamExtractor] = None) -> str:
+        """
+        LLM 1회 호출 → 응답 텍스트 (governance limiter 대기 포함)
+        - stream 모드 + extractor: chunk 단위 수신, extractor가 유효 JSON을 완성하면 즉시 중단
+        """
+        if self.governance is not None:
+            self.governance.wait_for_slot("gemini", self.model_name)
+
+        with stage("llm"):
+            start = time.perf_counter()
+            if self.stream and extractor is not None:
+                return self._complete_stream(prompt, extractor, start)
+
+            resp = self.client.models.generate_content(
+                model=self.model_name,
+                contents=prompt,
+            )
+
+        # SDK variants: prefer resp.text, else derive
+        raw_text = getattr(resp, "text", None)
+        if not raw_text:
+            raw_text = str(resp)
+        self._record_call(start, raw_text)
+        return raw_text
+
+    def _complete_stream(self, prompt: str, extractor: JsonStreamExtractor, start: float) -> str:
+        parts, first_at, done_at = [], None, None
+        stream = self.client.models.generate_content_stream(
+            model=self.model_name,
+            contents=prompt,
+        )
+        try:
+            for chunk in stream:
+                text = getattr(chunk, "text", None)
+                if not text:
+                    continue
+                if first_at is None:
+                    first_at = time.perf_counter()
+                parts.append(text)
+                if extractor.feed(text) is not None:
+                    done_at = time.perf_counter()
+                    break
+        finally:
+            # 조기 종료 시 남은 응답 수신 중단 (HTTP stream close)
+            close = getattr(stream, "close", None)
+            if close is not None:
+                close()
+
+        raw_text = "".join(parts)
+        self._record_call(start, raw_text, first_at=first_at, done_at=done_at)
+        return raw_text
+
+    def _record_call(self, start, raw_text, first_at=None, done_at=None):
+        end = time.perf_counter()
+        with self._usage_lock:
+            self._usage["total_calls"] += 1
+            self._usage["output_chars"] += len(raw_text)
+            self._latency.record((end - start) * 1000.0)
+            if first_at is not None:
+                self._usage["streamed_calls"] += 1
+                self._ttft.record((first_at - start) * 1000.0)
+            if done_at is not None:
+                self._usage["early_stops"] += 1
+                self._ttvj.record((done_at - start) * 1000.0)
+
+    def get_usage_stats(self) -> Dict[str, Any]:
+        """호출 수 / 지연 분포 (ms) / streaming TTFT · time-to-valid-JSON"""
+        with self._usage_lock:
+            return dict(
+                self._usage,
+                latency_ms=self._latency.summary(),
+                ttft_ms=self._ttft.summary(),
+                time_to_valid_json_ms=self._ttvj.summary(),
+            )
+
+    def _generate(self, symbol: str, prompt: str) -> Dict[str, Any]:
+        """LLM 1회 호출 → SUCCESS 결과 (실패 시 예외)"""
+        raw_text = self._complete(prompt, JsonStreamExtractor(validator=validate_strategy))
+
+        parsed = _extract_json(raw_text)
+        if not parsed:
+            logging.debug(f"Raw Output (head): {raw_text[:300]}")
+            raise ValueError("JSON_PARSE_ERROR")
+
+        # usage (rough estimation; governance uses these)
+        input_tokens = len(prompt) // 4
+        output_tokens = len(raw_text) // 4
+
+        return {
+            "status": "SUCCESS",
+            "strategy_data": parsed,
+            "usage": {
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens,
+            },
+        }
+
+    # -----------------------------
+    # Batched analysis
+    # -----------------------------
+
+    def analyze_batch(
+        self,
+        items: Union[Dict[str, Dict[str, Any]], Iterable[Tuple[str, Dict[str, Any]]]],
+        batch_size: Optional[int] = None,
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        K종목 INPUT DATA를 doctrine 1회 아래 묶어 LLM 1회 호출 (gatekeeper slot도 batch당 1개)
+        - batch_size: 묶음 종목 수 (기본 SNIPER_LLM_BATCH_SIZE=5)
+        - cache / fingerprint로 재사용 가능한 종목은 묶기 전에 제외
+        - 응답 누락 / schema 불일치 종목은 analyze() 단건으로 재시도
+        - 반환: {symbol: result} (입력 순서, 결과 형식은 analyze()와 동일)
+        """
+        items = list(items.items() if isinstance(items, dict) else items)
+        if batch_size is None:
+            batch_size = int(os.getenv("SNIPER_LLM_BATCH_SIZE", "5"))
+        batch_size = max(1, batch_size)
+
+        results, pending = {}, []
+        for symbol, payload in items:
+            prompt = self._build_prompt(symbol, payload)
+            reused = None
+            if self.cache is not None:
+                reused = self.cache.peek_request(
+                    "gemini", self.model_name, symbol, prompt,
+                    input_fingerprint=self._fingerprint(symbol, payload),
+                )
+            if reused is not None:
+                results[symbol] = dict(reused, api_called=False, cache_hit=True, usage={"input_tokens": 0, "output_tokens": 0})
+            else:
+                pending.append((symbol, payload, prompt))
+
+        for i in range(0, len(pending), batch_size):
+            chunk = pending[i: i + batch_size]
+            if len(chunk) == 1:
+                symbol, payload, _ = chunk[0]
+                results[symbol] = self.analyze(symbol, payload)
+            else:
+                results.update(self._analyze_chunk(chunk))
+
+        return {symbol: results[symbol] for symbol, _ in items}
+
+    def _analyze_chunk(self, chunk) -> Dict[str, Dict[str, Any]]:
+        symbols = [symbol for symbol, _, _ in chunk]
+        try:
+            status = self._gatekeeper_status(f"{symbols[0]}+{len(symbols) - 1}")
+            if callable(status):
+                status = status()
+            if not status["allowed"]:
+                raise PermissionError(f"Gatekeeper Blocked: {status['reason']}")
+
+            prompt = self._build_batch_prompt([(symbol, payload) for symbol, payload, _ in chunk])
+            raw_text = self._complete(prompt, JsonStreamExtractor(validator=is_object_array, want="array"))
+            parsed = _extract_json(raw_text, symbols=symbols)
+        except PermissionError as e:
+            logging.error(f"❌ Provider Error for {symbols}: {e}")
+            return {
+                symbol: {"status": "FAILED", "error": str(e), "usage": {"input_tokens": 0, "output_tokens": 0}}
+                for symbol in symbols
+            }
+        except Exception as e:
+            logging.error(f"❌ Batch Provider Error for {symbols}: {e} (fallback to single requests)")
+            parsed, prompt, raw_text = {}, "", ""
+
+        # usage: batch 합계를 응답 종목 수로 균등 배분
+        share = max(1, len(parsed))
+        usage = {"input_tokens": len(prompt) // 4 // share, "output_tokens": len(raw_text) // 4 // share}
+
+        results = {}
+        for symbol, payload, single_prompt in chunk:
+            if symbol not in parsed:
+                results[symbol] = self.analyze(symbol, payload)
+                continue
+
+            result = {"status": "SUCCESS", "strategy_data": parsed[symbol], "usage": dict(usage)}
+            if self.cache is not None:
+                # 단건 prompt key / fingerprint로 저장 → 이후 analyze()도 재사용 (slot은 batch에서 소모)
+                self.cache.store_result(
+                    "gemini", self.model_name, symbol, single_prompt, result,
+                    input_fingerprint=self._fingerprint(symbol, payload),
+                )
+            results[symbol] = dict(result, api_called=True, cache_hit=False, batched=True)
+        return results
+
+    def _input_block(self, symbol: str, data: Dict[str, Any]) -> str:
+        news = data.get("news_summary", "N/A")
+        flow = data.get("flow_summary", "N/A")
+        fundamentals = data.get("fundamentals", {}) or {}
+
+        return f"""
+[INPUT DATA for {symbol}]
+- News Summary:
+{news}
+
+- Flow/Price Action:
+{flow}
+
+- Fundamentals (context only):
+{json.dumps(fundamentals, ensure_ascii=False)}
+""".strip()
+
+    def _build_prompt(self, symbol: str, data: Dict[str, Any]) -> str:
+        return "\n\n".join([
+            _DOCTRINE,
+            self._input_block(symbol, data),
+            "[OUTPUT REQUIREMENT - JSON ONLY]\nReturn ONLY a valid JSON object that matches:",
+            _OUTPUT_SCHEMA,
+            _OUTPUT_RULES,
+        ])
+
+    def _build_batch_prompt(self, items: List[Tuple[str, Dict[str, Any]]]) -> str:
+        """doctrine / schema 1회 + 종목별 INPUT DATA 블록 K개"""
+        symbols = ", ".join(symbol for symbol, _ in items)
+        return "\n\n".join([
+            _DOCTRINE,
+            *[self._input_block(symbol, data) for symbol, data in items],
+            "[OUTPUT REQUIREMENT - JSON ONLY]\n"
+            f"Analyze EACH symbol independently: {symbols}\n"
+            "Return ONLY a valid JSON array with exactly one object per symbol.\n"
+            'Each object has a "symbol" field plus the fields of:',
+            _OUTPUT_SCHEMA,
+            _OUTPUT_RULES,
+        ])
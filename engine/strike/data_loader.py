@@ -1,36 +1,10 @@
 from __future__ import annotations
 
-from typing import Optional, Tuple
+from typing import Dict, Iterable, Optional, Tuple
 
 import pandas as pd
 
-try:
-    import yfinance as yf
-except Exception:
-    yf = None
-
-
-def _normalize_ohlcv(df: pd.DataFrame, symbol: str) -> Optional[pd.DataFrame]:
-    if df is None or df.empty:
-        return None
-
-    # MultiIndex columns
-    if isinstance(df.columns, pd.MultiIndex):
-        cols = {}
-        for c in ["Open", "High", "Low", "Close", "Volume"]:
-            if (c, symbol) in df.columns:
-                cols[c] = (c, symbol)
-        if len(cols) < 5:
-            return None
-        df = df[list(cols.values())].copy()
-        df.columns = list(cols.keys())
-    else:
-        needed = ["Open", "High", "Low", "Close", "Volume"]
-        if not all(c in df.columns for c in needed):
-            return None
-        df = df[needed].copy()
-
-    return df
+from engine.price_store import get_price_store
 
 
 def _coerce_clean(df: pd.DataFrame) -> Optional[pd.DataFrame]:
@@ -78,37 +52,42 @@ def load_price_data_range(
     - period="6mo" (default) OR
     - start_end=(start_ts, end_ts) (preferred for backtest determinism)
     """
-    if yf is None:
-        raise RuntimeError("yfinance not installed. Install: pip install yfinance")
-
     sym = symbol.strip().upper()
     if not sym:
         return None
 
-    try:
-        if start_end is not None:
-            start_ts, end_ts = start_end
-            raw = yf.download(
-                sym,
-                start=start_ts.date().isoformat(),
-                end=end_ts.date().isoformat(),
-                interval="1d",
-                auto_adjust=False,
-                progress=False,
-                threads=True,
-            )
-        else:
-            raw = yf.download(
-                sym,
-                period=period or "6mo",
-                interval="1d",
-                auto_adjust=False,
-                progress=False,
-                threads=True,
-            )
-    except Exception:
-        return None
+    # Raw (auto_adjust=False) 저장소: 누락 구간만 네트워크 요청
+    store = get_price_store(auto_adjust=False)
+    if start_end is not None:
+        start_ts, end_ts = start_end
+        df = store.load(sym, start=start_ts, end=end_ts)
+    else:
+        df = store.load(sym, period=period or "6mo")
 
-    df = _normalize_ohlcv(raw, sym)
-    df = _coerce_clean(df)
-    return df
+    return _coerce_clean(df)
+
+
+def load_price_data_many(
+    symbols: Iterable[str],
+    *,
+    period: Optional[str] = None,
+    start_end: Optional[Tuple[pd.Timestamp, pd.Timestamp]] = None,
+) -> Dict[str, pd.DataFrame]:
+    """
+    load_price_data_range()의 다종목 버전
+    - 누락 구간은 저장소가 batch 단위로 한 번에 다운로드
+    - 데이터가 없는 종목은 결과에서 제외
+    """
+    store = get_price_store(auto_adjust=False)
+    if start_end is not None:
+        start_ts, end_ts = start_end
+        frames = store.load_many(symbols, start=start_ts, end=end_ts)
+    else:
+        frames = store.load_many(symbols, period=period or "6mo")
+
+    out: Dict[str, pd.DataFrame] = {}
+    for sym, df in frames.items():
+        df = _coerce_clean(df)
+        if df is not None:
+            out[sym] = df
+    return out
@@ -85,3 +85,49 @@ def calc_breakout(close_series: pd.Series) -> bool:
         return False
 
     return bool(today_close > prev5_high)
+
+
+
+# === 전체 이력 Series 버전 (각 행 = 해당 일자까지의 데이터로 계산한 스칼라 함수 값) ===
+# 결측 행은 스칼라 함수처럼 제외하고 계산한 뒤 원래 index로 되돌림 (결측 행 = NaN / False)
+
+def calc_distance_series(close_series: pd.Series) -> pd.Series:
+    """calc_distance()의 일자별 값 (ratio)"""
+    if close_series is None:
+        return pd.Series(dtype=float)
+
+    close = close_series.dropna()
+    low_3m = close.rolling(63, min_periods=1).min()
+    dist = ((close - low_3m) / low_3m).where(low_3m > 0)
+    return dist.reindex(close_series.index)
+
+
+def calc_flow_v1_series(close_series: pd.Series) -> pd.Series:
+    """calc_flow_v1()의 일자별 값"""
+    if close_series is None:
+        return pd.Series(dtype=bool)
+
+    close = close_series.dropna()
+    flow = close.rolling(5).mean() > close.rolling(20).mean()
+    return flow.reindex(close_series.index, fill_value=False)
+
+
+def calc_volume_shock_series(volume_series: pd.Series) -> pd.Series:
+    """calc_volume_shock()의 일자별 값 (최근 10일 평균 = 당일 제외)"""
+    if volume_series is None:
+        return pd.Series(dtype=float)
+
+    vol = volume_series.dropna()
+    avg10 = vol.shift(1).rolling(10).mean()
+    ratio = (vol / avg10).where(avg10 > 0)
+    return ratio.reindex(volume_series.index)
+
+
+def calc_breakout_series(close_series: pd.Series) -> pd.Series:
+    """calc_breakout()의 일자별 값 (직전 5거래일 종가 고점 돌파)"""
+    if close_series is None:
+        return pd.Series(dtype=bool)
+
+    close = close_series.dropna()
+    breakout = close > close.shift(1).rolling(5).max()
+    return breakout.reindex(close_series.index, fill_value=False)
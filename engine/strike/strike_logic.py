@@ -6,9 +6,13 @@ import pandas as pd
 
 from engine.strike.indicators import (
     calc_breakout,
+    calc_breakout_series,
     calc_distance,
+    calc_distance_series,
     calc_flow_v1,
+    calc_flow_v1_series,
     calc_volume_shock,
+    calc_volume_shock_series,
 )
 
 
@@ -75,3 +79,30 @@ def is_strike_candidate(df: pd.DataFrame) -> Optional[Dict[str, Any]]:
         "volume_ratio": round(volume_ratio, 2),
         "breakout": True,
     }
+
+
+def is_strike_candidate_series(df: pd.DataFrame) -> pd.Series:
+    """
+    is_strike_candidate()의 전체 이력 버전
+    - 반환: 일자별 bool Series (True = 해당 일자까지의 데이터로 Strike 조건 충족)
+    - 4개 조건을 rolling 1회로 계산 (O(n))
+    """
+    if df is None or df.empty:
+        return pd.Series(dtype=bool)
+
+    for c in ["Close", "Volume"]:
+        if c not in df.columns:
+            return pd.Series(False, index=df.index)
+
+    close = df["Close"]
+    volume_ratio = calc_volume_shock_series(df["Volume"])
+    dist = calc_distance_series(close)
+
+    strike = (
+        calc_breakout_series(close)
+        & (volume_ratio >= VOLUME_SHOCK_MIN)
+        & calc_flow_v1_series(close)
+        & (dist >= DISTANCE_MIN)
+        & (dist <= DISTANCE_MAX)
+    )
+    return strike.astype(bool)
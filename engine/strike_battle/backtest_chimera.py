@@ -1,6 +1,7 @@
 from __future__ import annotations
 from dataclasses import dataclass
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Sequence, Tuple
+import numpy as np
 import pandas as pd
 
 @dataclass
@@ -66,3 +67,109 @@ def _calc_real_return(df: pd.DataFrame, signal_date: pd.Timestamp, rule: RealTra
         
     net_ret = realized_ret - cost_rate
     return {"ret": net_ret, "exit_type": exit_type}
+
+def _first_hit(mask: np.ndarray) -> np.ndarray:
+    """행별 첫 True 위치 (없으면 열 개수)"""
+    return np.where(mask.any(axis=1), mask.argmax(axis=1), mask.shape[1])
+
+def simulate_real_returns(data: Dict[str, pd.DataFrame], entries: Sequence[Tuple[str, pd.Timestamp]], rule: RealTradeRule) -> List[Dict[str, Any]]:
+    """
+    _calc_real_return의 배치 버전 (entries 순서대로 결과 반환)
+    - 종목별 OHLC 배열을 한 번만 추출해 (trade x hold_days) 창으로 모음
+    - SL / TP1(본절 전환) / TP2 는 첫 도달 인덱스 비교로 판정
+    """
+    if not entries:
+        return []
+
+    # 1) 종목별 배열을 하나의 평탄 배열로 이어붙이고, 신호일 -> 행 위치를 종목 단위로 일괄 조회
+    n_trades = len(entries)
+    syms = np.array([s for s, _ in entries], dtype=object)
+    dates = pd.DatetimeIndex([d for _, d in entries])
+    base = np.empty(n_trades, dtype=np.int64)
+    n_rows = np.empty(n_trades, dtype=np.int64)
+    idx = np.empty(n_trades, dtype=np.int64)
+    chunks, total = [], 0
+    for sym in dict.fromkeys(syms):
+        df = data[sym]
+        sel = np.flatnonzero(syms == sym)
+        # get_loc 규칙: 중복 날짜는 마지막 행
+        loc = df.index.searchsorted(dates[sel], side="right") - 1
+        found = loc >= 0
+        found[found] = df.index[loc[found]] == dates[sel][found]
+        if not found.all():
+            raise KeyError(dates[sel][~found][0])
+        base[sel], n_rows[sel], idx[sel] = total, len(df), loc
+        chunks.append(df[["Open", "High", "Low", "Close"]].to_numpy(dtype=float))
+        total += len(df)
+    o_flat, h_flat, l_flat, c_flat = np.concatenate(chunks).T
+
+    entry_i = idx + 1
+    valid = entry_i < n_rows
+    end_i = np.minimum(entry_i + rule.hold_days, n_rows)
+
+    # 2) 보유 구간 창 (범위 밖 = NaN -> 모든 비교 False)
+    steps = np.arange(max(rule.hold_days, 1))
+    pos = entry_i[:, None] + steps[None, :]
+    in_win = valid[:, None] & (pos < end_i[:, None])
+    gather = np.where(in_win, base[:, None] + pos, 0)
+    day_low = np.where(in_win, l_flat[gather], np.nan)
+    day_high = np.where(in_win, h_flat[gather], np.nan)
+
+    entry_px = o_flat[np.where(valid, base + entry_i, 0)]
+    final_close = c_flat[np.where(valid, base + end_i - 1, 0)]
+    with np.errstate(all="ignore"):
+        loss_pct = (day_low / entry_px[:, None] - 1.0) * 100
+        profit_pct = (day_high / entry_px[:, None] - 1.0) * 100
+
+    sl_hit = loss_pct <= rule.stop_loss_pct
+    be_hit = loss_pct <= 0.0
+    tp1_hit = profit_pct >= rule.tp1_pct
+    tp2_hit = profit_pct >= rule.tp2_pct
+
+    # 3) 1구간 (전량 보유, SL = stop_loss_pct): 첫 이벤트일
+    rows = np.arange(n_trades)
+    n_steps = steps.size
+    e1 = _first_hit(sl_hit | tp1_hit | tp2_hit)
+    has_e1 = e1 < n_steps
+    e1c = np.minimum(e1, n_steps - 1)
+    sl1 = has_e1 & sl_hit[rows, e1c]
+    tp1 = has_e1 & ~sl1 & tp1_hit[rows, e1c]
+    tp2_same = has_e1 & ~sl1 & tp2_hit[rows, e1c]
+
+    # 4) 2구간 (TP1 이후 절반 보유, SL = 본절): e1 다음날부터
+    e2 = _first_hit((steps[None, :] > e1[:, None]) & (be_hit | tp2_hit))
+    has_e2 = tp1 & ~tp2_same & (e2 < n_steps)
+    e2c = np.minimum(e2, n_steps - 1)
+    be2 = has_e2 & be_hit[rows, e2c]
+    tp2_late = has_e2 & ~be2
+
+    sl_px = entry_px * (1 + rule.stop_loss_pct / 100)
+    be_px = entry_px * (1 + 0.0 / 100)
+    tp1_ret = 0.5 * (rule.tp1_pct / 100.0)
+    cost_rate = rule.cost_bps / 10000.0
+
+    # 5) 실현 수익: 원 함수와 동일한 누적 순서
+    with np.errstate(all="ignore"):
+        realized = np.select(
+            [sl1, tp1 & tp2_same, tp2_same, be2, tp2_late, tp1],
+            [
+                0.0 + 1.0 * (sl_px / entry_px - 1.0),
+                tp1_ret + 0.5 * (rule.tp2_pct / 100.0),
+                0.0 + 1.0 * (rule.tp2_pct / 100.0),
+                tp1_ret + 0.5 * (be_px / entry_px - 1.0),
+                tp1_ret + 0.5 * (rule.tp2_pct / 100.0),
+                tp1_ret + 0.5 * (final_close / entry_px - 1.0),
+            ],
+            default=0.0 + 1.0 * (final_close / entry_px - 1.0),
+        )
+    net_ret = realized - cost_rate
+    exit_type = np.select(
+        [~valid, sl1, tp2_same, be2, tp2_late, tp1],
+        ["end", "stop_loss", "tp_max", "tp1_then_sl", "tp_max", "tp1_hold"],
+        default="hold",
+    )
+
+    return [
+        {"ret": float(r) if ok else 0.0, "exit_type": str(e)}
+        for r, e, ok in zip(net_ret, exit_type, valid)
+    ]
@@ -2,7 +2,7 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import Optional
 import pandas as pd
-import yfinance as yf
+from engine.price_store import get_price_store
 
 @dataclass
 class LoadConfig:
@@ -12,9 +12,9 @@ class LoadConfig:
 def load_price_data(symbol: str, cfg: Optional[LoadConfig] = None) -> Optional[pd.DataFrame]:
     if cfg is None: cfg = LoadConfig()
     try:
-        t = yf.Ticker(symbol)
-        df = t.history(period="2y", interval="1d", auto_adjust=cfg.auto_adjust)
-        if df.empty: return None
+        # 공용 PriceStore: 2y 중 저장소에 없는 구간만 다운로드
+        df = get_price_store(auto_adjust=cfg.auto_adjust).load(symbol, period="2y")
+        if df is None or df.empty: return None
         return df
     except Exception:
-        return None
\ No newline at end of file
+        return None
@@ -1,6 +1,7 @@
 from __future__ import annotations
 from dataclasses import dataclass
 from typing import Dict, List, Any, Optional
+import numpy as np
 
 @dataclass(frozen=True)
 class ChimeraConfig:
@@ -72,3 +73,83 @@ def select_chimera(features_list: List[Any], cfg: Optional[ChimeraConfig] = None
             "ret1d_pct": round(f.ret1d_pct, 2)
         })
     return out
+
+def _ratio_ladder(cfg: ChimeraConfig, penalty: float) -> List[float]:
+    # select_chimera while-loop와 동일한 반올림 경로로 단계 생성
+    ladder = []
+    ratio = cfg.base_volume_ratio + penalty
+    while ratio + 1e-9 >= cfg.min_volume_ratio + penalty:
+        ladder.append(ratio)
+        ratio = round(ratio - cfg.step, 10)
+    return ladder
+
+def select_chimera_batch(tensor: Any, cfg: Optional[ChimeraConfig] = None) -> List[List[Dict[str, Any]]]:
+    """
+    select_chimera의 배열 버전 (date x symbol 텐서 -> 날짜별 picks 리스트)
+    - 시장 온도 / 적응형 거래량 문턱 / Top-K를 전 날짜에 대해 한 번에 계산
+    - 동점 순서는 안정 정렬로 리스트 버전과 동일하게 유지
+    """
+    cfg = cfg or ChimeraConfig()
+    present = np.asarray(tensor.present, dtype=bool)
+    n_days, n_syms = present.shape
+    if n_days == 0:
+        return []
+
+    vr = np.asarray(tensor.volume_ratio, dtype=float)
+    dist = np.asarray(tensor.distance_pct, dtype=float)
+    ret = np.asarray(tensor.ret1d_pct, dtype=float)
+    brk = np.asarray(tensor.breakout_high, dtype=bool)
+
+    universe_size = present.sum(axis=1)
+    # cumsum = 순차 합산 (리스트 버전 sum()과 동일한 부동소수 결과)
+    ret_sum = np.cumsum(np.where(present, ret, 0.0), axis=1)[:, -1] if n_syms else np.zeros(n_days)
+    market_temp = np.where(universe_size > 0, ret_sum / np.maximum(universe_size, 1), 0.0)
+
+    penalized = cfg.use_regime_filter & (market_temp < -0.5)
+    penalty = np.where(penalized, cfg.regime_penalty, 0.0)
+    need = np.maximum(1, np.minimum(cfg.top_k, (universe_size * 0.10 + 0.99).astype(int)))
+
+    base = present & np.asarray(tensor.flow_v1, dtype=bool) & (dist >= 5.0) & (dist <= cfg.max_distance_pct) & brk
+
+    # 단계별 문턱: (penalty 없음 / 있음) 두 사다리 중 날짜별 선택
+    ladders = [_ratio_ladder(cfg, 0.0), _ratio_ladder(cfg, cfg.regime_penalty)]
+    n_steps = max(len(l) for l in ladders)
+    table = np.full((2, max(n_steps, 1)), np.nan)
+    for i, ladder in enumerate(ladders):
+        table[i, :len(ladder)] = ladder
+    steps = table[penalized.astype(int)]
+
+    with np.errstate(invalid="ignore"):
+        counts = (base[:, :, None] & (vr[:, :, None] >= steps[:, None, :])).sum(axis=1)
+    ok = counts >= need[:, None]
+    found = ok.any(axis=1)
+    first = np.argmax(ok, axis=1)
+    threshold = np.where(found, steps[np.arange(n_days), first], cfg.min_volume_ratio + penalty)
+
+    with np.errstate(invalid="ignore"):
+        pool = base & (vr >= threshold[:, None])
+    score = (vr * 1.0) + ((1.0 / (1.0 + np.maximum(0.0, dist))) * 5.0) + (brk * 0.5)
+    ranked = np.argsort(-np.where(pool, score, -np.inf), axis=1, kind="stable")[:, :cfg.top_k]
+
+    out = []
+    for d in range(n_days):
+        day_str = tensor.dates[d].strftime("%Y-%m-%d")
+        picks = []
+        for j in ranked[d]:
+            if not pool[d, j]:
+                break
+            picks.append({
+                "engine": "Chimera-N",
+                "symbol": tensor.symbols[j],
+                "date": day_str,
+                "market_temp": round(float(market_temp[d]), 2),
+                "score": round(float(score[d, j]), 4),
+                "ret1d_pct": round(float(ret[d, j]), 2)
+            })
+        out.append(picks)
+    return out
+
+def select_chimera_arrays(tensor: Any, cfg: Optional[ChimeraConfig] = None) -> List[Dict[str, Any]]:
+    """하루치(1 x N) 텐서용 select_chimera"""
+    picks = select_chimera_batch(tensor, cfg)
+    return picks[0] if picks else []
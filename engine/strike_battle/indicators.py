@@ -1,6 +1,7 @@
 from __future__ import annotations
 from dataclasses import dataclass
-from typing import Optional
+from typing import Dict, List, Optional
+import numpy as np
 import pandas as pd
 
 @dataclass
@@ -17,36 +18,114 @@ class Features:
     flow_v1: bool
     breakout_high: bool
 
+FEATURE_COLUMNS = ["volume_ratio", "distance_pct", "ret1d_pct", "flow_v1", "breakout_high"]
+MIN_HISTORY = 60
+
+def precompute_features(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    전체 이력의 Features 컬럼을 한 번에 계산 (rolling / shift)
+    - 반환 frame = 원본 OHLCV + FEATURE_COLUMNS
+    - compute_features_for_date()는 이 frame을 받으면 행 조회만 수행
+    """
+    out = df.copy()
+    close, high, low, vol = out["Close"], out["High"], out["Low"], out["Volume"]
+
+    # 직전 10일 평균 거래량 (당일 제외)
+    vol_avg = vol.rolling(10, min_periods=1).mean().shift(1)
+    out["volume_ratio"] = np.where(vol_avg > 0, vol / vol_avg, 0.0)
+
+    # 당일 포함 61봉 최저가 대비 거리
+    low_60 = low.rolling(MIN_HISTORY + 1, min_periods=1).min()
+    out["distance_pct"] = np.where(low_60 > 0, (close - low_60) / low_60 * 100, 999.0)
+
+    prev_close = close.shift(1)
+    out["ret1d_pct"] = np.where(prev_close > 0, (close / prev_close - 1.0) * 100, 0.0)
+
+    ma5 = close.rolling(5, min_periods=1).mean()
+    ma20 = close.rolling(20, min_periods=1).mean()
+    out["flow_v1"] = (ma5 > ma20).to_numpy()
+
+    # 직전 5봉 고가 돌파
+    prev_high = high.rolling(5, min_periods=1).max().shift(1)
+    out["breakout_high"] = (high > prev_high).to_numpy()
+    return out
+
 def compute_features_for_date(symbol: str, df: pd.DataFrame, date: pd.Timestamp) -> Optional[Features]:
     if date not in df.index: return None
     idx = df.index.get_loc(date)
     if isinstance(idx, slice): idx = idx.stop - 1
-    if idx < 60: return None 
-
-    sub = df.iloc[:idx+1]
-    
-    close = float(sub["Close"].iloc[-1])
-    high = float(sub["High"].iloc[-1])
-    low = float(sub["Low"].iloc[-1])
-    vol = float(sub["Volume"].iloc[-1])
-    
-    vol_avg = sub["Volume"].iloc[-11:-1].mean()
-    vol_ratio = vol / vol_avg if vol_avg > 0 else 0.0
-    
-    low_60 = sub["Low"].iloc[-61:].min()
-    dist_pct = (close - low_60) / low_60 * 100 if low_60 > 0 else 999.0
-    
-    ma5 = sub["Close"].iloc[-5:].mean()
-    ma20 = sub["Close"].iloc[-20:].mean()
-    flow = ma5 > ma20
-    
-    prev_high = sub["High"].iloc[-6:-1].max()
-    breakout = high > prev_high
-    
-    if len(sub) > 1:
-        prev_close = sub["Close"].iloc[-2]
-        ret = (close / prev_close - 1.0) * 100 if prev_close > 0 else 0.0
-    else:
-        ret = 0.0
-
-    return Features(symbol, date, close, high, low, vol, vol_ratio, dist_pct, ret, flow, breakout)
\ No newline at end of file
+    if idx < MIN_HISTORY: return None
+
+    # 사전계산 frame이 아니면 필요한 최소 구간(61봉)만 계산
+    if not all(c in df.columns for c in FEATURE_COLUMNS):
+        df = precompute_features(df.iloc[idx - MIN_HISTORY: idx + 1])
+        idx = MIN_HISTORY
+
+    row = df.iloc[idx]
+    return Features(
+        symbol, date,
+        float(row["Close"]), float(row["High"]), float(row["Low"]), float(row["Volume"]),
+        float(row["volume_ratio"]), float(row["distance_pct"]), float(row["ret1d_pct"]),
+        bool(row["flow_v1"]), bool(row["breakout_high"]),
+    )
+
+@dataclass
+class FeatureTensor:
+    """
+    date x symbol Features (struct-of-arrays)
+    - present: 해당 날짜에 Features가 존재하는 칸 (compute_features_for_date != None)
+    """
+    dates: pd.DatetimeIndex
+    symbols: List[str]
+    volume_ratio: np.ndarray
+    distance_pct: np.ndarray
+    ret1d_pct: np.ndarray
+    flow_v1: np.ndarray
+    breakout_high: np.ndarray
+    present: np.ndarray
+
+    @classmethod
+    def from_features(cls, features_list: List[Features]) -> "FeatureTensor":
+        """하루치 Features 리스트 -> 1 x N 텐서 (리스트 순서 유지, 빈 리스트 -> 0 x 0 텐서)"""
+        n_days = 1 if features_list else 0
+
+        def row(attr, dtype):
+            return np.array([getattr(f, attr) for f in features_list], dtype=dtype).reshape(n_days, len(features_list))
+        return cls(
+            dates=pd.DatetimeIndex([features_list[0].date] if features_list else []),
+            symbols=[f.symbol for f in features_list],
+            volume_ratio=row("volume_ratio", float),
+            distance_pct=row("distance_pct", float),
+            ret1d_pct=row("ret1d_pct", float),
+            flow_v1=row("flow_v1", bool),
+            breakout_high=row("breakout_high", bool),
+            present=np.ones((n_days, len(features_list)), dtype=bool),
+        )
+
+def build_feature_tensor(tables: Dict[str, pd.DataFrame], dates) -> FeatureTensor:
+    """
+    precompute_features() 결과 dict -> date x symbol 텐서 (열 = dict 순서)
+    """
+    dates = pd.DatetimeIndex(dates)
+    symbols = list(tables.keys())
+    shape = (len(dates), len(symbols))
+    arrays = {c: np.full(shape, np.nan) for c in ("volume_ratio", "distance_pct", "ret1d_pct")}
+    arrays.update({c: np.zeros(shape, dtype=bool) for c in ("flow_v1", "breakout_high")})
+    present = np.zeros(shape, dtype=bool)
+
+    for j, sym in enumerate(symbols):
+        table = tables[sym]
+        if not all(c in table.columns for c in FEATURE_COLUMNS):
+            table = precompute_features(table)
+
+        # get_loc(slice) 규칙과 동일: 중복 날짜는 마지막 행
+        locs = table.index.searchsorted(dates, side="right") - 1
+        hit = locs >= 0
+        hit[hit] = table.index[locs[hit]] == dates[hit]
+        hit &= locs >= MIN_HISTORY
+        present[:, j] = hit
+
+        for c in arrays:
+            arrays[c][hit, j] = table[c].to_numpy()[locs[hit]]
+
+    return FeatureTensor(dates=dates, symbols=symbols, present=present, **arrays)
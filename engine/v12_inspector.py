@@ -4,6 +4,9 @@ import requests
 import xml.etree.ElementTree as ET
 from datetime import datetime
 
+from engine.providers.json_extract import extract_json
+from engine.providers.model_registry import get_model_registry, is_model_unavailable
+
 # 1. 타겟 로드
 try:
     with open("targets.json", "r") as f:
@@ -15,25 +18,9 @@ except:
 API_KEY = os.environ.get("GEMINI_API_KEY")
 BASE_URL = "https://generativelanguage.googleapis.com/v1beta"
 
-# 2. [핵심] 모델 자동 탐색 함수 (이게 있어야 연결됨)
+# 2. [핵심] 모델 해석 (공유 registry: 디스크 캐시 + 건강도 순, 시작 시 /models 조회 없음)
 def get_working_model():
-    try:
-        url = f"{BASE_URL}/models?key={API_KEY}"
-        response = requests.get(url)
-        if response.status_code != 200: return None
-        
-        models = response.json().get('models', [])
-        candidates = [m for m in models if 'generateContent' in m.get('supportedGenerationMethods', [])]
-        
-        # 우선순위: Flash -> Pro -> 아무거나
-        for m in candidates:
-            if 'gemini-1.5-flash' in m['name']: return m['name']
-        for m in candidates:
-            if 'gemini-pro' in m['name']: return m['name']
-        if candidates: return candidates[0]['name']
-        return None
-    except:
-        return None
+    return get_model_registry("gemini").resolve()
 
 # 3. 구글 뉴스 RSS 수집
 def get_news(symbol):
@@ -77,18 +64,28 @@ def interrogate(target, model_name):
     }}
     """
     
-    url = f"{BASE_URL}/{model_name}:generateContent?key={API_KEY}"
     payload = {"contents": [{"parts": [{"text": prompt}]}]}
+    registry = get_model_registry("gemini")
 
     try:
-        res = requests.post(url, json=payload)
+        # 모델 404 → 실패 기록 후 같은 호출 안에서 다음 후보 재시도
+        for model_name in registry.attempts(model_name):
+            url = f"{BASE_URL}/{model_name}:generateContent?key={API_KEY}"
+            res = requests.post(url, json=payload)
+            if not is_model_unavailable(res.status_code, res.text):
+                break
+            print(f"   ⚠️ Model unavailable {res.status_code}: {model_name}")
+            registry.report_failure(model_name)
+
         if res.status_code != 200:
             print(f"   ⚠️ AI Error {res.status_code}: {res.text[:50]}")
             return None
             
         raw = res.json()['candidates'][0]['content']['parts'][0]['text']
-        clean = raw.replace("```json", "").replace("```", "").strip()
-        data = json.loads(clean)
+        registry.report_success(model_name)
+        data = extract_json(raw)
+        if data is None:
+            raise ValueError("JSON_PARSE_ERROR")
         
         # 중복 키 방지 및 병합
         if "status" not in data: data["status"] = "WATCH"
@@ -98,7 +95,7 @@ def interrogate(target, model_name):
         print(f"   ⚠️ Parsing Error: {e}")
         return None
 
-# --- 실행 로직 ---
+# --- 실행 로직 (python -m engine.v12_inspector, repo root) ---
 print(f"🚀 V12 Engine Started. Targets: {len(TARGETS)}")
 
 # 모델 찾기
@@ -110,6 +107,7 @@ print(f"🤖 Brain Connected: {model}")
 
 final_report = []
 for t in TARGETS:
+    model = get_working_model() or model  # 실패 보고된 모델은 다음 후보로 교체
     res = interrogate(t, model)
     if res:
         print(f"   ✅ [{res.get('status')}] {t['symbol']}: {res.get('reason_kr')}")
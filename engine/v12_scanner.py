@@ -1,9 +1,10 @@
-import yfinance as yf
 import json
 import os
 import datetime
 import pandas as pd
 
+from engine.price_store import get_price_store
+
 # [설정]
 WATCHLIST = ["TSLA", "NVDA", "AAPL", "MSFT", "AMZN", "GOOGL", "AMD", "PLTR"]
 VIX_THRESHOLD = 35.0
@@ -74,9 +75,11 @@ def analyze_technical(df, ticker):
 def run_engine():
     print(f">>> V12 Engine Running... {get_kst_time()}")
     try:
+        store = get_price_store()
+
         # 시장 데이터 (헤더용)
-        spy = yf.Ticker("SPY").history(period="5d")
-        vix = yf.Ticker("^VIX").history(period="5d")
+        spy = store.load("SPY", period="5d")
+        vix = store.load("^VIX", period="5d")
         spy_price = round(spy['Close'].iloc[-1], 2)
         vix_price = round(vix['Close'].iloc[-1], 2)
         
@@ -86,12 +89,11 @@ def run_engine():
 
         # 개별 종목 분석
         reports = []
-        tickers = " ".join(WATCHLIST)
-        data = yf.download(tickers, period="1mo", group_by='ticker', progress=False)
+        data = store.load_many(WATCHLIST, period="1mo")
         
         for symbol in WATCHLIST:
             try:
-                if not data[symbol].empty:
+                if symbol in data and not data[symbol].empty:
                     report = analyze_technical(data[symbol], symbol)
                     reports.append(report)
             except: pass
@@ -104,4 +106,5 @@ def run_engine():
         print(f"[ERROR] {e}")
 
 if __name__ == "__main__":
+    # 실행: python -m engine.v12_scanner (repo root)
     run_engine()
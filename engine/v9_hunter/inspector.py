@@ -4,30 +4,19 @@ import json
 import requests
 from datetime import datetime
 
+from engine.providers.json_extract import extract_json
+from engine.providers.model_registry import get_model_registry, is_model_unavailable
+
 class NewsInspector:
     def __init__(self):
         self.api_key = os.environ.get("GEMINI_API_KEY")
         self.base_url = "https://generativelanguage.googleapis.com/v1beta"
+        self.model_name = None
         self.model_endpoint = None
 
     def get_working_model(self):
-        try:
-            url = f"{self.base_url}/models?key={self.api_key}"
-            response = requests.get(url)
-            if response.status_code != 200: return None
-            
-            models = response.json().get("models", [])
-            candidates = [m for m in models if "generateContent" in m.get("supportedGenerationMethods", [])]
-            
-            # 우선순위: Flash -> Pro -> 아무거나
-            for m in candidates:
-                if "gemini-1.5-flash" in m["name"]: return m["name"]
-            for m in candidates:
-                if "gemini-pro" in m["name"]: return m["name"]
-            if candidates: return candidates[0]["name"]
-            return None
-        except:
-            return None
+        # 공유 model registry (디스크 캐시 / 건강도 순) → 시작 시 /models 조회 없음
+        return get_model_registry("gemini").resolve()
 
     def analyze(self, symbol, news_list):
         if not news_list:
@@ -37,11 +26,12 @@ class NewsInspector:
             model_name = self.get_working_model()
             if model_name:
                 print(f"   🤖 Found Model: {model_name}")
+                self.model_name = model_name
                 self.model_endpoint = f"{self.base_url}/{model_name}:generateContent"
             else:
                 return {"symbol": symbol, "action": "WATCH", "risk_level": "ERROR", "thesis": {"summary": "No AI Model Found"}}
 
-        news_text = "\n".join([f"- {n["title"]}" for n in news_list[:3]])
+        news_text = "\n".join([f"- {n['title']}" for n in news_list[:3]])
         
         # JSON 요청 생성
         payload = {
@@ -52,16 +42,27 @@ class NewsInspector:
             }]
         }
 
+        registry = get_model_registry("gemini")
         try:
-            response = requests.post(
-                f"{self.model_endpoint}?key={self.api_key}",
-                headers={"Content-Type": "application/json"},
-                json=payload
-            )
+            # 모델 폐기 / 미지원(404) → 실패 기록 후 같은 호출 안에서 다음 후보 재시도
+            for model_name in registry.attempts(self.model_name):
+                self.model_name = model_name
+                self.model_endpoint = f"{self.base_url}/{model_name}:generateContent"
+                response = requests.post(
+                    f"{self.model_endpoint}?key={self.api_key}",
+                    headers={"Content-Type": "application/json"},
+                    json=payload
+                )
+                if not is_model_unavailable(response.status_code, response.text):
+                    break
+                registry.report_failure(model_name)
+                self.model_endpoint = None
             result = response.json()
             raw = result["candidates"][0]["content"]["parts"][0]["text"]
-            clean = raw.replace("```json", "").replace("```", "").strip()
-            data = json.loads(clean)
+            registry.report_success(self.model_name)
+            data = extract_json(raw)
+            if data is None:
+                raise ValueError("JSON_PARSE_ERROR")
             
             return {
                 "symbol": symbol,
@@ -72,4 +73,4 @@ class NewsInspector:
                 "last_updated": datetime.now().strftime("%H:%M")
             }
         except:
-            return {"symbol": symbol, "action": "WATCH", "risk_level": "ERROR", "thesis": {"summary": f"News: {news_list[0]["title"]}"}}
+            return {"symbol": symbol, "action": "WATCH", "risk_level": "ERROR", "thesis": {"summary": f"News: {news_list[0]['title']}"}}
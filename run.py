@@ -36,6 +36,9 @@ except ImportError:
     subprocess.check_call([sys.executable, "-m", "pip", "install", "deep-translator"])
     from deep_translator import GoogleTranslator
 
+# 공용 OHLCV 저장소 (누락 구간만 네트워크 요청)
+from engine.price_store import get_price_store, period_start
+
 # 전역 설정
 TRANSLATION_CACHE = {}
 PIPELINE_STATS = {
@@ -62,6 +65,15 @@ G2_MAX_REC_60 = 0.98
 G3_MAX_DD_252 = -12.0
 CUTOFF_SCORE = 40
 
+# 📦 Funnel Mode: 1Y 일봉을 종목당 1회만 받고 Gate 1~3은 메모리 패널 슬라이스로 처리
+FUNNEL_MODE = os.getenv("SNIPER_FUNNEL_MODE", "1") == "1"
+FUNNEL_PERIOD = "1y"
+PRICE_PANEL = {}
+WIDE_PANEL = {}
+# 거래일 기준 period (yf.download(period="5d") = 최근 5 거래일): 종목별 마지막 N개 유효 봉, 조회 구간은 lookback
+SESSION_PERIODS = {"5d": 5}
+SESSION_LOOKBACK = "1mo"
+
 ETF_LIST = ["TQQQ", "SQQQ", "SOXL", "SOXS", "TSLL", "NVDL", "LABU", "LABD", "UVXY", "SPY", "QQQ", "IWM"]
 CORE_WATCHLIST = [
     "DKNG", "PLTR", "SOFI", "AFRM", "UPST", "OPEN", "LCID", "RIVN", "ROKU", "SQ",
@@ -98,10 +110,39 @@ def fetch_us_market_symbols():
         except: continue
     return list(symbols)
 
+def load_frames(symbols, period):
+    """
+    Gate 공용 데이터 접근
+    - Funnel: FUNNEL_PERIOD 패널을 한 번 채운 뒤 period 구간만 잘라서 반환 (CPU only)
+    - 일반: 저장소에서 period 구간 조회
+    - SESSION_PERIODS("5d"): 달력 cutoff 대신 종목별 마지막 N개 유효 봉 (주말 / 휴장일 포함 시에도 N 거래일)
+    """
+    sessions = SESSION_PERIODS.get(period)
+    if not FUNNEL_MODE:
+        frames = get_price_store().load_many(symbols, period=SESSION_LOOKBACK if sessions else period)
+        return {sym: last_sessions(df, sessions) for sym, df in frames.items()} if sessions else frames
+
+    missing = [s for s in symbols if s not in PRICE_PANEL]
+    if missing:
+        PRICE_PANEL.update(get_price_store().load_many(missing, period=FUNNEL_PERIOD))
+
+    cutoff = period_start(period)
+    frames = {}
+    for sym in symbols:
+        df = PRICE_PANEL.get(sym)
+        if df is not None:
+            frames[sym] = last_sessions(df, sessions) if sessions else df[df.index >= cutoff]
+    return frames
+
+def last_sessions(df, n):
+    """OHLCV 모두 존재하는 마지막 n개 봉"""
+    return df.dropna(subset=["Open", "High", "Low", "Close", "Volume"]).iloc[-n:]
+
 def build_initial_universe():
     candidates = fetch_us_market_symbols()
     candidates = list(set(candidates + CORE_WATCHLIST))
     print_status(f"   📋 Raw Pool: {len(candidates)}개 -> 유동성 타겟 {TARGET_LIQUID_COUNT}개 확보 시작")
+    if FUNNEL_MODE: print_status(f"   📦 Funnel Mode: {FUNNEL_PERIOD} 일괄 수집 -> Gate 1~3 메모리 패널 공유")
     
     scan_pool = list(set(candidates) - set(CORE_WATCHLIST))
     random.shuffle(scan_pool)
@@ -109,11 +150,11 @@ def build_initial_universe():
     
     # Core Scan
     try:
-        core_data = yf.download(CORE_WATCHLIST, period="5d", group_by='ticker', threads=True, progress=False)
+        core_data = load_frames(CORE_WATCHLIST, "5d")
         for sym in CORE_WATCHLIST:
             try:
-                df = core_data[sym] if len(CORE_WATCHLIST) > 1 else core_data
-                if not df.empty:
+                df = core_data.get(sym)
+                if df is not None and not df.empty:
                     avg = (df['Close'] * df['Volume']).mean()
                     liquidity_scores.append((sym, avg))
             except: pass
@@ -127,20 +168,13 @@ def build_initial_universe():
         pool_idx += chunk_size
         if not chunk: break
         try:
-            data = yf.download(chunk, period="5d", group_by='ticker', threads=True, progress=False)
-            if isinstance(data.columns, pd.MultiIndex):
-                valid_cols = set(data.columns.get_level_values(0))
-                for sym in chunk:
-                    if sym in valid_cols:
-                        df = data[sym]
-                        if not df.empty:
-                            avg = (df['Close'] * df['Volume']).mean()
-                            if pd.isna(avg): avg = 0
-                            liquidity_scores.append((sym, avg))
-            else:
-                if not data.empty and len(chunk) == 1:
-                    avg = (data['Close'] * data['Volume']).mean()
-                    liquidity_scores.append((chunk[0], avg))
+            data = load_frames(chunk, "5d")
+            for sym in chunk:
+                df = data.get(sym)
+                if df is not None and not df.empty:
+                    avg = (df['Close'] * df['Volume']).mean()
+                    if pd.isna(avg): avg = 0
+                    liquidity_scores.append((sym, avg))
         except: continue
         print(f"   ⚖️ Secured: {len(liquidity_scores)} / {TARGET_LIQUID_COUNT} (Scanned {pool_idx})", end="\r")
 
@@ -157,63 +191,95 @@ def build_initial_universe():
 # ==========================================
 # 2. Gate Engines
 # ==========================================
+PANEL_FIELDS = ["Open", "High", "Low", "Close", "Volume"]
+
+def build_wide_panel(frames, universe):
+    """
+    종목별 OHLCV dict -> date x symbol 2D 배열 패널
+    - 행: 전 종목 날짜 합집합 (오름차순, panel["Date"]), 열: universe 순서
+    - 해당 날짜에 봉이 없으면 NaN
+    """
+    syms = [s for s in universe if s in frames and not frames[s].empty]
+    if not syms: return [], {}
+
+    dates = np.unique(np.concatenate([frames[s].index.values for s in syms]))
+    panel = {f: np.full((len(dates), len(syms)), np.nan) for f in PANEL_FIELDS}
+    for j, sym in enumerate(syms):
+        df = frames[sym]
+        rows = np.searchsorted(dates, df.index.values)
+        # 컬럼 재선택(df[cols])은 to_numpy 대비 수십 배 느림 -> 이미 정렬된 경우 생략
+        values = (df if list(df.columns) == PANEL_FIELDS else df[PANEL_FIELDS]).to_numpy(dtype=float)
+        for k, f in enumerate(PANEL_FIELDS):
+            panel[f][rows, j] = values[:, k]
+    panel["Date"] = dates
+    return syms, panel
+
+def load_panel(universe, period):
+    """
+    Gate 1/2용 패널
+    - Funnel: PRICE_PANEL 전체를 한 번만 wide 배열로 만들고 날짜 행 / 종목 열만 선택
+    - 일반: period 구간 frame으로 바로 구성
+    - SESSION_PERIODS("5d"): lookback 행 중 종목별 마지막 N개 유효 봉만 남기고 나머지는 NaN
+    """
+    if not FUNNEL_MODE:
+        return build_wide_panel(load_frames(universe, period), universe)
+
+    missing = [s for s in universe if s not in PRICE_PANEL]
+    if missing:
+        PRICE_PANEL.update(get_price_store().load_many(missing, period=FUNNEL_PERIOD))
+    if WIDE_PANEL.get("size") != len(PRICE_PANEL):
+        all_syms, full = build_wide_panel(PRICE_PANEL, list(PRICE_PANEL))
+        WIDE_PANEL.update({"size": len(PRICE_PANEL), "col": {s: j for j, s in enumerate(all_syms)}, "panel": full})
+
+    col, full = WIDE_PANEL["col"], WIDE_PANEL["panel"]
+    syms = [s for s in universe if s in col]
+    if not syms: return [], {}
+
+    sessions = SESSION_PERIODS.get(period)
+    rows = full["Date"] >= np.datetime64(period_start(SESSION_LOOKBACK if sessions else period))
+    cols = np.array([col[s] for s in syms])
+    panel = {f: full[f][rows][:, cols] for f in PANEL_FIELDS}
+    if sessions:
+        valid = ~np.isnan(np.stack([panel[f] for f in PANEL_FIELDS])).any(axis=0)
+        keep = valid & (np.cumsum(valid[::-1], axis=0)[::-1] <= sessions)
+        panel = {f: np.where(keep, panel[f], np.nan) for f in PANEL_FIELDS}
+    panel["Date"] = full["Date"][rows]
+    return syms, panel
+
+def gate_1_mask(panel):
+    # 5D 평균가 / 평균 거래대금 (결측 제외 평균)
+    close, vol = panel["Close"], panel["Volume"]
+    with np.errstate(all="ignore"):
+        mean_price = np.nanmean(close, axis=0)
+        mean_dol_vol = np.nanmean(close * vol, axis=0)
+    return (mean_price >= G1_MIN_PRICE) & (mean_dol_vol >= G1_MIN_DOL_VOL)
+
+def gate_2_mask(panel):
+    # OHLCV 모두 존재하는 봉만 유효 (= 종목별 dropna)
+    valid = ~np.isnan(np.stack([panel[f] for f in PANEL_FIELDS])).any(axis=0)
+    n_dates, n_syms = valid.shape
+
+    high_60 = np.where(valid, panel["High"], -np.inf).max(axis=0)
+    last_row = n_dates - 1 - np.argmax(valid[::-1], axis=0)
+    cur_price = panel["Close"][last_row, np.arange(n_syms)]
+
+    with np.errstate(all="ignore"):
+        dd_60 = ((cur_price - high_60) / high_60) * 100
+        rec_ratio = cur_price / high_60
+    return (valid.sum(axis=0) >= 40) & (high_60 != 0) & ((dd_60 <= G2_MIN_DD_60) | (rec_ratio <= G2_MAX_REC_60))
+
 def apply_gate_1_light(universe):
     print_status("🛡️ [Gate 1] Price/Vol Check (5D)...")
-    survivors = []
-    batch_size = 100
-    for i in range(0, len(universe), batch_size):
-        batch = universe[i:i+batch_size]
-        try:
-            data = yf.download(batch, period="5d", group_by='ticker', threads=True, progress=False)
-            present_tickers = []
-            if isinstance(data.columns, pd.MultiIndex): present_tickers = set(data.columns.get_level_values(0))
-            elif not data.empty: present_tickers = batch 
-            
-            if isinstance(data.columns, pd.MultiIndex):
-                for sym in batch:
-                    if sym in present_tickers:
-                        df = data[sym]
-                        if df.empty: continue
-                        if df['Close'].mean() >= G1_MIN_PRICE and (df['Close']*df['Volume']).mean() >= G1_MIN_DOL_VOL:
-                            survivors.append(sym)
-            else:
-                if not data.empty and len(batch) == 1:
-                    if data['Close'].mean() >= G1_MIN_PRICE and (data['Close']*data['Volume']).mean() >= G1_MIN_DOL_VOL:
-                        survivors.append(batch[0])
-        except: continue
+    syms, panel = load_panel(universe, "5d")
+    survivors = [s for s, ok in zip(syms, gate_1_mask(panel)) if ok] if syms else []
     PIPELINE_STATS["gate1_pass"] = len(survivors)
     print(f"   ➡️ Gate 1 Passed: {len(survivors)}")
     return survivors
 
 def apply_gate_2_fast_tech(universe):
     print_status("🛡️ [Gate 2] Fast Technical (60D)...")
-    survivors = []
-    batch_size = 100
-    for i in range(0, len(universe), batch_size):
-        batch = universe[i:i+batch_size]
-        try:
-            data = yf.download(batch, period="60d", group_by='ticker', threads=True, progress=False)
-            present_tickers = set()
-            if isinstance(data.columns, pd.MultiIndex): present_tickers = set(data.columns.get_level_values(0))
-            iter_list = batch if isinstance(data.columns, pd.MultiIndex) else ([batch[0]] if len(batch)==1 else [])
-
-            for sym in iter_list:
-                try:
-                    if isinstance(data.columns, pd.MultiIndex):
-                        if sym not in present_tickers: continue
-                        df = data[sym].copy().dropna()
-                    else: df = data.copy().dropna()
-
-                    if len(df) < 40: continue
-                    high_60 = df['High'].max()
-                    cur_price = df['Close'].iloc[-1]
-                    if high_60 == 0: continue
-                    dd_60 = ((cur_price - high_60) / high_60) * 100
-                    rec_ratio = cur_price / high_60
-                    if dd_60 <= G2_MIN_DD_60 or rec_ratio <= G2_MAX_REC_60:
-                        survivors.append(sym)
-                except: continue
-        except: continue
+    syms, panel = load_panel(universe, "60d")
+    survivors = [s for s, ok in zip(syms, gate_2_mask(panel)) if ok] if syms else []
     PIPELINE_STATS["gate2_pass"] = len(survivors)
     print(f"   ➡️ Gate 2 Passed: {len(survivors)}")
     return survivors
@@ -385,17 +451,12 @@ def apply_gate_3_and_rib(universe):
     for i in range(0, len(universe), batch_size):
         batch = universe[i:i+batch_size]
         try:
-            data = yf.download(batch, period="1y", group_by='ticker', threads=True, progress=False)
-            present_tickers = set()
-            if isinstance(data.columns, pd.MultiIndex): present_tickers = set(data.columns.get_level_values(0))
-            iter_list = batch if isinstance(data.columns, pd.MultiIndex) else ([batch[0]] if len(batch)==1 else [])
+            data = load_frames(batch, "1y")
 
-            for sym in iter_list:
+            for sym in batch:
                 try:
-                    if isinstance(data.columns, pd.MultiIndex):
-                        if sym not in present_tickers: continue
-                        df = data[sym].copy().dropna()
-                    else: df = data.copy().dropna()
+                    if sym not in data: continue
+                    df = data[sym].dropna()
                     
                     if len(df) < 200: continue 
                     high_252 = df['High'].max()
@@ -1,8 +1,12 @@
 import os
+import sys
 import time
 import shutil
 from datetime import datetime, timedelta
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from engine.cache_backends import FileCacheBackend, SQLiteCacheBackend
+
 def cleanup_files(directory, days_limit):
     if not os.path.exists(directory):
         return
@@ -37,6 +41,27 @@ def cleanup_files(directory, days_limit):
     if deleted_count > 0:
         print(f"   🗑️  Deleted {deleted_count} old files in {directory}")
 
+def cleanup_cache(cache_root, days_limit):
+    """
+    LLM 캐시 정리: backend별 일괄 purge
+    - file   : 날짜 디렉토리 순회
+    - sqlite : cached_at_ts 인덱스 DELETE 1회 (파일 트리 순회 없음)
+    """
+    cutoff = time.time() - (days_limit * 86400)
+    print(f"🧹 [CLEANUP] Purging cache {cache_root} (Limit: {days_limit} days)...")
+
+    deleted_count = FileCacheBackend(cache_root).purge(cutoff)
+
+    if os.path.exists(os.path.join(cache_root, SQLiteCacheBackend.DB_NAME)):
+        backend = SQLiteCacheBackend(cache_root)
+        try:
+            deleted_count += backend.purge(cutoff)
+        finally:
+            backend.close()
+
+    if deleted_count > 0:
+        print(f"   🗑️  Deleted {deleted_count} old cache entries in {cache_root}")
+
 def main():
     base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     data_dir = os.path.join(base_dir, "data")
@@ -46,7 +71,7 @@ def main():
     # Out: 30 days
     # Metrics: 90 days
     
-    cleanup_files(os.path.join(data_dir, "cache"), 7)
+    cleanup_cache(os.path.join(data_dir, "cache"), 7)
     cleanup_files(os.path.join(data_dir, "out"), 30)
     cleanup_files(os.path.join(data_dir, "metrics"), 90)
 
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Batch Prefetch (장 시작 전 가격 저장소 예열)
+- 대상: run_batch_cli 종목 (--universe 시 load_universe() 종목 추가)
+- batch가 읽는 저장소/구간만 예열: adjusted 6mo (IntelEngine → intel_data_connector)
+- CI: 별도 이른 schedule에서 실행 후 data/prices를 actions/cache로 batch job에 전달
+- 리포트 (cold fetch vs warm read 실측): data/metrics/<date>/prefetch_<time>.json
+
+실행: python -m scripts.prefetch (repo root)
+"""
+
+import os
+import json
+import time
+import argparse
+import logging
+from datetime import datetime
+
+from engine.price_store import get_price_store
+from engine.strike.universe import load_universe
+from scripts.run_batch_cli import BATCH_SYMBOLS
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("PREFETCH")
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def planned_symbols(include_universe=False):
+    """run_batch_cli 종목 (+ 선택: universe)"""
+    symbols = list(BATCH_SYMBOLS)
+    if include_universe:
+        try:
+            symbols += load_universe()
+        except Exception as e:
+            logger.warning(f"Universe load failed, batch symbols only: {e}")
+    return list(dict.fromkeys(s.strip().upper() for s in symbols if s.strip()))
+
+
+def prefetch_prices(symbols, period="6mo", auto_adjust=True):
+    """
+    누락 구간만 다운로드 후 같은 요청을 저장소에서 다시 읽어 cold / warm 시간 실측
+    """
+    store = get_price_store(auto_adjust=auto_adjust)
+    cold = store.pending(symbols, period=period)
+
+    start = time.time()
+    frames = store.load_many(symbols, period=period)
+    cold_sec = time.time() - start
+
+    start = time.time()
+    store.load_many(symbols, period=period)
+    warm_sec = time.time() - start
+
+    return {
+        "store": "adj" if auto_adjust else "raw",
+        "period": period,
+        "symbols": len(symbols),
+        "already_warm": len(symbols) - len(cold),
+        "warmed": len([s for s in cold if s in frames]),
+        "failed": sorted(s for s in symbols if s not in frames),
+        "cold_sec": round(cold_sec, 3),
+        "warm_sec": round(warm_sec, 3),
+    }
+
+
+def write_report(report):
+    now = datetime.now()
+    day_dir = os.path.join(BASE_DIR, "data", "metrics", now.strftime("%Y-%m-%d"))
+    os.makedirs(day_dir, exist_ok=True)
+    path = os.path.join(day_dir, f"prefetch_{now.strftime('%H%M%S')}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    return path
+
+
+def main():
+    p = argparse.ArgumentParser(description="Warm the price store before the scheduled batch")
+    p.add_argument("--period", default="6mo", help="adjusted price period read by the batch")
+    p.add_argument("--raw-period", default="", help="also warm the raw (strike) store for this period")
+    p.add_argument("--universe", action="store_true", help="also warm load_universe() symbols")
+    args = p.parse_args()
+
+    symbols = planned_symbols(args.universe)
+    logger.info(f"🔥 Prefetch | Symbols={len(symbols)}")
+
+    report = {"started_at": datetime.now().isoformat(), "symbols": len(symbols), "prices": []}
+    report["prices"].append(prefetch_prices(symbols, period=args.period, auto_adjust=True))
+    if args.raw_period:
+        report["prices"].append(prefetch_prices(symbols, period=args.raw_period, auto_adjust=False))
+    path = write_report(report)
+
+    print("\n" + "=" * 50)
+    print("🔥 PREFETCH REPORT")
+    print("=" * 50)
+    for r in report["prices"]:
+        print(f"Prices[{r['store']}/{r['period']}] : warmed={r['warmed']} already={r['already_warm']} "
+              f"failed={len(r['failed'])} (cold {r['cold_sec']}s / warm {r['warm_sec']}s)")
+    print(f"Report             : {path}")
+    print("=" * 50 + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,15 +6,17 @@ from scripts.run_sniper import run_sniper_batch
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("SNIPER")
 
+BATCH_SYMBOLS = [
+    "AAPL", "MSFT", "NVDA", "AMZN", "META",
+    "TSLA", "AMD", "AVGO", "GOOGL",
+    "JPM", "BAC",
+    "XOM", "CVX",
+    "UNH", "LLY",
+    "COST", "WMT"
+]
+
 def main():
-    symbols = [
-        "AAPL", "MSFT", "NVDA", "AMZN", "META",
-        "TSLA", "AMD", "AVGO", "GOOGL",
-        "JPM", "BAC",
-        "XOM", "CVX",
-        "UNH", "LLY",
-        "COST", "WMT"
-    ]
+    symbols = list(BATCH_SYMBOLS)
 
     logger.info(f"🚀 Phase-6B Structure Engine | Symbols={len(symbols)}")
 
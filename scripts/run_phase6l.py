@@ -8,9 +8,9 @@ sys.path.append(os.getcwd())
 
 from engine.strike_battle.universe import load_universe
 from engine.strike_battle.data_loader import load_price_data
-from engine.strike_battle.indicators import compute_features_for_date
-from engine.strike_battle.engine_chimera import select_chimera
-from engine.strike_battle.backtest_chimera import _calc_real_return, RealTradeRule
+from engine.strike_battle.indicators import precompute_features, build_feature_tensor
+from engine.strike_battle.engine_chimera import select_chimera_batch
+from engine.strike_battle.backtest_chimera import simulate_real_returns, RealTradeRule
 
 def main():
     p = argparse.ArgumentParser()
@@ -27,7 +27,7 @@ def main():
         df = load_price_data(s)
         if df is not None:
             if df.index.tz is not None: df.index = df.index.tz_localize(None)
-            data[s] = df
+            data[s] = precompute_features(df)
         
     if not data: return
 
@@ -37,17 +37,15 @@ def main():
     trades = []
     rule = RealTradeRule()
     
-    for day in all_dates:
-        feats = []
-        for s in list(data.keys()):
-            f = compute_features_for_date(s, data[s], day)
-            if f: feats.append(f)
-        
-        hits = select_chimera(feats)
-        for h in hits:
-            res = _calc_real_return(data[h["symbol"]], pd.Timestamp(h["date"]), rule)
-            h.update(res)
-            trades.append(h)
+    # 전 기간 date x symbol 텐서에서 일별 선정을 한 번에 계산
+    daily_hits = select_chimera_batch(build_feature_tensor(data, all_dates))
+    for hits in daily_hits:
+        trades.extend(hits)
+
+    # 전체 체결을 한 번에 시뮬레이션
+    results = simulate_real_returns(data, [(h["symbol"], pd.Timestamp(h["date"])) for h in trades], rule)
+    for h, res in zip(trades, results):
+        h.update(res)
             
     if not trades:
         print("No trades.")
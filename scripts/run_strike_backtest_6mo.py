@@ -3,11 +3,12 @@ from __future__ import annotations
 from datetime import datetime, timedelta, timezone
 from typing import Dict, Any, List, Tuple
 
+import numpy as np
 import pandas as pd
 
 from engine.strike.universe import load_universe
-from engine.strike.data_loader import load_price_data_range
-from engine.strike.strike_logic import is_strike_candidate
+from engine.strike.data_loader import load_price_data_many
+from engine.strike.strike_logic import is_strike_candidate_series
 
 
 def _utc_today_date() -> datetime:
@@ -43,37 +44,33 @@ def main():
     fired_days: List[Dict[str, Any]] = []
     total_days = 0
 
-    # For speed: we run day-by-day but reuse the same downloaded frame per symbol per day window.
-    # This is intentionally brute-force v1; performance tuning is Phase-6H.
-    for (start, end) in windows:
-        day = (end - pd.Timedelta(days=1)).date().isoformat()
-        hits = 0
+    # 전체 구간(첫 window 시작 ~ 마지막 window 끝)을 종목당 1회만 로드
+    history = load_price_data_many(symbols, start_end=(windows[0][0], windows[-1][1]))
 
-        for sym in symbols:
-            df = load_price_data_range(sym, start_end=(start, end))
-            if df is None or df.empty:
-                continue
+    # window별 기준일 / 시작일
+    days = pd.DatetimeIndex([(end - pd.Timedelta(days=1)).normalize() for (_, end) in windows])
+    starts = pd.DatetimeIndex([start for (start, _) in windows])
+    hits = np.zeros(len(windows), dtype=int)
 
-            # keep only up to that day (end is next day already)
-            # df index is datetime-like; slice safe
-            df2 = df.loc[:pd.Timestamp(day)]
-            if df2 is None or df2.empty:
-                continue
+    for sym in symbols:
+        df = history.get(sym.strip().upper())
+        if df is None:
+            continue
 
-            try:
-                setattr(df2, "_strike_symbol", sym)
-            except Exception:
-                pass
-
-            hit = is_strike_candidate(df2)
-            if hit:
-                hits += 1
+        # 전체 이력 Strike 신호 1회 계산 후, 각 기준일의 마지막 봉(window 안)을 조회
+        strike = is_strike_candidate_series(df).to_numpy()
+        pos = df.index.searchsorted(days, side="right") - 1
+        ok = pos >= 0
+        ok[ok] = (df.index[pos[ok]] >= starts[ok]) & strike[pos[ok]]
+        hits += ok
 
+    for day_ts, day_hits in zip(days, hits):
+        day = day_ts.date().isoformat()
         total_days += 1
-        if hits > 0:
-            fired_days.append({"date": day, "hits": hits})
+        if day_hits > 0:
+            fired_days.append({"date": day, "hits": int(day_hits)})
 
-        print(f"{day} | hits={hits}")
+        print(f"{day} | hits={day_hits}")
 
     print("\n=== Strike Fired Days (last ~6mo) ===")
     if not fired_days:
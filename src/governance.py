@@ -1,3 +1,4 @@
+import os
 import logging
 import time
 import json
@@ -5,6 +6,8 @@ from datetime import datetime
 from dataclasses import dataclass
 from enum import Enum
 
+from src.rate_limiter import RateLimiterRegistry
+
 
 class SystemStatus(Enum):
     GREEN = "NORMAL"      # 정상 (1.0x Delay)
@@ -17,7 +20,8 @@ class SafetyLimits:
     MAX_DAILY_COST: float = 2.0
     COST_WARNING_THRESHOLD: float = 0.7
     MAX_CONSECUTIVE_ERRORS: int = 5
-    MIN_INTERVAL_SEC: float = 1.0
+    MIN_INTERVAL_SEC: float = 1.0      # 평균 호출 간격 (token bucket rate = 1 / MIN_INTERVAL_SEC)
+    BURST_SIZE: int = 5                # 연속 허용 호출 수 (동시 worker가 quota를 즉시 사용)
 
     # Gemini 비용 (보수적)
     COST_PER_1M_INPUT_TOKENS: float = 0.10
@@ -25,10 +29,23 @@ class SafetyLimits:
 
 
 class GovernanceManager:
-    def __init__(self, limits: SafetyLimits = SafetyLimits()):
+    DEFAULT_PROVIDER = "gemini"
+    DEFAULT_MODEL = "default"
+
+    def __init__(self, limits: SafetyLimits = SafetyLimits(), rate_state_dir: str = None):
         self.limits = limits
         self.current_status = SystemStatus.GREEN
 
+        # provider / model 별 token bucket (state/ratelimit/ 공유 → 스레드 / 프로세스 간 동일 quota)
+        if rate_state_dir is None:
+            base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+            rate_state_dir = os.path.join(base_dir, "state", "ratelimit")
+        self.rate_limiters = RateLimiterRegistry(
+            default_rate_per_sec=1.0 / limits.MIN_INTERVAL_SEC,
+            default_burst=limits.BURST_SIZE,
+            state_dir=rate_state_dir,
+        )
+
         self.total_cost = 0.0
         self.consecutive_errors = 0
         self.total_requests = 0
@@ -83,15 +100,16 @@ class GovernanceManager:
     # -------------------------
     # Throttling
     # -------------------------
-    def wait_for_slot(self):
-        elapsed = time.time() - self.last_call_time
-        base_interval = self.limits.MIN_INTERVAL_SEC
+    def _slot_cost(self) -> float:
+        # YELLOW: 호출당 token 2개 소모 = 평균 간격 2배 (Soft Throttle)
+        return 2.0 if self.current_status == SystemStatus.YELLOW else 1.0
 
-        if self.current_status == SystemStatus.YELLOW:
-            base_interval *= 2.0
+    def wait_for_slot(self, provider: str = DEFAULT_PROVIDER, model: str = DEFAULT_MODEL) -> float:
+        """반환: 대기한 초"""
+        return self.rate_limiters.bucket(provider, model).acquire(self._slot_cost())
 
-        if elapsed < base_interval:
-            time.sleep(base_interval - elapsed)
+    async def wait_for_slot_async(self, provider: str = DEFAULT_PROVIDER, model: str = DEFAULT_MODEL) -> float:
+        return await self.rate_limiters.bucket(provider, model).acquire_async(self._slot_cost())
 
     # -------------------------
     # Success / Failure
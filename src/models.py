@@ -28,13 +28,16 @@ class AnalysisRequest(BaseModel):
 # Output Contract
 # ==========================
 
-class StrategyOutput(BaseModel):
+class LLMStrategyOutput(BaseModel):
+    """LLM이 직접 생성하는 필드 (응답 JSON 검증용)"""
     decision: str
     score: int
     confidence: float
     reasoning: str
     trading_plan: Dict[str, str]
 
+
+class StrategyOutput(LLMStrategyOutput):
     # --- Quant Injected Fields ---
     structure_state: str
     price_signal: bool
@@ -0,0 +1,106 @@
+import os
+import re
+import time
+import fcntl
+import struct
+import asyncio
+import threading
+
+
+class TokenBucket:
+    """
+    Token bucket (GCRA: 다음 허용 시각 1개만 저장)
+    - rate_per_sec: 평균 허용률 / burst: 연속 허용 가능 수
+    - state_file 지정 시 fcntl lock 으로 프로세스 간 공유, 없으면 프로세스 내부 전용
+    - reserve(): 대기 없이 slot 예약 후 대기 시간 반환 → 예약 순서대로 허용 (재시도 경쟁 없음)
+    """
+
+    _RECORD = struct.Struct("d")  # theoretical arrival time (epoch sec)
+
+    def __init__(self, rate_per_sec: float, burst: int = 1, state_file: str = None):
+        if rate_per_sec <= 0:
+            raise ValueError("rate_per_sec must be positive")
+        self.rate_per_sec = rate_per_sec
+        self.burst = max(1, int(burst))
+        self.state_file = state_file
+        self._lock = threading.Lock()
+        self._tat = 0.0
+
+        if state_file:
+            os.makedirs(os.path.dirname(state_file), exist_ok=True)
+
+    @property
+    def interval(self) -> float:
+        return 1.0 / self.rate_per_sec
+
+    def reserve(self, tokens: float = 1.0) -> float:
+        """tokens 만큼 예약 → 반환: 사용 전 대기할 초"""
+        with self._lock:
+            if not self.state_file:
+                wait, self._tat = self._advance(self._tat, tokens, time.time())
+                return wait
+
+            fd = os.open(self.state_file, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                raw = os.pread(fd, self._RECORD.size, 0)
+                tat = self._RECORD.unpack(raw)[0] if len(raw) == self._RECORD.size else 0.0
+                wait, tat = self._advance(tat, tokens, time.time())
+                os.pwrite(fd, self._RECORD.pack(tat), 0)
+                return wait
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+                os.close(fd)
+
+    def _advance(self, tat, tokens, now):
+        # burst 구간(= burst * interval)만큼 앞당겨 허용
+        new_tat = max(tat, now) + tokens * self.interval
+        allow_at = new_tat - self.burst * self.interval
+        return max(0.0, allow_at - now), new_tat
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """동기 대기 / 반환: 실제 대기한 초"""
+        wait = self.reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self, tokens: float = 1.0) -> float:
+        """asyncio 대기 (event loop 차단 없음)"""
+        wait = self.reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+
+class RateLimiterRegistry:
+    """
+    provider / model 별 TokenBucket
+    - 상태 파일: <state_dir>/<provider>__<model>.bucket (같은 state_dir 사용 프로세스 간 공유)
+    - set_limit()으로 개별 quota 지정, 미지정 key는 기본값
+    """
+
+    def __init__(self, default_rate_per_sec: float = 1.0, default_burst: int = 1, state_dir: str = None):
+        self.default_rate_per_sec = default_rate_per_sec
+        self.default_burst = default_burst
+        self.state_dir = state_dir
+        self._limits = {}
+        self._buckets = {}
+        self._guard = threading.Lock()
+
+    def set_limit(self, provider: str, model: str, rate_per_sec: float, burst: int = 1):
+        with self._guard:
+            self._limits[(provider, model)] = (rate_per_sec, burst)
+            self._buckets.pop((provider, model), None)
+
+    def bucket(self, provider: str, model: str) -> TokenBucket:
+        key = (provider, model)
+        with self._guard:
+            if key not in self._buckets:
+                rate, burst = self._limits.get(key, (self.default_rate_per_sec, self.default_burst))
+                state_file = None
+                if self.state_dir:
+                    name = re.sub(r"[^A-Za-z0-9._-]", "_", f"{provider}__{model}")
+                    state_file = os.path.join(self.state_dir, f"{name}.bucket")
+                self._buckets[key] = TokenBucket(rate, burst, state_file=state_file)
+            return self._buckets[key]
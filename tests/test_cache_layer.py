@@ -1,22 +1,23 @@
 import sys
 import os
+import json
 import time
 import shutil
+import tempfile
+import threading
 import unittest
-from datetime import datetime
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from engine.cache import SniperCacheLayer
+from engine.cache import SniperCacheLayer, MemoryCacheTier, fingerprint_inputs
+from engine.cache_backends import SQLiteCacheBackend, FileCacheBackend
 
 class TestSniperCache(unittest.TestCase):
     def setUp(self):
         self.cache = SniperCacheLayer(ttl_minutes=0.05) # 3 seconds TTL
         self.test_symbol = "TEST_CACHE"
-        today = datetime.now().strftime("%Y-%m-%d")
-        cache_dir = os.path.join(self.cache.cache_root, today)
-        if os.path.exists(cache_dir):
-            try: shutil.rmtree(cache_dir)
-            except: pass
+        # 내용 해시 주소: 이전 실행에서 남은 동일 key 항목 제거
+        hash_key = self.cache._generate_key("gemini", "pro", self.test_symbol, "Analyze this")
+        self.cache.backend.delete(self.test_symbol, hash_key)
 
     def mock_llm_call(self):
         print("   >> [API] Calling Expensive LLM...")
@@ -53,5 +54,378 @@ class TestSniperCache(unittest.TestCase):
         except PermissionError:
             print("   ✅ Blocked correctly after TTL expiry")
 
+class TestMemoryTier(unittest.TestCase):
+    def setUp(self):
+        self.base_dir = tempfile.mkdtemp()
+        self.gatekeeper_ok = {"allowed": True}
+
+    def tearDown(self):
+        shutil.rmtree(self.base_dir, ignore_errors=True)
+
+    def test_memory_hit_skips_file_tier(self):
+        cache = SniperCacheLayer(base_dir=self.base_dir)
+        res1 = cache.resolve_request("gemini", "pro", "AAA", "p", self.gatekeeper_ok, lambda: {"v": 1})
+
+        cache.backend.get = lambda *args: self.fail("file tier read on memory hit")
+        res2 = cache.resolve_request("gemini", "pro", "AAA", "p", self.gatekeeper_ok, lambda: self.fail("LLM called"))
+        self.assertEqual(res1, res2)
+
+        # 반환값 변경이 캐시에 남지 않음
+        res2["v"] = 99
+        res3 = cache.resolve_request("gemini", "pro", "AAA", "p", self.gatekeeper_ok, lambda: self.fail("LLM called"))
+        self.assertEqual(res3, {"v": 1})
+
+        stats = cache.get_stats()
+        self.assertEqual(stats["memory"]["hit"], 2)
+        self.assertEqual(stats["file"]["write"], 1)
+
+    def test_file_hit_after_memory_eviction(self):
+        cache = SniperCacheLayer(base_dir=self.base_dir, memory_max_entries=2)
+        for sym in ("A", "B", "C"):
+            cache.resolve_request("gemini", "pro", sym, "p", self.gatekeeper_ok, lambda: {"sym": sym})
+
+        stats = cache.get_stats()
+        self.assertEqual(stats["memory"]["entries"], 2)
+        self.assertEqual(stats["memory"]["eviction"], 1)
+
+        res = cache.resolve_request("gemini", "pro", "A", "p", self.gatekeeper_ok, lambda: self.fail("LLM called"))
+        self.assertEqual(res, {"sym": "A"})
+        self.assertEqual(cache.get_stats()["file"]["hit"], 1)
+
+    def test_expired_entries_evicted_first(self):
+        tier = MemoryCacheTier(max_entries=2)
+        tier.put("old", {"x": 1}, expires_at_ts=time.time() - 1)
+        tier.put("a", {"x": 2}, expires_at_ts=time.time() + 60)
+        self.assertEqual(tier.put("b", {"x": 3}, expires_at_ts=time.time() + 60), 1)
+        self.assertIsNotNone(tier.get("a"))
+        self.assertIsNone(tier.get("old"))
+
+    def test_bytes_count_utf8(self):
+        packet = {"reason_kr": "가" * 100}
+        size = len(json.dumps(packet, ensure_ascii=False).encode("utf-8"))
+        tier = MemoryCacheTier(max_bytes=size * 2 - 1)
+        tier.put("a", packet, expires_at_ts=time.time() + 60)
+        self.assertEqual(tier.size_bytes, size)
+        self.assertEqual(tier.get("a"), packet)
+
+        self.assertEqual(tier.put("b", packet, expires_at_ts=time.time() + 60), 1)  # 2건은 bytes 상한 초과
+        self.assertEqual(len(tier), 1)
+
+
+class TestSQLiteBackend(unittest.TestCase):
+    def setUp(self):
+        self.base_dir = tempfile.mkdtemp()
+        self.gatekeeper_ok = {"allowed": True}
+
+    def tearDown(self):
+        shutil.rmtree(self.base_dir, ignore_errors=True)
+
+    def test_resolve_request_contract(self):
+        cache = SniperCacheLayer(base_dir=self.base_dir, backend="sqlite", memory_max_entries=0)
+        res1 = cache.resolve_request("gemini", "pro", "AAA", "p", self.gatekeeper_ok, lambda: {"v": 1})
+        res2 = cache.resolve_request("gemini", "pro", "AAA", "p", {"allowed": False, "reason": "KILL_SWITCH"}, lambda: self.fail("LLM called"))
+        self.assertEqual(res1, res2)
+        self.assertEqual(cache.get_stats()["sqlite"]["hit"], 1)
+        self.assertTrue(os.path.exists(os.path.join(cache.cache_root, "cache.sqlite3")))
+        self.assertEqual([d for d in os.listdir(cache.cache_root) if not d.startswith(("cache.sqlite3", ".locks"))], [])
+
+    def test_batched_write_and_purge(self):
+        backend = SQLiteCacheBackend(os.path.join(self.base_dir, "cache"))
+        now = time.time()
+        backend.put_many([
+            (f"S{i}", f"k{i}", {"meta": {"cached_at_ts": now - (i % 2) * 10 * 86400}, "payload": i})
+            for i in range(10)
+        ])
+        self.assertEqual(backend.get("S3", "k3")["payload"], 3)
+        self.assertEqual(sum(backend.index_by_day().values()), 10)
+        self.assertEqual(backend.purge(now - 7 * 86400), 5)
+        self.assertIsNone(backend.get("S3", "k3"))
+        self.assertIsNotNone(backend.get("S2", "k2"))
+        backend.close()
+
+
+class TestSingleFlight(unittest.TestCase):
+    def setUp(self):
+        self.base_dir = tempfile.mkdtemp()
+        self.calls = {"llm": 0, "gate": 0}
+        self.lock = threading.Lock()
+
+    def tearDown(self):
+        shutil.rmtree(self.base_dir, ignore_errors=True)
+
+    def slow_llm(self):
+        with self.lock:
+            self.calls["llm"] += 1
+        time.sleep(0.2)
+        return {"v": 1}
+
+    def gatekeeper(self):
+        with self.lock:
+            self.calls["gate"] += 1
+        return {"allowed": True, "reason": "OK"}
+
+    def run_concurrently(self, caches, n=8):
+        results = []
+        threads = [
+            threading.Thread(target=lambda c=caches[i % len(caches)]: results.append(
+                c.resolve_request("gemini", "pro", "AAA", "p", self.gatekeeper, self.slow_llm)))
+            for i in range(n)
+        ]
+        for t in threads: t.start()
+        for t in threads: t.join()
+        return results
+
+    def test_in_process_coalescing(self):
+        cache = SniperCacheLayer(base_dir=self.base_dir)
+        results = self.run_concurrently([cache])
+        self.assertEqual(results, [{"v": 1}] * 8)
+        self.assertEqual(self.calls, {"llm": 1, "gate": 1})
+        self.assertEqual(cache.get_stats()["single_flight"]["leader"], 1)
+
+    def test_cross_instance_coalescing(self):
+        # 인스턴스별 스레드 lock이 분리되어도 fcntl 파일 lock으로 1회 호출
+        caches = [SniperCacheLayer(base_dir=self.base_dir) for _ in range(3)]
+        results = self.run_concurrently(caches, n=6)
+        self.assertEqual(results, [{"v": 1}] * 6)
+        self.assertEqual(self.calls["llm"], 1)
+
+    def test_lock_files_removed_after_fill(self):
+        cache = SniperCacheLayer(base_dir=self.base_dir, backend="file")
+        gate = lambda: {"allowed": True, "reason": "OK"}
+        for i in range(300):
+            cache.resolve_request("gemini", "pro", f"S{i}", "p", gate, lambda: {"v": 1})
+        self.run_concurrently([SniperCacheLayer(base_dir=self.base_dir) for _ in range(3)], n=6)
+
+        shards = os.listdir(cache.lock_dir)
+        self.assertLessEqual(len(shards), 256)
+        self.assertEqual([f for d in shards for f in os.listdir(os.path.join(cache.lock_dir, d))], [])
+
+        cache.purge(older_than_days=-1)  # 전체 만료
+        self.assertEqual(sorted(os.listdir(cache.lock_dir)), sorted(shards))
+
+    def test_different_keys_on_same_shard_run_in_parallel(self):
+        cache = SniperCacheLayer(base_dir=self.base_dir)
+        shard = {}
+        for i in range(1000):
+            shard.setdefault(cache._generate_key("gemini", "pro", f"S{i}", "p")[:2], []).append(f"S{i}")
+        symbols = next(v for v in shard.values() if len(v) >= 2)[:2]
+
+        threads = [
+            threading.Thread(target=cache.resolve_request, args=("gemini", "pro", s, "p", self.gatekeeper, self.slow_llm))
+            for s in symbols
+        ]
+        start = time.monotonic()
+        for t in threads: t.start()
+        for t in threads: t.join()
+        self.assertEqual(self.calls["llm"], 2)
+        self.assertLess(time.monotonic() - start, 0.35)  # 직렬이면 0.4s
+
+
+class TestStaleWhileRevalidate(unittest.TestCase):
+    def setUp(self):
+        self.base_dir = tempfile.mkdtemp()
+        self.version = 0
+
+    def tearDown(self):
+        shutil.rmtree(self.base_dir, ignore_errors=True)
+
+    def slow_llm(self):
+        time.sleep(0.3)
+        self.version += 1
+        return {"v": self.version}
+
+    def test_stale_served_then_refreshed(self):
+        cache = SniperCacheLayer(base_dir=self.base_dir, ttl_minutes=0.01, stale_grace_minutes=1)
+        gate = lambda: {"allowed": True, "reason": "OK"}
+        self.assertEqual(cache.resolve_request("gemini", "pro", "AAA", "p", gate, self.slow_llm), {"v": 1})
+        time.sleep(0.7)  # TTL(0.6s) 경과
+
+        started = time.time()
+        stale = cache.resolve_request("gemini", "pro", "AAA", "p", gate, self.slow_llm)
+        self.assertEqual(stale, {"v": 1})
+        self.assertLess(time.time() - started, 0.2)  # LLM 지연 없이 반환
+
+        cache.wait_for_refreshes(timeout=5)
+        fresh = cache.resolve_request("gemini", "pro", "AAA", "p", lambda: self.fail("LLM gate on HIT"), self.slow_llm)
+        self.assertEqual(fresh, {"v": 2})
+        self.assertEqual(cache.get_stats()["swr"]["stale_served"], 1)
+        self.assertEqual(cache.get_stats()["swr"]["refresh_ok"], 1)
+
+    def test_refresh_respects_gatekeeper(self):
+        cache = SniperCacheLayer(base_dir=self.base_dir, ttl_minutes=0.01, stale_grace_minutes=1)
+        cache.resolve_request("gemini", "pro", "AAA", "p", {"allowed": True}, self.slow_llm)
+        time.sleep(0.7)
+
+        blocked = {"allowed": False, "reason": "DAILY_CAP_EXCEEDED"}
+        self.assertEqual(cache.resolve_request("gemini", "pro", "AAA", "p", blocked, self.slow_llm), {"v": 1})
+        cache.wait_for_refreshes(timeout=5)
+        self.assertEqual(self.version, 1)
+        self.assertEqual(cache.get_stats()["swr"]["refresh_blocked"], 1)
+
+    def test_beyond_grace_blocks_on_fresh_call(self):
+        cache = SniperCacheLayer(base_dir=self.base_dir, ttl_minutes=0.005, stale_grace_minutes=0.005)
+        cache.resolve_request("gemini", "pro", "AAA", "p", {"allowed": True}, self.slow_llm)
+        time.sleep(0.7)  # TTL + grace (0.6s) 경과
+        self.assertEqual(cache.resolve_request("gemini", "pro", "AAA", "p", {"allowed": True}, self.slow_llm), {"v": 2})
+
+
+class TestContentAddressedKeys(unittest.TestCase):
+    def setUp(self):
+        self.base_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.base_dir, ignore_errors=True)
+
+    def test_hit_across_date_rollover(self):
+        writer = SniperCacheLayer(base_dir=self.base_dir, memory_max_entries=0)
+        writer.resolve_request("gemini", "pro", "AAA", "p", {"allowed": True}, lambda: {"v": 1})
+
+        # 기록 시각을 전날 23:59로 이동 (TTL 60분 이내)
+        hash_key = writer._generate_key("gemini", "pro", "AAA", "p")
+        packet = writer.backend.get("AAA", hash_key)
+        packet["meta"]["cached_at_ts"] = time.time() - 120
+        writer.backend.put("AAA", hash_key, packet)
+
+        reader = SniperCacheLayer(base_dir=self.base_dir)
+        res = reader.resolve_request("gemini", "pro", "AAA", "p", {"allowed": False, "reason": "KILL_SWITCH"}, lambda: self.fail("LLM called"))
+        self.assertEqual(res, {"v": 1})
+
+    def test_index_and_purge(self):
+        cache = SniperCacheLayer(base_dir=self.base_dir)
+        hash_key = cache._generate_key("gemini", "pro", "OLD", "p")
+        old_ts = time.time() - 10 * 86400
+        cache.backend.put("OLD", hash_key, {"meta": {"cached_at_ts": old_ts}, "payload": {}})
+        path = cache.backend.path_for("OLD", hash_key)
+        os.utime(path, (old_ts, old_ts))
+        cache.resolve_request("gemini", "pro", "NEW", "p", {"allowed": True}, lambda: {"v": 1})
+
+        self.assertEqual(sum(cache.index_by_day().values()), 2)
+        self.assertEqual(cache.purge(older_than_days=7), 1)
+        self.assertFalse(os.path.exists(path))
+        self.assertEqual(sum(cache.index_by_day().values()), 1)
+
+
+class TestCompressionAndSizeCap(unittest.TestCase):
+    def setUp(self):
+        self.base_dir = tempfile.mkdtemp()
+        self.packet = {"meta": {"cached_at_ts": time.time()}, "payload": {"text": "분석 결과 " * 200}}
+
+    def tearDown(self):
+        shutil.rmtree(self.base_dir, ignore_errors=True)
+
+    def test_compressed_payload_roundtrip_and_legacy_read(self):
+        root = os.path.join(self.base_dir, "cache")
+        plain = FileCacheBackend(root)
+        plain.put("AAA", "aa01", self.packet)
+        packed = FileCacheBackend(root, compression="zlib")
+        packed.put("BBB", "bb01", self.packet)
+
+        self.assertEqual(packed.get("AAA", "aa01"), self.packet)  # codec 변경 전 항목
+        self.assertEqual(plain.get("BBB", "bb01"), self.packet)
+        self.assertLess(os.path.getsize(packed.path_for("BBB", "bb01")), os.path.getsize(plain.path_for("AAA", "aa01")) / 5)
+
+    def test_file_size_cap_evicts_least_recently_read(self):
+        backend = FileCacheBackend(os.path.join(self.base_dir, "cache"))
+        backend.put("S0", "k0", self.packet)
+        size = backend.footprint()["bytes"]
+        backend.max_bytes = size * 3
+
+        for i in range(1, 3):
+            backend.put(f"S{i}", f"k{i}", self.packet)
+        for i in range(3):
+            os.utime(backend.path_for(f"S{i}", f"k{i}"), (1000 + i, time.time()))
+        backend.get("S0", "k0")  # 최근 조회 → 유지
+
+        self.assertEqual(backend.put("S3", "k3", self.packet), 2)
+        self.assertIsNotNone(backend.get("S0", "k0"))
+        self.assertIsNone(backend.get("S1", "k1"))
+        self.assertEqual(backend.footprint()["entries"], 2)
+        self.assertLessEqual(backend.footprint()["bytes"], backend.max_bytes)
+
+    def test_sqlite_size_cap_and_stats_footprint(self):
+        cache = SniperCacheLayer(base_dir=self.base_dir, backend="sqlite", memory_max_entries=0, compression="zlib", max_bytes=0)
+        cache.resolve_request("gemini", "pro", "AAA", "p", {"allowed": True}, lambda: self.packet["payload"])
+        footprint = cache.get_stats()["sqlite"]
+        self.assertEqual((footprint["entries"], footprint["codec"]), (1, "zlib"))
+
+        cache.backend.max_bytes = footprint["bytes"] * 2
+        for sym in ("BBB", "CCC", "DDD"):
+            cache.resolve_request("gemini", "pro", sym, "p", {"allowed": True}, lambda: self.packet["payload"])
+        stats = cache.get_stats()["sqlite"]
+        self.assertGreater(stats["eviction"], 0)
+        self.assertLessEqual(stats["bytes"], cache.backend.max_bytes)
+        cache.backend.close()
+
+    def test_sqlite_running_total_without_full_scan(self):
+        root = os.path.join(self.base_dir, "cache")
+        SQLiteCacheBackend(root).put("AAA", "k0", self.packet)
+        backend = SQLiteCacheBackend(root, max_bytes=10 * 1024 * 1024)  # open 시 1회 집계
+
+        statements = []
+        backend._conn.set_trace_callback(statements.append)
+        backend.put("BBB", "k1", self.packet)
+        backend.put("BBB", "k1", self.packet)  # 같은 key 교체
+        backend.delete("AAA", "k0")
+        backend._conn.set_trace_callback(None)
+        self.assertFalse([sql for sql in statements if "SUM(" in sql])
+
+        self.assertEqual(backend._bytes, backend.footprint()["bytes"])
+        backend.purge(time.time() + 1)
+        self.assertEqual((backend._bytes, backend.footprint()["bytes"]), (0, 0))
+        backend.close()
+
+
+class TestInputFingerprint(unittest.TestCase):
+    def setUp(self):
+        self.base_dir = tempfile.mkdtemp()
+        self.payload = {
+            "price_bars": [
+                {"Date": "2024-01-03", "Open": 10, "High": 11, "Low": 9, "Close": 10.5, "Volume": 1000},
+                {"Date": "2024-01-02", "Open": 9, "High": 10, "Low": 8, "Close": 9.5, "Volume": 900},
+            ],
+            "news_items": [{"id": "n1", "title": "A"}, {"id": "n2", "title": "B"}],
+            "fundamentals": {"pe": "20", "sector": "Tech"},
+        }
+
+    def tearDown(self):
+        shutil.rmtree(self.base_dir, ignore_errors=True)
+
+    def test_fingerprint_canonicalization(self):
+        reordered = {
+            "fundamentals": {"sector": "Tech", "pe": "20"},
+            "news_items": list(reversed(self.payload["news_items"])),
+            "price_bars": list(reversed(self.payload["price_bars"])),
+        }
+        self.assertEqual(fingerprint_inputs("aapl", self.payload), fingerprint_inputs("AAPL ", reordered))
+
+        changed = dict(self.payload, news_items=self.payload["news_items"] + [{"id": "n3"}])
+        self.assertNotEqual(fingerprint_inputs("AAPL", self.payload), fingerprint_inputs("AAPL", changed))
+        self.assertNotEqual(fingerprint_inputs("AAPL", self.payload), fingerprint_inputs("AAPL", self.payload, template="v2"))
+
+    def test_unchanged_inputs_reuse_regardless_of_ttl(self):
+        cache = SniperCacheLayer(base_dir=self.base_dir, ttl_minutes=0.001)
+        fp = fingerprint_inputs("AAPL", self.payload)
+        res1 = cache.resolve_request("gemini", "pro", "AAPL", "prompt @ 09:00", {"allowed": True}, lambda: {"v": 1}, input_fingerprint=fp)
+        time.sleep(0.1)  # TTL 경과 + prompt 문구 변경
+
+        blocked = {"allowed": False, "reason": "KILL_SWITCH"}
+        res2 = cache.resolve_request("gemini", "pro", "AAPL", "prompt @ 10:00", blocked, lambda: self.fail("LLM called"), input_fingerprint=fp)
+        self.assertEqual(res1, res2)
+
+        fp2 = fingerprint_inputs("AAPL", dict(self.payload, fundamentals={"pe": "25"}))
+        res3 = cache.resolve_request("gemini", "pro", "AAPL", "prompt @ 10:00", {"allowed": True}, lambda: {"v": 2}, input_fingerprint=fp2)
+        self.assertEqual(res3, {"v": 2})
+        self.assertEqual(cache.get_stats()["fingerprint"], {"reuse": 1, "changed": 1, "new": 1})
+
+    def test_peek_never_calls_llm(self):
+        cache = SniperCacheLayer(base_dir=self.base_dir)
+        fp = fingerprint_inputs("AAPL", self.payload)
+        self.assertIsNone(cache.peek_request("gemini", "pro", "AAPL", "p", input_fingerprint=fp))
+
+        cache.resolve_request("gemini", "pro", "AAPL", "p", {"allowed": True}, lambda: {"v": 1}, input_fingerprint=fp)
+        self.assertEqual(cache.peek_request("gemini", "pro", "AAPL", "other prompt", input_fingerprint=fp), {"v": 1})
+        self.assertEqual(cache.peek_request("gemini", "pro", "AAPL", "p"), {"v": 1})
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -1,6 +1,8 @@
 import sys
 import os
+import json
 import shutil
+import tempfile
 import unittest
 import threading
 from datetime import datetime, timedelta
@@ -94,5 +96,98 @@ class TestLLMGatekeeper(unittest.TestCase):
         
         print("✅ [Test End] Concurrency Safe.")
 
+class TestLeasedGatekeeper(unittest.TestCase):
+    def setUp(self):
+        self.base_dir = tempfile.mkdtemp()
+        seed = LLMGatekeeper(base_dir=self.base_dir, lease_size=0)
+        state = seed._load_state()
+        state["cap_limit"] = 10
+        seed._save_state(state)
+
+    def tearDown(self):
+        shutil.rmtree(self.base_dir, ignore_errors=True)
+
+    def read_state(self):
+        return LLMGatekeeper(base_dir=self.base_dir, lease_size=0)._load_state()
+
+    def test_unused_slots_returned(self):
+        gk = LLMGatekeeper(base_dir=self.base_dir, lease_size=4)
+        with self.assertLogs("LLM_Audit", level="INFO") as logs:
+            self.assertTrue(gk.check_access("AAA")["allowed"])
+            self.assertTrue(gk.check_access("AAA")["allowed"])
+            state = self.read_state()
+            self.assertEqual((state["call_count"], state["leased"]), (4, 4))  # block 선점
+
+            gk.release()
+        state = self.read_state()
+        self.assertEqual((state["call_count"], state["leased"]), (2, 0))
+
+        # ALLOW 2건은 record 1건으로 일괄 기록
+        self.assertEqual(len(logs.records), 3)
+        events = [json.loads(line)["event"] for r in logs.records for line in r.getMessage().splitlines()]
+        self.assertEqual(events, ["LEASE", "ALLOW", "ALLOW", "LEASE_RETURN"])
+
+    def test_cap_exact_across_instances(self):
+        # 인스턴스 2개 = 프로세스 2개 (각자 lease 보유)
+        gatekeepers = [LLMGatekeeper(base_dir=self.base_dir, lease_size=3) for _ in range(2)]
+        results = []
+
+        def worker(gk):
+            for _ in range(10):
+                results.append(gk.check_access("CONC")["allowed"])
+
+        threads = [threading.Thread(target=worker, args=(gk,)) for gk in gatekeepers for _ in range(2)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(results.count(True), 10)
+        for gk in gatekeepers:
+            gk.release()
+        state = self.read_state()
+        self.assertEqual((state["call_count"], state["leased"]), (10, 0))
+
+    def test_cap_not_tripped_while_slots_leased(self):
+        holder = LLMGatekeeper(base_dir=self.base_dir, lease_size=8)
+        other = LLMGatekeeper(base_dir=self.base_dir, lease_size=0)
+        self.assertTrue(holder.check_access("AAA")["allowed"])
+        self.assertTrue(other.check_access("BBB")["allowed"])
+        self.assertTrue(other.check_access("BBB")["allowed"])
+        self.assertEqual(other.check_access("BBB")["reason"], "DAILY_CAP_LEASED")
+
+        holder.release()  # 미사용 7 slot 반환 → 다시 허용
+        self.assertTrue(other.check_access("BBB")["allowed"])
+        self.assertFalse(self.read_state()["kill_switch"])
+
+    def test_external_kill_switch_revokes_lease(self):
+        gk = LLMGatekeeper(base_dir=self.base_dir, lease_size=4)
+        self.assertTrue(gk.check_access("AAA")["allowed"])
+
+        # 수동 kill switch (다른 프로세스)
+        admin = LLMGatekeeper(base_dir=self.base_dir, lease_size=0)
+        state = admin._load_state()
+        state["kill_switch"] = True
+        admin._save_state(state)
+
+        self.assertEqual(gk.check_access("AAA")["reason"], "KILL_SWITCH_ACTIVE")
+        state = self.read_state()
+        self.assertEqual((state["call_count"], state["leased"]), (1, 0))  # 미사용 3 slot 반환
+
+    def test_dead_holder_lease_reclaimed_after_expiry(self):
+        dead = LLMGatekeeper(base_dir=self.base_dir, lease_size=8, lease_ttl=0)
+        self.assertTrue(dead.check_access("AAA")["allowed"])
+        dead._lease = None  # release() 없이 종료된 프로세스
+
+        other = LLMGatekeeper(base_dir=self.base_dir, lease_size=0)
+        self.assertTrue(other.check_access("BBB")["allowed"])  # 회수됨 (8 + 1 ≤ 10)
+        state = self.read_state()
+        self.assertEqual((state["call_count"], state["leased"], state["leases"]), (9, 0, {}))
+
+        self.assertTrue(other.check_access("BBB")["allowed"])
+        self.assertEqual(other.check_access("BBB")["reason"], "DAILY_CAP_EXCEEDED")  # 영구 LEASED 아님
+        self.assertTrue(self.read_state()["kill_switch"])
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,90 @@
+import sys
+import os
+import json
+import time
+import unittest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from engine.providers.json_extract import JsonStreamExtractor, extract_json, split_batch, validate_strategy
+
+try:
+    import pydantic
+except ImportError:
+    pydantic = None
+
+STRATEGY = {
+    "decision": "WAIT",
+    "score": 55,
+    "confidence": 0.5,
+    "reasoning": "FORMING: range {tightens} \"quoted\" \\ ok",
+    "trading_plan": {"entry_price": "WAIT", "stop_loss": "N/A", "target_price": "N/A"},
+}
+
+
+class TestJsonExtract(unittest.TestCase):
+    def test_fenced_block_with_trailing_prose(self):
+        text = "Sure! {not json} here:\n```json\n" + json.dumps(STRATEGY, indent=2) + "\n```\nLet me know {if} you need more."
+        self.assertEqual(extract_json(text), STRATEGY)
+        self.assertEqual(extract_json(text, validator=validate_strategy), STRATEGY)
+
+    def test_unbalanced_brace_in_prose_falls_back_to_fence(self):
+        text = "Score range {0-100 as usual.\n```json\n" + json.dumps(STRATEGY) + "\n```\nDone."
+        self.assertEqual(extract_json(text, validator=validate_strategy), STRATEGY)
+
+        extractor = JsonStreamExtractor(validator=validate_strategy)
+        for i in range(0, len(text), 7):
+            self.assertIsNone(extractor.feed(text[i: i + 7]))  # 구간이 닫히지 않음
+        self.assertEqual(extractor.finish(), STRATEGY)
+
+    def test_compact_keeps_unset_escape_marker(self):
+        extractor = JsonStreamExtractor()
+        extractor.feed("prose without json ")
+        extractor.feed("more prose ")
+        self.assertEqual(extractor._escape_at, -1)
+        self.assertEqual(extractor.feed('{"a": "x"}'), {"a": "x"})
+
+    def test_streamed_chunks_match_whole_text(self):
+        text = "prefix [1] " + json.dumps(STRATEGY, ensure_ascii=False) + " trailing prose"
+        for size in (1, 3, 17):
+            extractor = JsonStreamExtractor(validator=validate_strategy)
+            results = [extractor.feed(text[i: i + size]) for i in range(0, len(text), size)]
+            first_done = next(i for i, r in enumerate(results) if r is not None)
+            self.assertEqual(results[first_done], STRATEGY)
+            # 완성 시점 = JSON 닫는 괄호가 들어온 chunk (이후 prose 불필요)
+            self.assertLess(first_done * size, text.index(" trailing"))
+
+    def test_validator_skips_to_next_object(self):
+        text = '{"decision": "MAYBE"} then {"decision": "buy", "score": 70, "confidence": 0.7, "reasoning": "r", "trading_plan": {}}'
+        self.assertEqual(extract_json(text, validator=validate_strategy)["decision"], "BUY")
+        self.assertIsNone(extract_json('{"decision": "BUY"}', validator=validate_strategy))
+
+    @unittest.skipIf(pydantic is None, "pydantic not installed")
+    def test_numeric_values_coerced_before_schema(self):
+        from engine.providers import json_extract
+        self.assertTrue(json_extract._load_strategy_model())  # src.models schema 경로
+
+        raw = dict(STRATEGY, score=72.5, trading_plan={"entry_price": 182.5, "stop_loss": 175, "target_price": None})
+        expected = dict(STRATEGY, score=72, trading_plan={"entry_price": "182.5", "stop_loss": "175", "target_price": "N/A"})
+        self.assertEqual(validate_strategy(raw), expected)
+
+        text = json.dumps(raw) + " trailing prose"
+        extractor = JsonStreamExtractor(validator=validate_strategy)
+        self.assertEqual(extractor.feed(text[:text.index(" trailing")]), expected)  # stream 조기 완료
+
+    def test_linear_on_unterminated_output(self):
+        text = "{" + '"k": "' + "x{" * 200_000
+        start = time.monotonic()
+        self.assertIsNone(extract_json(text))
+        self.assertLess(time.monotonic() - start, 2.0)
+
+    def test_split_batch(self):
+        arr = [dict(STRATEGY, symbol="aapl"), dict(STRATEGY, symbol="MSFT", decision="NOPE"), dict(STRATEGY, symbol="XYZ")]
+        text = "[Result]\n```json\n" + json.dumps(arr) + "\n```"
+        self.assertEqual(split_batch(text, ["AAPL", "MSFT", "NVDA"]), {"AAPL": STRATEGY})
+
+        wrapped = json.dumps({"NVDA": STRATEGY})
+        self.assertEqual(split_batch(wrapped, ["NVDA"]), {"NVDA": STRATEGY})
+
+
+if __name__ == '__main__':
+    unittest.main()
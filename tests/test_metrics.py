@@ -0,0 +1,64 @@
+import sys
+import os
+import json
+import shutil
+import tempfile
+import unittest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from engine.metrics import LatencyHistogram, SniperMetrics
+
+
+class TestLatencyHistogram(unittest.TestCase):
+    def test_percentiles_within_bucket_precision(self):
+        hist = LatencyHistogram()
+        values = [float(v) for v in range(1, 1001)]  # 1 ~ 1000 ms
+        for v in values:
+            hist.record(v)
+
+        for q, exact in ((50, 500.0), (90, 900.0), (99, 990.0)):
+            got = hist.percentile(q)
+            self.assertGreaterEqual(got, exact)
+            self.assertLessEqual(got, exact * hist.growth)
+        self.assertEqual(hist.percentile(100), 1000.0)
+        self.assertEqual(hist.summary()["max"], 1000.0)
+        self.assertEqual(hist.summary()["avg"], 500.5)
+
+    def test_fixed_memory(self):
+        hist = LatencyHistogram()
+        n = len(hist.counts)
+        for v in (0.0, 1e-6, 1e9):
+            hist.record(v)
+        self.assertEqual(len(hist.counts), n)
+        self.assertEqual(hist.count, 3)
+
+
+class TestSniperMetricsLatency(unittest.TestCase):
+    def setUp(self):
+        self.base_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.base_dir, ignore_errors=True)
+
+    def test_stage_summary_written(self):
+        metrics = SniperMetrics(base_dir=self.base_dir)
+        for ms in (10, 20, 30, 400):
+            metrics.record_latency(ms / 1000.0)
+            metrics.record_latency(ms / 2000.0, stage="fetch")
+        with metrics.stage("persist"):
+            pass
+
+        with open(metrics.write(), encoding="utf-8") as f:
+            stats = json.load(f)
+
+        self.assertEqual(stats["avg_latency_ms"], 115.0)
+        self.assertEqual(stats["latency_ms"]["max"], 400.0)
+        self.assertEqual(stats["latency_ms"]["count"], 4)
+        self.assertEqual(set(stats["stage_latency_ms"]), {"fetch", "persist"})
+        self.assertEqual(stats["stage_latency_ms"]["fetch"]["max"], 200.0)
+        for key in ("p50", "p90", "p99", "max"):
+            self.assertIn(key, stats["stage_latency_ms"]["persist"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+import sys
+import os
+import time
+import json
+import shutil
+import tempfile
+import unittest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from engine.providers.model_registry import ModelRegistry, is_model_unavailable
+
+LISTED = ["models/gemini-pro", "models/other-x", "models/gemini-1.5-flash-002"]
+
+
+class FakeLister:
+    def __init__(self, models=LISTED):
+        self.models = models
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return list(self.models)
+
+
+class TestModelRegistry(unittest.TestCase):
+    def setUp(self):
+        self.base_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.base_dir, ignore_errors=True)
+
+    def make(self, lister, ttl_seconds=3600, cold_wait_seconds=5.0):
+        return ModelRegistry(
+            "gemini", lister,
+            preferences=("gemini-1.5-flash", "gemini-pro"),
+            defaults=("models/default-a", "models/default-b"),
+            base_dir=self.base_dir, ttl_seconds=ttl_seconds, cold_wait_seconds=cold_wait_seconds,
+        )
+
+    def test_cold_resolve_waits_for_first_discovery(self):
+        lister = FakeLister()
+        registry = self.make(lister)
+        self.assertEqual(registry.resolve(), "models/gemini-1.5-flash-002")  # 기본 후보 대신 조회 결과
+        self.assertEqual(lister.calls, 1)
+        self.assertEqual(registry.candidates(), ["models/gemini-1.5-flash-002", "models/gemini-pro", "models/other-x"])
+
+    def test_cold_resolve_falls_back_to_defaults_when_discovery_slow(self):
+        def slow_lister():
+            time.sleep(0.5)
+            return list(LISTED)
+
+        registry = self.make(slow_lister, cold_wait_seconds=0.05)
+        self.assertEqual(registry.resolve(), "models/default-a")
+        registry.wait_refresh(5)
+        self.assertEqual(registry.resolve(), "models/gemini-1.5-flash-002")
+
+    def test_attempts_put_current_model_first(self):
+        registry = self.make(FakeLister())
+        registry.refresh()
+        self.assertEqual(
+            registry.attempts("models/gemini-pro", limit=2),
+            ["models/gemini-pro", "models/gemini-1.5-flash-002"],
+        )
+
+    def test_only_missing_model_counts_as_model_failure(self):
+        self.assertTrue(is_model_unavailable(404, "models/x is not found for API version v1beta"))
+        self.assertTrue(is_model_unavailable(400, '{"error": {"message": "Model not found"}}'))
+        self.assertFalse(is_model_unavailable(400, '{"error": {"message": "API key not valid"}}'))
+        self.assertFalse(is_model_unavailable(400, '{"error": {"message": "Invalid JSON payload"}}'))
+        self.assertFalse(is_model_unavailable(500, ""))
+
+    def test_fresh_cache_shared_across_instances(self):
+        self.make(FakeLister()).refresh()
+        lister = FakeLister()
+        other = self.make(lister)  # 다른 프로세스 / 재시작
+        self.assertEqual(other.resolve(), "models/gemini-1.5-flash-002")
+        other.wait_refresh(5)
+        self.assertEqual(lister.calls, 0)
+
+    def test_failure_moves_model_down(self):
+        registry = self.make(FakeLister())
+        registry.refresh()
+        registry.report_failure("models/gemini-1.5-flash-002")
+        self.assertEqual(registry.resolve(), "models/gemini-pro")
+        registry.report_success("models/gemini-1.5-flash-002")
+        self.assertEqual(registry.resolve(), "models/gemini-1.5-flash-002")
+
+    def test_expired_cache_refreshes(self):
+        registry = self.make(FakeLister(), ttl_seconds=60)
+        registry.refresh()
+        with open(registry.state_file, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        data["gemini"]["fetched_at_ts"] = time.time() - 120
+        with open(registry.state_file, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+
+        lister = FakeLister(["models/gemini-2.0-flash"])
+        stale = self.make(lister, ttl_seconds=60)
+        self.assertEqual(stale.resolve(), "models/gemini-1.5-flash-002")  # 만료 캐시 즉시 사용
+        stale.wait_refresh(5)
+        self.assertEqual(lister.calls, 1)
+        self.assertEqual(stale.resolve(), "models/gemini-2.0-flash")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -40,3 +40,78 @@ def test_phase3_batch_basic():
 
     assert "AAPL" in results
     assert metrics_path is not None
+
+
+def test_phase3_batch_parallel_matches_sequential(tmp_path):
+    import json
+    import threading
+    import time
+
+    symbols = [f"S{i}" for i in range(20)] + ["S0", "S1"]
+    active = {"now": 0, "peak": 0}
+    lock = threading.Lock()
+
+    def make_processor():
+        inner = MockProcessor()
+
+        def processor(symbol):
+            with lock:
+                active["now"] += 1
+                active["peak"] = max(active["peak"], active["now"])
+            time.sleep(0.01)
+            with lock:
+                active["now"] -= 1
+            if symbol == "S5":
+                raise RuntimeError("boom")
+            return inner(symbol)
+        return processor
+
+    outputs = {}
+    for workers in (1, 8):
+        base_dir = tmp_path / f"w{workers}"
+        runner = SniperBatchRunner(make_processor(), base_dir=str(base_dir), max_workers=workers)
+        results, metrics_path = runner.run(symbols)
+
+        out_root = base_dir / "data" / "out"
+        files = {p.name: p.read_text() for p in out_root.rglob("*.json")}
+        with open(metrics_path, encoding="utf-8") as f:
+            stats = json.load(f)
+        counts = {k: v for k, v in stats.items() if k.endswith("_count")}
+        outputs[workers] = (list(results.items()), files, counts)
+
+    assert outputs[1] == outputs[8]
+    assert outputs[8][0][5][1]["status"] == "error"
+    assert outputs[8][2]["symbol_processed_count"] == 21
+    assert outputs[8][2]["cache_hit_count"] == 2
+    assert active["peak"] > 1
+
+
+def test_phase3_batch_stage_latency(tmp_path):
+    import json
+    from engine.metrics import stage
+
+    def fetch_prices(symbol):
+        # processor 하위 코드: runner가 bind한 metrics에 기록
+        with stage("fetch"):
+            return [1.0, 2.0]
+
+    def processor(symbol, stage):
+        prices = fetch_prices(symbol)
+        with stage("indicator"):
+            avg = sum(prices) / len(prices)
+        with stage("llm"):
+            pass
+        return {"symbol": symbol, "avg": avg, "cache_hit": False, "api_called": True}
+
+    runner = SniperBatchRunner(processor, base_dir=str(tmp_path), max_workers=2)
+    results, metrics_path = runner.run(["AAA", "BBB"])
+    assert results["AAA"]["avg"] == 1.5
+
+    with open(metrics_path, encoding="utf-8") as f:
+        stages = json.load(f)["stage_latency_ms"]
+    assert set(stages) == {"fetch", "indicator", "llm", "persist", "process"}
+    assert all(s["count"] == 2 for s in stages.values())
+
+    # batch 밖에서는 no-op
+    with stage("fetch"):
+        pass
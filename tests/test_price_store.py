@@ -0,0 +1,139 @@
+import sys
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import engine.price_store as price_store
+from engine.price_store import PriceStore
+
+
+def _day_values(idx):
+    return (pd.DatetimeIndex(idx) - pd.Timestamp("2000-01-01")).days.to_numpy(dtype=float) + 1
+
+
+class FakeYF:
+    """yf.download 대체: 요청 기록 + 영업일 OHLCV 생성 (값 = 날짜 기준, scale로 수정주가 기준 변경 흉내)"""
+
+    def __init__(self):
+        self.calls = []
+        self.scale = 1.0
+        self.missing = set()
+
+    def download(self, symbols, start, end, **kwargs):
+        self.calls.append((symbols, start, end))
+        syms = [symbols] if isinstance(symbols, str) else list(symbols)
+        idx = pd.bdate_range(start, pd.Timestamp(end) - pd.Timedelta(days=1))
+        values = _day_values(idx) * self.scale
+        frames = {
+            s: pd.DataFrame({c: values if s not in self.missing else np.nan for c in ["Open", "High", "Low", "Close", "Volume"]}, index=idx)
+            for s in syms
+        }
+        if len(syms) == 1:
+            return frames[syms[0]]
+        return pd.concat(frames, axis=1)
+
+
+class TestPriceStore(unittest.TestCase):
+    def setUp(self):
+        self.base_dir = tempfile.mkdtemp()
+        self.fake = FakeYF()
+        self._orig_yf = price_store.yf
+        price_store.yf = self.fake
+        self.store = PriceStore(base_dir=self.base_dir)
+
+    def tearDown(self):
+        price_store.yf = self._orig_yf
+        shutil.rmtree(self.base_dir, ignore_errors=True)
+
+    def test_warm_run_is_network_free(self):
+        cold = self.store.load_many(["AAPL", "MSFT"], period="1y")
+        self.assertEqual(set(cold), {"AAPL", "MSFT"})
+        self.assertEqual(len(self.fake.calls), 1)  # batch 1회
+
+        # 더 짧은 구간 = 저장소 조회만
+        warm = self.store.load_many(["AAPL", "MSFT"], period="60d")
+        self.assertEqual(len(self.fake.calls), 1)
+        self.assertLess(len(warm["AAPL"]), len(cold["AAPL"]))
+        self.assertTrue(warm["AAPL"].index.is_monotonic_increasing)
+
+    def test_only_missing_range_is_fetched(self):
+        self.store.load("AAPL", period="1y")
+        have_start = self.store._read_meta("AAPL")["start"]
+        self.store.load("AAPL", start=pd.Timestamp("2020-01-01"), end=pd.Timestamp("2020-02-01"))
+
+        # 커버리지 연속성: 기존 구간 시작점까지 채움
+        _, start, end = self.fake.calls[-1]
+        self.assertEqual((start, end), ("2020-01-01", have_start))
+        self.assertEqual(self.store._read_meta("AAPL")["start"], "2020-01-01")
+
+        full = self.store.read("AAPL")
+        self.assertFalse(full.index.duplicated().any())
+
+    def test_pending_lists_cold_symbols_only(self):
+        self.assertEqual(self.store.pending(["aapl", "MSFT", "AAPL"], period="1y"), ["AAPL", "MSFT"])
+        self.store.load("AAPL", period="1y")
+        self.assertEqual(self.store.pending(["AAPL", "MSFT"], period="6mo"), ["MSFT"])
+        self.assertEqual(len(self.fake.calls), 1)  # pending()은 네트워크 호출 없음
+
+    def _age_coverage(self, symbol, days):
+        """커버리지 end를 과거로 밀어 다음 load에서 뒤쪽 구간을 받게 함"""
+        meta = self.store._read_meta(symbol)
+        meta["end"] = (pd.Timestamp(meta["end"]) - pd.Timedelta(days=days)).date().isoformat()
+        meta["fetched_at"] = 0
+        bars = np.asarray(self.store._read_bars(symbol))
+        self.store._write(symbol, bars[bars["date"] < np.datetime64(meta["end"])], meta)
+
+    def test_failed_symbol_is_not_marked_covered(self):
+        self.fake.missing = {"MSFT"}
+        out = self.store.load_many(["AAPL", "MSFT"], period="6mo")
+        self.assertEqual(set(out), {"AAPL"})
+        self.assertIsNone(self.store._read_meta("MSFT"))
+
+        self.fake.missing = set()
+        self.assertEqual(self.store.pending(["AAPL", "MSFT"], period="6mo"), ["MSFT"])
+        self.assertIn("MSFT", self.store.load_many(["MSFT"], period="6mo"))
+
+    def test_forward_gap_overlaps_stored_bars(self):
+        self.store.load("AAPL", period="6mo")
+        self._age_coverage("AAPL", 20)
+        have_end = self.store._read_meta("AAPL")["end"]
+
+        self.store.load("AAPL", period="6mo")
+        self.assertEqual(len(self.fake.calls), 2)  # 기준 동일 -> 전체 재다운로드 없음
+        _, start, _ = self.fake.calls[-1]
+        self.assertLess(start, have_end)
+        self.assertFalse(self.store.read("AAPL").index.duplicated().any())
+
+    def test_adjustment_change_refetches_full_history(self):
+        self.store.load("AAPL", period="6mo")
+        have_start = self.store._read_meta("AAPL")["start"]
+        self._age_coverage("AAPL", 20)
+
+        self.fake.scale = 0.5  # 분할: 과거 수정주가 전체 변경
+        df = self.store.load("AAPL", period="6mo")
+        self.assertEqual(len(self.fake.calls), 3)
+        _, start, _ = self.fake.calls[-1]
+        self.assertEqual(start, have_start)
+
+        expected = _day_values(df.index) * 0.5
+        np.testing.assert_allclose(df["Close"].to_numpy(), expected)
+
+    def test_concurrent_writes_use_unique_tmp_files(self):
+        from concurrent.futures import ThreadPoolExecutor
+
+        bars = price_store._to_bars(self.fake.download("AAPL", "2024-01-01", "2024-03-01"))
+        meta = {"start": "2024-01-01", "end": "2024-03-01", "fetched_at": 0}
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(lambda _: self.store._write("AAPL", bars, meta), range(32)))
+
+        self.assertEqual(len(self.store.read("AAPL")), len(bars))
+        self.assertEqual([f for f in os.listdir(self.store.store_dir) if ".tmp" in f], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
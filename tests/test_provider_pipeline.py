@@ -0,0 +1,72 @@
+import sys
+import os
+import time
+import asyncio
+import threading
+import unittest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from engine.providers.pipeline import stream_calls
+
+
+class TestStreamCalls(unittest.TestCase):
+    def test_results_stream_in_completion_order(self):
+        delays = {"SLOW": 0.3, "MID": 0.15, "FAST": 0.0}
+
+        def call(symbol, payload):
+            time.sleep(delays[symbol])
+            return {"symbol": symbol, "payload": payload}
+
+        async def collect():
+            start = time.monotonic()
+            out = [(item[0], res) async for item, res in stream_calls(call, [(s, i) for i, s in enumerate(delays)], concurrency=3)]
+            return out, time.monotonic() - start
+
+        out, elapsed = asyncio.run(collect())
+        self.assertEqual([s for s, _ in out], ["FAST", "MID", "SLOW"])
+        self.assertEqual(out[0][1], {"symbol": "FAST", "payload": 2})
+        self.assertLess(elapsed, 0.45)  # 합계(0.45s)가 아니라 최장 호출 수준
+
+    def test_in_flight_bounded(self):
+        active, peak = [0], [0]
+        guard = threading.Lock()
+
+        def call(i):
+            with guard:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.02)
+            with guard:
+                active[0] -= 1
+            return i
+
+        async def collect():
+            return sorted([res async for _, res in stream_calls(call, [(i,) for i in range(20)], concurrency=4)])
+
+        self.assertEqual(asyncio.run(collect()), list(range(20)))
+        self.assertLessEqual(peak[0], 4)
+        self.assertGreater(peak[0], 1)
+
+    def test_early_stop_cancels_pending(self):
+        started = []
+
+        def call(i):
+            started.append(i)
+            time.sleep(0.05)
+            return i
+
+        async def first_only():
+            gen = stream_calls(call, [(i,) for i in range(10)], concurrency=2)
+            async for _, res in gen:
+                break
+            await gen.aclose()
+            await asyncio.sleep(0)
+            return [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+
+        self.assertEqual(asyncio.run(first_only()), [])
+        time.sleep(0.15)
+        self.assertLess(len(started), 10)  # 미시작 호출 취소
+
+
+if __name__ == '__main__':
+    unittest.main()
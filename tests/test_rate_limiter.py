@@ -0,0 +1,58 @@
+import sys
+import os
+import time
+import shutil
+import asyncio
+import tempfile
+import unittest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.rate_limiter import TokenBucket, RateLimiterRegistry
+
+
+class TestTokenBucket(unittest.TestCase):
+    def setUp(self):
+        self.state_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.state_dir, ignore_errors=True)
+
+    def test_burst_then_paced(self):
+        bucket = TokenBucket(rate_per_sec=10, burst=3)
+        waits = [bucket.reserve() for _ in range(5)]
+        self.assertEqual(waits[:3], [0.0, 0.0, 0.0])
+        self.assertAlmostEqual(waits[3], 0.1, delta=0.02)
+        self.assertAlmostEqual(waits[4], 0.2, delta=0.02)
+
+    def test_state_shared_across_instances(self):
+        # 같은 state 파일 = 다른 프로세스의 bucket
+        path = os.path.join(self.state_dir, "gemini__pro.bucket")
+        a = TokenBucket(rate_per_sec=10, burst=2, state_file=path)
+        b = TokenBucket(rate_per_sec=10, burst=2, state_file=path)
+        self.assertEqual(a.reserve(), 0.0)
+        self.assertEqual(b.reserve(), 0.0)
+        self.assertGreater(a.reserve(), 0.05)
+
+    def test_registry_separates_provider_model(self):
+        registry = RateLimiterRegistry(default_rate_per_sec=1, default_burst=1, state_dir=self.state_dir)
+        registry.set_limit("gemini", "flash", rate_per_sec=100, burst=5)
+        self.assertEqual(registry.bucket("gemini", "pro").reserve(), 0.0)
+        self.assertEqual(registry.bucket("gemini", "models/flash-x").reserve(), 0.0)
+        self.assertEqual([registry.bucket("gemini", "flash").reserve() for _ in range(5)], [0.0] * 5)
+        self.assertGreater(registry.bucket("gemini", "pro").reserve(), 0.5)
+
+    def test_async_acquire_does_not_serialize_burst(self):
+        bucket = TokenBucket(rate_per_sec=20, burst=4)
+
+        async def run():
+            start = time.monotonic()
+            await asyncio.gather(*[bucket.acquire_async() for _ in range(6)])
+            return time.monotonic() - start
+
+        elapsed = asyncio.run(run())
+        self.assertGreaterEqual(elapsed, 0.09)  # burst 4 + 2개는 0.05s 간격
+        self.assertLess(elapsed, 0.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,264 @@
+import sys
+import os
+import json
+import time
+import asyncio
+import threading
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+try:
+    from engine.providers import real_provider
+    from engine.providers.real_provider import RealProvider
+except ImportError:  # google-genai 미설치 환경
+    real_provider = None
+from engine.cache import SniperCacheLayer
+
+STRATEGY = {
+    "decision": "WAIT",
+    "score": 55,
+    "confidence": 0.5,
+    "reasoning": "FORMING: range tightens",
+    "trading_plan": {"entry_price": "WAIT", "stop_loss": "N/A", "target_price": "N/A"},
+}
+
+
+class Chunk:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeStream:
+    """generate_content_stream 대체: 소비된 chunk 수 / close() 호출 기록"""
+
+    def __init__(self, texts):
+        self.texts = list(texts)
+        self.consumed = 0
+        self.closed = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.consumed >= len(self.texts):
+            raise StopIteration
+        self.consumed += 1
+        return Chunk(self.texts[self.consumed - 1])
+
+    def close(self):
+        self.closed += 1
+
+
+class FakeModels:
+    def __init__(self, respond=None, stream_texts=None):
+        self.respond = respond or (lambda prompt: json.dumps(STRATEGY))
+        self.stream_texts = stream_texts
+        self.prompts = []
+        self.streams = []
+
+    def generate_content(self, model, contents):
+        self.prompts.append(contents)
+        return Chunk(self.respond(contents))
+
+    def generate_content_stream(self, model, contents):
+        self.prompts.append(contents)
+        stream = FakeStream(self.stream_texts)
+        self.streams.append(stream)
+        return stream
+
+
+class CountingGatekeeper:
+    def __init__(self):
+        self.calls = []
+
+    def check_access(self, symbol, request_id=None):
+        self.calls.append(symbol)
+        return {"allowed": True, "reason": "OK"}
+
+
+def batch_response(symbols, decision="BUY"):
+    return json.dumps([dict(STRATEGY, symbol=s, decision=decision) for s in symbols])
+
+
+class FakeClient:
+    def __init__(self, api_key=None):
+        self.models = FakeModels()
+
+
+@unittest.skipIf(real_provider is None, "google-genai not installed")
+class ProviderTestCase(unittest.TestCase):
+    def setUp(self):
+        patches = [
+            mock.patch.dict(os.environ, {"GEMINI_API_KEY": "test-key"}),
+            mock.patch.object(real_provider.genai, "Client", FakeClient),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+    def make(self, **kwargs):
+        return RealProvider(model_name="models/test", **kwargs)
+
+
+class TestStreaming(ProviderTestCase):
+    def test_stream_stops_at_first_valid_json(self):
+        provider = self.make(stream=True)
+        text = json.dumps(STRATEGY)
+        provider.client.models.stream_texts = ["Sure: ", text[:20], text[20:], " trailing prose", " more prose"]
+
+        result = provider.analyze("AAA", {})
+        self.assertEqual(result["status"], "SUCCESS")
+        self.assertEqual(result["strategy_data"], STRATEGY)
+
+        stream = provider.client.models.streams[0]
+        self.assertEqual(stream.consumed, 3)  # 뒤따르는 chunk 미수신
+        self.assertEqual(stream.closed, 1)
+
+        stats = provider.get_usage_stats()
+        self.assertEqual((stats["total_calls"], stats["streamed_calls"], stats["early_stops"]), (1, 1, 1))
+        self.assertEqual(stats["ttft_ms"]["count"], 1)
+        self.assertEqual(stats["time_to_valid_json_ms"]["count"], 1)
+
+    def test_stream_without_valid_json_reads_to_end(self):
+        provider = self.make(stream=True)
+        provider.client.models.stream_texts = ["no ", "json ", "here"]
+
+        self.assertEqual(provider.analyze("AAA", {})["error"], "JSON_PARSE_ERROR")
+        stream = provider.client.models.streams[0]
+        self.assertEqual((stream.consumed, stream.closed), (3, 1))
+        stats = provider.get_usage_stats()
+        self.assertEqual((stats["early_stops"], stats["time_to_valid_json_ms"]["count"]), (0, 0))
+
+    def test_non_stream_records_latency(self):
+        provider = self.make(stream=False)
+        self.assertEqual(provider.analyze("AAA", {})["status"], "SUCCESS")
+        self.assertEqual(provider.client.models.streams, [])
+
+        stats = provider.get_usage_stats()
+        self.assertEqual((stats["total_calls"], stats["streamed_calls"], stats["early_stops"]), (1, 0, 0))
+        self.assertEqual(stats["latency_ms"]["count"], 1)
+        self.assertEqual(stats["ttft_ms"]["count"], 0)
+
+
+class TestAnalyzeBatch(ProviderTestCase):
+    def setUp(self):
+        super().setUp()
+        self.base_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.base_dir, True)
+        self.gatekeeper = CountingGatekeeper()
+
+    def respond(self, answered):
+        """batch prompt → answered 종목만 응답, 단건 prompt → 단건 strategy"""
+        def respond(prompt):
+            if "JSON array" in prompt:
+                return batch_response(answered)
+            return json.dumps(STRATEGY)
+        return respond
+
+    def test_missing_symbols_fall_back_to_single_calls(self):
+        provider = self.make(gatekeeper=self.gatekeeper)
+        provider.client.models.respond = self.respond(["AAA", "BBB"])
+        payloads = {s: {"news_summary": f"news {s}"} for s in ("AAA", "BBB", "CCC")}
+
+        results = provider.analyze_batch(payloads, batch_size=3)
+        self.assertEqual(list(results), ["AAA", "BBB", "CCC"])
+        self.assertTrue(all(r["status"] == "SUCCESS" for r in results.values()))
+        self.assertTrue(results["AAA"]["batched"])
+        self.assertNotIn("batched", results["CCC"])  # analyze() 단건 재시도
+
+        # gatekeeper slot: batch 1개 + 단건 재시도 1개
+        self.assertEqual(self.gatekeeper.calls, ["AAA+2", "CCC"])
+        self.assertEqual(len(provider.client.models.prompts), 2)
+
+        # usage: batch 합계를 응답 종목 수(2)로 균등 배분
+        batch_prompt = provider.client.models.prompts[0]
+        raw = batch_response(["AAA", "BBB"])
+        expected = {"input_tokens": len(batch_prompt) // 4 // 2, "output_tokens": len(raw) // 4 // 2}
+        self.assertEqual(results["AAA"]["usage"], expected)
+        self.assertEqual(results["BBB"]["usage"], expected)
+
+    def test_batch_results_cached_for_single_analyze(self):
+        cache = SniperCacheLayer(base_dir=self.base_dir)
+        provider = self.make(cache=cache, gatekeeper=self.gatekeeper)
+        provider.client.models.respond = self.respond(["AAA", "BBB"])
+        payloads = {s: {"news_summary": f"news {s}"} for s in ("AAA", "BBB")}
+
+        provider.analyze_batch(payloads, batch_size=2)
+        again = provider.analyze("AAA", payloads["AAA"])
+        self.assertTrue(again["cache_hit"])
+        self.assertEqual(self.gatekeeper.calls, ["AAA+1"])
+        self.assertEqual(len(provider.client.models.prompts), 1)
+
+    def test_stale_entry_replaced_with_fresh_batch_result(self):
+        cache = SniperCacheLayer(base_dir=self.base_dir, ttl_minutes=0.005, stale_grace_minutes=10)
+        provider = self.make(cache=cache, gatekeeper=self.gatekeeper)
+        payloads = {s: {"news_summary": f"news {s}"} for s in ("AAA", "BBB")}
+
+        provider.client.models.respond = lambda prompt: json.dumps(dict(STRATEGY, decision="AVOID"))
+        provider.analyze("AAA", payloads["AAA"])
+        time.sleep(0.4)  # TTL(0.3s) 경과 → stale grace 구간
+
+        # prompt 동일 (news_items는 prompt 밖) + fingerprint 변경 → 같은 key의 stale 항목 존재
+        payloads["AAA"] = {"news_summary": "news AAA", "news_items": [{"id": "n2"}]}
+        provider.client.models.respond = self.respond(["AAA", "BBB"])
+        results = provider.analyze_batch(payloads, batch_size=2)
+        self.assertEqual(results["AAA"]["strategy_data"]["decision"], "BUY")
+
+        prompt = provider._build_prompt("AAA", payloads["AAA"])
+        hash_key = cache._generate_key("gemini", provider.model_name, "AAA", prompt)
+        self.assertEqual(cache.backend.get("AAA", hash_key)["payload"]["strategy_data"]["decision"], "BUY")
+        fp_key = cache._fingerprint_key("gemini", provider.model_name, "AAA")
+        record = cache.backend.get("AAA", fp_key)
+        self.assertEqual(record["meta"]["fingerprint"], provider._fingerprint("AAA", payloads["AAA"]))
+        self.assertEqual(record["payload"]["strategy_data"]["decision"], "BUY")
+
+
+class TestFingerprintTemplate(ProviderTestCase):
+    def test_template_change_stops_reuse(self):
+        base_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, base_dir, True)
+        provider = self.make(cache=SniperCacheLayer(base_dir=base_dir))
+        payload = {"news_summary": "news AAA"}
+
+        self.assertTrue(provider.analyze("AAA", payload)["api_called"])
+        self.assertTrue(provider.analyze("AAA", payload)["cache_hit"])
+
+        # 입력 동일 + doctrine 변경 → fingerprint 불일치로 재분석
+        with mock.patch.object(real_provider, "_DOCTRINE", real_provider._DOCTRINE + "\n- New rule"):
+            self.assertTrue(provider.analyze("AAA", payload)["api_called"])
+        self.assertEqual(len(provider.client.models.prompts), 2)
+
+
+class TestAnalyzeMany(ProviderTestCase):
+    def test_results_for_every_symbol(self):
+        provider = self.make()
+        active, peak = [0], [0]
+        guard = threading.Lock()
+
+        def respond(prompt):
+            with guard:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.02)
+            with guard:
+                active[0] -= 1
+            return json.dumps(STRATEGY)
+
+        provider.client.models.respond = respond
+        payloads = {f"S{i}": {"news_summary": f"news {i}"} for i in range(8)}
+
+        async def collect():
+            return {symbol: result async for symbol, result in provider.analyze_many(payloads, concurrency=3)}
+
+        results = asyncio.run(collect())
+        self.assertEqual(set(results), set(payloads))
+        self.assertTrue(all(r["status"] == "SUCCESS" for r in results.values()))
+        self.assertLessEqual(peak[0], 3)
+        self.assertEqual(provider.get_usage_stats()["total_calls"], 8)
+
+
+if __name__ == '__main__':
+    unittest.main()
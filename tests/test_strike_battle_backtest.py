@@ -0,0 +1,50 @@
+import sys
+import os
+import unittest
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from engine.strike_battle.backtest_chimera import RealTradeRule, _calc_real_return, simulate_real_returns
+
+
+def make_ohlc(n, seed):
+    rng = np.random.default_rng(seed)
+    px = 50 * np.exp(np.cumsum(rng.normal(0, 0.04, n)))
+    return pd.DataFrame({
+        "Open": px * (1 + rng.normal(0, 0.01, n)),
+        "High": px * (1 + rng.random(n) * 0.08),
+        "Low": px * (1 - rng.random(n) * 0.08),
+        "Close": px,
+    }, index=pd.bdate_range("2024-01-01", periods=n))
+
+
+class TestSimulateRealReturns(unittest.TestCase):
+    def setUp(self):
+        self.data = {f"S{i}": make_ohlc(n, i) for i, n in enumerate([8, 60, 120, 250])}
+        rng = np.random.default_rng(42)
+        self.entries = []
+        for _ in range(2000):
+            sym = f"S{rng.integers(len(self.data))}"
+            df = self.data[sym]
+            self.entries.append((sym, df.index[rng.integers(len(df))]))
+
+    def assert_matches_loop(self, rule):
+        batch = simulate_real_returns(self.data, self.entries, rule)
+        for (sym, date), got in zip(self.entries, batch):
+            self.assertEqual(got, _calc_real_return(self.data[sym], date, rule))
+
+    def test_default_rule(self):
+        self.assert_matches_loop(RealTradeRule())
+
+    def test_tight_rule(self):
+        self.assert_matches_loop(RealTradeRule(hold_days=3, stop_loss_pct=-2.0, tp1_pct=2.0, tp2_pct=4.0))
+
+    def test_unknown_signal_date(self):
+        with self.assertRaises(KeyError):
+            simulate_real_returns(self.data, [("S1", pd.Timestamp("1999-01-01"))], RealTradeRule())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import sys
+import os
+import unittest
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from engine.strike_battle.indicators import compute_features_for_date, precompute_features, build_feature_tensor, FeatureTensor
+from engine.strike_battle.engine_chimera import select_chimera, select_chimera_batch
+
+
+def make_ohlcv(n=300, seed=0):
+    rng = np.random.default_rng(seed)
+    px = 50 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+    return pd.DataFrame({
+        "Open": px,
+        "High": px * (1 + rng.random(n) * 0.03),
+        "Low": px * (1 - rng.random(n) * 0.03),
+        "Close": px,
+        "Volume": rng.integers(100_000, 10_000_000, n).astype(float),
+    }, index=pd.bdate_range("2024-01-01", periods=n))
+
+
+def reference_features(df, idx):
+    """기존 슬라이스 방식 (df.iloc[:idx+1]) 산식"""
+    sub = df.iloc[:idx + 1]
+    vol_avg = sub["Volume"].iloc[-11:-1].mean()
+    low_60 = sub["Low"].iloc[-61:].min()
+    return {
+        "volume_ratio": sub["Volume"].iloc[-1] / vol_avg,
+        "distance_pct": (sub["Close"].iloc[-1] - low_60) / low_60 * 100,
+        "ret1d_pct": (sub["Close"].iloc[-1] / sub["Close"].iloc[-2] - 1.0) * 100,
+        "flow_v1": sub["Close"].iloc[-5:].mean() > sub["Close"].iloc[-20:].mean(),
+        "breakout_high": sub["High"].iloc[-1] > sub["High"].iloc[-6:-1].max(),
+    }
+
+
+class TestStrikeBattleFeatures(unittest.TestCase):
+    def test_precomputed_matches_slice_reference(self):
+        df = make_ohlcv()
+        table = precompute_features(df)
+
+        for idx in range(len(df)):
+            date = df.index[idx]
+            fast = compute_features_for_date("TEST", table, date)
+            windowed = compute_features_for_date("TEST", df, date)
+            if idx < 60:
+                self.assertIsNone(fast)
+                self.assertIsNone(windowed)
+                continue
+
+            ref = reference_features(df, idx)
+            for f in ("volume_ratio", "distance_pct", "ret1d_pct"):
+                self.assertAlmostEqual(getattr(fast, f), ref[f], places=9)
+                self.assertAlmostEqual(getattr(windowed, f), ref[f], places=9)
+            for f in ("flow_v1", "breakout_high"):
+                self.assertEqual(getattr(fast, f), ref[f])
+                self.assertEqual(getattr(windowed, f), ref[f])
+
+    def test_unknown_date(self):
+        table = precompute_features(make_ohlcv(n=80))
+        self.assertIsNone(compute_features_for_date("TEST", table, pd.Timestamp("1999-01-01")))
+
+    def test_batch_selection_matches_select_chimera(self):
+        data = {}
+        for i in range(40):
+            df = make_ohlcv(n=160, seed=i)
+            df["Volume"] *= np.where(np.arange(160) % (i + 3) == 0, 5.0, 1.0)
+            data[f"S{i}"] = precompute_features(df.iloc[i:])
+        dates = sorted(set().union(*[d.index for d in data.values()]))
+
+        batch = select_chimera_batch(build_feature_tensor(data, dates))
+        self.assertEqual(len(batch), len(dates))
+        total = 0
+        for day, hits in zip(dates, batch):
+            feats = [f for f in (compute_features_for_date(s, data[s], day) for s in data) if f]
+            expected = select_chimera(feats)
+            self.assertEqual(hits, expected)
+            total += len(expected)
+        self.assertGreater(total, 0)
+
+    def test_batch_selection_empty_features(self):
+        tensor = FeatureTensor.from_features([])
+        self.assertEqual(len(tensor.dates), 0)
+        self.assertEqual(select_chimera_batch(tensor), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
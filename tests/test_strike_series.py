@@ -0,0 +1,59 @@
+import sys
+import os
+import unittest
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from engine.strike.indicators import (
+    calc_breakout, calc_breakout_series,
+    calc_distance, calc_distance_series,
+    calc_flow_v1, calc_flow_v1_series,
+    calc_volume_shock, calc_volume_shock_series,
+)
+from engine.strike.strike_logic import is_strike_candidate, is_strike_candidate_series
+
+
+def make_frame(n=250, seed=0):
+    rng = np.random.default_rng(seed)
+    vol = rng.integers(100_000, 1_000_000, n).astype(float)
+    vol[rng.random(n) < 0.2] *= 3
+    return pd.DataFrame({
+        "Close": 50 * np.exp(np.cumsum(rng.normal(0.002, 0.03, n))),
+        "Volume": vol,
+    }, index=pd.bdate_range("2024-01-01", periods=n))
+
+
+def same(a, b):
+    return (pd.isna(a) and pd.isna(b)) or abs(a - b) < 1e-12
+
+
+class TestStrikeSeries(unittest.TestCase):
+    def test_series_match_scalar_per_day(self):
+        hits = 0
+        for seed in range(5):
+            df = make_frame(seed=seed)
+            dist = calc_distance_series(df["Close"])
+            ratio = calc_volume_shock_series(df["Volume"])
+            flow = calc_flow_v1_series(df["Close"])
+            breakout = calc_breakout_series(df["Close"])
+            strike = is_strike_candidate_series(df)
+
+            for i in range(len(df)):
+                sub = df.iloc[:i + 1]
+                self.assertTrue(same(dist.iloc[i], calc_distance(sub["Close"])))
+                self.assertTrue(same(ratio.iloc[i], calc_volume_shock(sub["Volume"])))
+                self.assertEqual(flow.iloc[i], calc_flow_v1(sub["Close"]))
+                self.assertEqual(breakout.iloc[i], calc_breakout(sub["Close"]))
+                self.assertEqual(bool(strike.iloc[i]), is_strike_candidate(sub) is not None)
+                hits += bool(strike.iloc[i])
+        self.assertGreater(hits, 0)
+
+    def test_missing_columns(self):
+        df = make_frame(n=30).drop(columns=["Volume"])
+        self.assertFalse(is_strike_candidate_series(df).any())
+
+
+if __name__ == '__main__':
+    unittest.main()